@@ -1,4 +1,5 @@
 import os
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -10,7 +11,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# Callers that already configured logging (app.bootstrap) can opt out.
+if config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -33,6 +36,18 @@ def get_url():
     return str(settings.SQLALCHEMY_DATABASE_URI)
 
 
+# Hash partitions of item, created by the migrations and not in the models
+PARTITION_TABLE = re.compile(r"item_p\d+")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table":
+        return not PARTITION_TABLE.fullmatch(name)
+    if type_ == "index" and object.table is not None:
+        return not PARTITION_TABLE.fullmatch(object.table.name)
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -47,7 +62,11 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,6 +80,21 @@ def run_migrations_online():
     and associate a connection with the context.
 
     """
+    # Reuse the caller's connection when one is given (app.bootstrap), so the
+    # bootstrap does not need to build a second engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = get_url()
     connectable = engine_from_config(
@@ -71,7 +105,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,79 @@
+"""partition item by hospital
+
+Denormalizes the owner's hospital onto item and turns item into a table
+hash-partitioned on hospital_id, so hospital-scoped queries only touch one
+partition. Postgres requires the partition key in the primary key, so the
+primary key becomes (id, hospital_id); ids stay unique because they are UUIDs.
+
+Revision ID: 8b4e2d6f1a37
+Revises: 3f1a9c2b7d10
+Create Date: 2026-10-19 10:02:17.520331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e2d6f1a37'
+down_revision = '3f1a9c2b7d10'
+branch_labels = None
+depends_on = None
+
+ITEM_PARTITIONS = 16
+
+
+def upgrade():
+    op.rename_table('item', 'item_unpartitioned')
+    op.execute('ALTER TABLE item_unpartitioned RENAME CONSTRAINT item_pkey TO item_unpartitioned_pkey')
+    op.execute('ALTER TABLE item_unpartitioned RENAME CONSTRAINT item_owner_id_fkey TO item_unpartitioned_owner_id_fkey')
+
+    op.create_table('item',
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('owner_id', sa.Uuid(), nullable=False),
+    sa.Column('hospital_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['hospital_id'], ['hospital.id'], ),
+    sa.PrimaryKeyConstraint('id', 'hospital_id'),
+    postgresql_partition_by='HASH (hospital_id)',
+    )
+    for remainder in range(ITEM_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE item_p{remainder} PARTITION OF item '
+            f'FOR VALUES WITH (MODULUS {ITEM_PARTITIONS}, REMAINDER {remainder})'
+        )
+
+    op.execute(
+        'INSERT INTO item (title, description, id, owner_id, hospital_id) '
+        'SELECT i.title, i.description, i.id, i.owner_id, u.hospital_id '
+        'FROM item_unpartitioned i JOIN "user" u ON u.id = i.owner_id'
+    )
+    op.drop_table('item_unpartitioned')
+    op.execute('ANALYZE item')
+
+
+def downgrade():
+    op.rename_table('item', 'item_partitioned')
+    op.execute('ALTER TABLE item_partitioned RENAME CONSTRAINT item_pkey TO item_partitioned_pkey')
+    op.execute('ALTER TABLE item_partitioned RENAME CONSTRAINT item_owner_id_fkey TO item_partitioned_owner_id_fkey')
+    op.execute('ALTER TABLE item_partitioned RENAME CONSTRAINT item_hospital_id_fkey TO item_partitioned_hospital_id_fkey')
+
+    op.create_table('item',
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('owner_id', sa.Uuid(), nullable=False),
+    # Named explicitly, the partitions still hold constraints with the default
+    # names, so Postgres would pick item_owner_id_fkey1 and upgrade would fail
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE', name='item_owner_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='item_pkey')
+    )
+    op.execute(
+        'INSERT INTO item (title, description, id, owner_id) '
+        'SELECT title, description, id, owner_id FROM item_partitioned'
+    )
+    # Dropping the parent drops every partition
+    op.drop_table('item_partitioned')
@@ -0,0 +1,97 @@
+"""add change notifications
+
+Statement-level triggers on item and "user" send a NOTIFY on the
+entity_changes channel for every insert, update and delete, consumed by the
+event listener of each worker (app/core/events.py). Each trigger sends one
+notification for its whole statement, listing the ids of the rows it wrote, so
+a bulk write or a purge batch does not flood the channel. A statement writing
+more than MAX_NOTIFY_ROWS rows sends no ids (a payload is limited to 8000
+bytes), listeners then tell their clients to resync. Notifications are only
+delivered when the transaction commits and are dropped on rollback. The
+payload holds ids only, the rows themselves are fetched through the API with
+its permission checks.
+
+Revision ID: 8d2f6a4b1e90
+Revises: 5b9d3e7a1c48
+Create Date: 2026-10-19 18:02:51.734090
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6a4b1e90'
+down_revision = '5b9d3e7a1c48'
+branch_labels = None
+depends_on = None
+
+# An [id, owner_id] pair takes about 80 bytes of the payload
+MAX_NOTIFY_ROWS = 64
+
+# {owner} is the column identifying whose row it is
+NOTIFY_FUNCTION = """
+CREATE FUNCTION notify_{table}_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed_count bigint;
+    changed_rows json;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT count(*), json_agg(json_build_array(id, {owner}))
+        INTO changed_count, changed_rows
+        FROM (SELECT * FROM old_rows LIMIT {max_rows} + 1) AS changed;
+    ELSE
+        SELECT count(*), json_agg(json_build_array(id, {owner}))
+        INTO changed_count, changed_rows
+        FROM (SELECT * FROM new_rows LIMIT {max_rows} + 1) AS changed;
+    END IF;
+    -- Statement triggers also fire for statements that matched no rows
+    IF changed_count = 0 THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('entity_changes', json_build_object(
+        'entity', '{table}',
+        'op', lower(TG_OP),
+        'rows', CASE WHEN changed_count > {max_rows} THEN NULL ELSE changed_rows END,
+        'version', pg_current_xact_id()::text
+    )::text);
+    RETURN NULL;
+END
+$$
+"""
+
+TABLES = {
+    # table: (quoted name, owner column)
+    'item': ('item', 'owner_id'),
+    'user': ('"user"', 'id'),
+}
+
+
+def upgrade():
+    for table, (quoted, owner) in TABLES.items():
+        op.execute(NOTIFY_FUNCTION.format(table=table, owner=owner, max_rows=MAX_NOTIFY_ROWS))
+        # Transition tables need one trigger per event
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_insert AFTER INSERT ON {quoted} "
+            "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION notify_{table}_change()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_delete AFTER DELETE ON {quoted} "
+            "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION notify_{table}_change()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_update AFTER UPDATE ON {quoted} "
+            "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION notify_{table}_change()"
+        )
+
+
+def downgrade():
+    for table, (quoted, _) in TABLES.items():
+        for event in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER {table}_notify_{event} ON {quoted}")
+        op.execute(f"DROP FUNCTION notify_{table}_change()")
@@ -0,0 +1,41 @@
+"""unique lowercase user email
+
+Backfills user.email to its canonical lower-cased form and makes ix_user_email
+unique. Fails without changing anything if two accounts only differ by case;
+those have to be merged by hand first.
+
+Revision ID: a6f0c4d8e215
+Revises: 5d7c3e9a2b41
+Create Date: 2026-10-19 11:20:38.244970
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f0c4d8e215'
+down_revision = '5d7c3e9a2b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        'SELECT lower(trim(email)) FROM "user" '
+        'GROUP BY lower(trim(email)) HAVING count(*) > 1'
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            "Cannot make user emails unique, these differ only by case: "
+            + ", ".join(duplicates)
+        )
+    op.execute('UPDATE "user" SET email = lower(trim(email)) WHERE email <> lower(trim(email))')
+    op.drop_index('ix_user_email', table_name='user')
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.create_index('ix_user_email', 'user', ['email'], unique=False)
@@ -1,8 +1,10 @@
+import math
 from collections.abc import Generator
+from functools import partial
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -10,7 +12,9 @@ from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import engine, replica_router
+from app.core.replicas import ClientPin
+from app.core.route_classes import route_class
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -18,16 +22,83 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+PIN_COOKIE = "pin"
+
+
+def _set_pin_cookie(response: Response, until: float) -> None:
+    response.set_cookie(
+        PIN_COOKIE,
+        jwt.encode({"until": until}, settings.SECRET_KEY, algorithm=security.ALGORITHM),
+        max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+        secure=settings.ENVIRONMENT != "local",
+    )
+
+
+def get_client_pin(request: Request, response: Response) -> ClientPin:
+    """
+    The client's read-your-writes pin, carried in a signed cookie.
+
+    Every worker reads the same cookie, so a read served by another worker
+    than the write still goes to the primary. Extending the pin sets the
+    cookie again; a missing or tampered cookie means no pin.
+    """
+    until = 0.0
+    cookie = request.cookies.get(PIN_COOKIE)
+    if cookie:
+        try:
+            payload = jwt.decode(
+                cookie, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            )
+            until = float(payload["until"])
+        except (InvalidTokenError, KeyError, TypeError, ValueError):
+            pass
+    return ClientPin(until, on_extend=partial(_set_pin_cookie, response))
+
+
+ClientPinDep = Annotated[ClientPin, Depends(get_client_pin)]
+
+
+def get_route_class(request: Request) -> str:
+    """Picks the statement timeout of the request's sessions."""
+    return route_class(request.method, request.url.path)
+
+
+RouteClassDep = Annotated[str, Depends(get_route_class)]
+
+
+def get_db(
+    client_pin: ClientPinDep, route_class: RouteClassDep
+) -> Generator[Session, None, None]:
+    # Objects stay loaded after commit, returning them needs no extra SELECT
+    with Session(engine, expire_on_commit=False) as session:
+        session.info["replica_router"] = replica_router
+        session.info["client_pin"] = client_pin
+        session.info["route_class"] = route_class
+        yield session
+
+
+def get_read_db(
+    client_pin: ClientPinDep, route_class: RouteClassDep
+) -> Generator[Session, None, None]:
+    """
+    Session for read-only routes, served by a replica when one is healthy and
+    the client has not written recently.
+    """
+    with Session(
+        replica_router.engine_for_read(client_pin.until), expire_on_commit=False
+    ) as session:
+        session.info["route_class"] = route_class
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def _get_user_from_token(session: Session, token: str) -> User:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -39,14 +110,24 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             detail="Could not validate credentials",
         )
     user = session.get(User, token_data.sub)
-    if not user:
+    if not user or user.deleted_at:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
+def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    return _get_user_from_token(session, token)
+
+
+def get_current_user_for_read(session: ReadSessionDep, token: TokenDep) -> User:
+    return _get_user_from_token(session, token)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+# For read-only routes, loads the user through the same replica session
+ReadCurrentUser = Annotated[User, Depends(get_current_user_for_read)]
 
 
 def get_current_active_superuser(current_user: CurrentUser) -> User:
@@ -0,0 +1,265 @@
+"""
+Filter and sort parameters for list endpoints.
+
+Filters are repeatable ``filter=<field>:<op>:<value>`` query parameters, the
+sort is ``sort=<field>`` (ascending) or ``sort=-<field>`` (descending)::
+
+    GET /items/?filter=created_at:gte:2024-01-01&filter=title:prefix:Con&sort=-created_at
+
+Operators are ``eq``, ``gt``, ``gte``, ``lt``, ``lte`` and ``prefix``; every
+field declares the ones it accepts. Only combinations that a btree index on
+the table can answer are allowed: the equality filters must cover the leading
+columns of an index and the range/prefix filter or the sort must be on the next
+one. The indexes are read from the table metadata, so adding an index to the
+model is what makes a new combination available.
+
+UUIDv7 primary keys are ordered by creation time (see app/core/ids.py). A
+listing can declare them ``time_ordered``, then range filters on the id also
+accept timestamps, e.g. ``filter=id:gte:2024-01-01``, and run on the primary
+key index.
+"""
+
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Index, Table
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import SQLModel
+
+from app.core.ids import uuid7_max, uuid7_min
+
+EQ = frozenset({"eq"})
+RANGE = frozenset({"eq", "gt", "gte", "lt", "lte"})
+PREFIX = frozenset({"prefix"})
+
+_PATTERN_OPS = {"text_pattern_ops", "varchar_pattern_ops"}
+_DATETIME = TypeAdapter(datetime)
+
+
+@dataclass(frozen=True)
+class IndexOrder:
+    name: str
+    columns: tuple[str, ...]
+    # Columns indexed with a pattern operator class, usable for prefix matches
+    # but not for ordering
+    pattern_columns: frozenset[str] = frozenset()
+
+
+def btree_index_orders(table: Table) -> list[IndexOrder]:
+    orders = [
+        IndexOrder(
+            str(table.primary_key.name or f"{table.name}_pkey"),
+            tuple(c.name for c in table.primary_key.columns),
+        )
+    ]
+    index: Index
+    for index in table.indexes:
+        options = index.dialect_options["postgresql"]
+        # Partial indexes cannot be assumed to match an arbitrary listing
+        if (options["using"] or "btree") != "btree" or options["where"] is not None:
+            continue
+        columns = tuple(c.name for c in index.columns)
+        if len(columns) != len(index.expressions):
+            continue
+        ops = options["ops"] or {}
+        pattern = frozenset(name for name, op in ops.items() if op in _PATTERN_OPS)
+        orders.append(IndexOrder(str(index.name), columns, pattern))
+    return orders
+
+
+@dataclass
+class ListingQuery:
+    where: list[ColumnElement[bool]] = field(default_factory=list)
+    order_by: list[ColumnElement[Any]] = field(default_factory=list)
+
+
+class Listing:
+    """
+    Filterable and sortable fields of a model's list endpoint.
+
+    ``fields`` maps each filterable field to the operators it accepts and
+    ``sortable`` names the fields clients can sort on. Equality on
+    ``partition_key`` is answered by partition pruning and so does not need to
+    be part of an index. ``time_ordered`` names UUIDv7 fields whose range
+    filters also take timestamps.
+    """
+
+    def __init__(
+        self,
+        model: type[SQLModel],
+        *,
+        fields: dict[str, frozenset[str]],
+        sortable: Iterable[str] = (),
+        partition_key: str | None = None,
+        time_ordered: Iterable[str] = (),
+    ) -> None:
+        self.model = model
+        self.fields = fields
+        self.sortable = frozenset(sortable)
+        self.partition_key = partition_key
+        self.time_ordered = frozenset(time_ordered)
+        self.table: Table = model.__table__  # type: ignore[attr-defined]
+        self.indexes = btree_index_orders(self.table)
+        self._adapters: dict[str, TypeAdapter[Any]] = {
+            name: TypeAdapter(model.model_fields[name].annotation) for name in fields
+        }
+
+    def _parse_time_bound(self, name: str, op: str, raw: str) -> uuid.UUID | None:
+        """The UUIDv7 bound for a timestamp given to a time-ordered id."""
+        if name not in self.time_ordered or op == "eq":
+            return None
+        try:
+            uuid.UUID(raw)
+            return None
+        except ValueError:
+            pass
+        try:
+            moment = _DATETIME.validate_python(raw)
+        except ValidationError:
+            return None
+        # Everything from the millisecond on, or everything up to its end
+        return uuid7_min(moment) if op in ("gte", "lt") else uuid7_max(moment)
+
+    def _parse_value(self, name: str, raw: str) -> Any:
+        try:
+            value = self._adapters[name].validate_python(raw)
+        except ValidationError:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid value for {name}: {raw!r}"
+            )
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            # Timestamps are stored as naive UTC
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def _column(self, name: str) -> ColumnElement[Any]:
+        return self.table.c[name]
+
+    def _condition(self, name: str, op: str, value: object) -> ColumnElement[bool]:
+        column = self._column(name)
+        if op == "eq":
+            return column == value
+        if op == "gt":
+            return column > value
+        if op == "gte":
+            return column >= value
+        if op == "lt":
+            return column < value
+        if op == "lte":
+            return column <= value
+        escaped = (
+            str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        return column.like(f"{escaped}%", escape="\\")
+
+    def is_indexed(
+        self,
+        equal: set[str],
+        ranged: str | None,
+        ranged_op: str | None,
+        sort: str | None,
+    ) -> bool:
+        if ranged and sort and ranged != sort:
+            return False
+        equal = equal - {self.partition_key}
+        tail = ranged or sort
+        if not equal and tail is None:
+            return True
+        for index in self.indexes:
+            leading = index.columns[: len(equal)]
+            if set(leading) != equal:
+                continue
+            if tail is None:
+                return True
+            if len(index.columns) <= len(equal) or index.columns[len(equal)] != tail:
+                continue
+            pattern = tail in index.pattern_columns
+            if ranged_op == "prefix" and pattern and sort is None:
+                return True
+            if ranged_op != "prefix" and not pattern:
+                return True
+        return False
+
+    def parse(
+        self,
+        filters: list[str],
+        sort: str | None = None,
+        *,
+        scope: Iterable[str] = (),
+    ) -> ListingQuery:
+        """
+        Compile ``filter``/``sort`` parameters to SQLAlchemy expressions.
+
+        ``scope`` names fields the endpoint already filters on by equality
+        (e.g. the current user's own items), they count towards the index
+        check.
+        """
+        query = ListingQuery()
+        equal = set(scope)
+        ranged: str | None = None
+        ranged_op: str | None = None
+        for raw in filters:
+            name, _, rest = raw.partition(":")
+            op, sep, value = rest.partition(":")
+            if not sep:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid filter {raw!r}, expected <field>:<op>:<value>",
+                )
+            if name not in self.fields:
+                raise HTTPException(
+                    status_code=400, detail=f"Cannot filter on {name!r}"
+                )
+            if op not in self.fields[name]:
+                allowed = ", ".join(sorted(self.fields[name]))
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid operator {op!r} for {name}, use one of: {allowed}",
+                )
+            if op == "eq":
+                equal.add(name)
+            else:
+                if ranged is not None and (
+                    ranged != name or (ranged_op == "prefix") != (op == "prefix")
+                ):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Range and prefix filters are limited to one field",
+                    )
+                ranged, ranged_op = name, op
+            if op == "prefix":
+                parsed: Any = value
+            else:
+                parsed = self._parse_time_bound(name, op, value)
+                if parsed is None:
+                    parsed = self._parse_value(name, value)
+            query.where.append(self._condition(name, op, parsed))
+
+        sort_field = None
+        if sort:
+            sort_field = sort.removeprefix("-")
+            if sort_field not in self.sortable:
+                raise HTTPException(
+                    status_code=400, detail=f"Cannot sort on {sort_field!r}"
+                )
+            column = self._column(sort_field)
+            query.order_by.append(column.desc() if sort.startswith("-") else column)
+
+        # Equality on the range field as well (e.g. eq and gte on created_at)
+        # is still a range scan on that column
+        if ranged:
+            equal.discard(ranged)
+        if not self.is_indexed(equal, ranged, ranged_op, sort_field):
+            used = sorted(equal | {ranged} if ranged else equal)
+            detail = "Unsupported combination, no index covers"
+            if used:
+                detail += f" filtering on {', '.join(used)}"
+            if sort_field:
+                detail += f"{' and' if used else ''} sorting by {sort_field}"
+            raise HTTPException(status_code=400, detail=detail)
+        return query
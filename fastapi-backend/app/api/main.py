@@ -1,6 +1,16 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, login, private, users, utils, hospital
+from app.api.routes import (
+    events,
+    hospital,
+    items,
+    login,
+    private,
+    stats,
+    sync,
+    users,
+    utils,
+)
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -9,6 +19,9 @@ api_router.include_router(users.router)
 api_router.include_router(utils.router)
 api_router.include_router(items.router)
 api_router.include_router(hospital.router)
+api_router.include_router(stats.router)
+api_router.include_router(sync.router)
+api_router.include_router(events.router)
 
 if settings.ENVIRONMENT == "local":
     api_router.include_router(private.router)
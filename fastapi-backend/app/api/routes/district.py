@@ -2,10 +2,10 @@ import uuid
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlmodel import select
 
-from app.api.deps import SessionDep
-from app.models import Hospital, User, District
+from app import crud
+from app.api.deps import ReadSessionDep
+from app.models import District, Hospital
 
 
 router = APIRouter(tags=["district"])
@@ -35,9 +35,9 @@ class HospitalResponse(BaseModel):
 #     return hospital
 
 @router.get("/district/by-email/{email}", response_model=HospitalResponse)
-def get_district_by_email(email: str, session: SessionDep):
+def get_district_by_email(email: str, session: ReadSessionDep):
     # Step 1: Find the user by email
-    user = session.exec(select(User).where(User.email == email.lower())).first()
+    user = crud.get_user_by_email(session=session, email=email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -0,0 +1,61 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import ReadCurrentUser, ReadSessionDep
+from app.core.config import settings
+from app.core.events import STOP, EventScope, event_broker
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+HEARTBEAT = b": heartbeat\n\n"
+
+
+async def event_stream(
+    scope: EventScope, last_event_id: str | None
+) -> AsyncIterator[bytes]:
+    subscription, replay = event_broker.subscribe(scope, last_event_id)
+    try:
+        # Tell EventSource clients how long to wait before reconnecting
+        yield b"retry: 2000\n\n"
+        for event in replay:
+            yield event.encode()
+        while not subscription.dropped:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if event is STOP:
+                return
+            yield event.encode()
+    finally:
+        event_broker.unsubscribe(subscription)
+
+
+@router.get("/", response_class=StreamingResponse)
+def stream_events(
+    session: ReadSessionDep,
+    current_user: ReadCurrentUser,
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of item and user changes.
+
+    Events are `item` or `user` with `{"op": "insert" | "update" | "delete",
+    "id": ...}` as data. Superusers get every change, other users the changes
+    to their own items and account. Reconnect with `Last-Event-ID` to resume;
+    on a `reset` event fetch the changes with `GET /sync`.
+    """
+    scope = EventScope(user_id=current_user.id, is_superuser=current_user.is_superuser)
+    # The stream can stay open for hours, do not hold on to a DB connection
+    session.close()
+    return StreamingResponse(
+        event_stream(scope, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
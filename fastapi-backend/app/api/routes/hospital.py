@@ -2,10 +2,11 @@ import uuid
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlmodel import select
 
-from app.api.deps import SessionDep
-from app.models import Hospital, User
+from app import crud
+from app.api.deps import ReadSessionDep
+from app.core.cache import cached
+from app.models import Hospital
 
 
 router = APIRouter(tags=["hospitals"])
@@ -35,9 +36,11 @@ class HospitalResponse(BaseModel):
 #     return hospital
 
 @router.get("/hospitals/by-email/{email}", response_model=HospitalResponse)
-def get_hospital_by_email(email: str, session: SessionDep):
+# Tagged like the user, so soft deleting or updating them invalidates it
+@cached(HospitalResponse, ttl=60, tags=lambda email, **_: [crud.email_cache_tag(email)])
+def get_hospital_by_email(email: str, session: ReadSessionDep):
     # Step 1: Find the user by email
-    user = session.exec(select(User).where(User.email == email.lower())).first()
+    user = crud.get_user_by_email(session=session, email=email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
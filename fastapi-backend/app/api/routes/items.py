@@ -1,48 +1,163 @@
 import uuid
-from typing import Any
+from datetime import datetime
+from typing import Any, NoReturn
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import Double
+from sqlalchemy.orm import lazyload
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, and_, cast, col, delete, func, or_, select, update
 
-from app.api.deps import CurrentUser, SessionDep
-from app.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
+from app.api.deps import CurrentUser, ReadCurrentUser, ReadSessionDep, SessionDep
+from app.api.filters import EQ, PREFIX, RANGE, Listing
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.cache import cached, invalidate_on_commit
+from app.core.config import settings
+from app.core.item_writer import item_writer
+from app.core.replicas import pin_session_client
+from app.crud import item_cache_tags, owner_items_cache_tags
+from app.models import (
+    ITEM_SEARCH_CONFIG,
+    Item,
+    ItemCreate,
+    ItemPublic,
+    ItemSearchResults,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+    User,
+    item_search_vector,
+)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 
+items_listing = Listing(
+    Item,
+    fields={
+        "id": RANGE,
+        "owner_id": EQ,
+        "hospital_id": EQ,
+        "created_at": RANGE,
+        "title": PREFIX,
+    },
+    sortable={"id", "created_at"},
+    partition_key="hospital_id",
+    time_ordered={"id"},
+)
+
+
 @router.get("/", response_model=ItemsPublic)
+@cached(
+    ItemsPublic,
+    ttl=30,
+    tags=lambda current_user, **_: (
+        ["items"] if current_user.is_superuser else [f"items:owner:{current_user.id}"]
+    ),
+)
 def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: ReadSessionDep,
+    current_user: ReadCurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    hospital_id: uuid.UUID | None = None,
+    filters: list[str] = Query(default=[], alias="filter"),
+    sort: str | None = None,
 ) -> Any:
     """
     Retrieve items.
+
+    Superusers can narrow the listing to a single hospital with `hospital_id`.
+    Filter with `filter=<field>:<op>:<value>` (repeatable) and sort with
+    `sort=created_at` or `sort=-created_at`, e.g.
+    `filter=created_at:gte:2024-01-01&filter=title:prefix:Con`.
+
+    Ids are time ordered, so across all items or a hospital `sort=-id` with
+    `filter=id:lt:<last id>` pages on the primary key, and `filter=id:gte:<date>`
+    selects items created since then.
     """
+    if current_user.is_superuser:
+        scope = []
+        if hospital_id:
+            scope.append(Item.hospital_id == hospital_id)
+        query = items_listing.parse(
+            filters, sort, scope={"hospital_id"} if hospital_id else set()
+        )
+    else:
+        # The owner's items all live in the owner's hospital partition
+        scope = [
+            Item.hospital_id == current_user.hospital_id,
+            Item.owner_id == current_user.id,
+        ]
+        query = items_listing.parse(filters, sort, scope={"hospital_id", "owner_id"})
 
+    count_statement = select(func.count()).select_from(Item).where(*scope, *query.where)
+    count = session.exec(count_statement).one()
+    statement = (
+        select(Item)
+        .where(*scope, *query.where)
+        .order_by(*query.order_by)
+        .offset(skip)
+        .limit(limit)
+    )
+    items = session.exec(statement).all()
+
+    return ItemsPublic(data=items, count=count)
+
+
+@router.get("/search", response_model=ItemSearchResults)
+def search_items(
+    session: ReadSessionDep,
+    current_user: ReadCurrentUser,
+    q: str = Query(min_length=1, max_length=255),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    hospital_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    Full-text search over item titles and descriptions, best matches first.
+
+    `q` accepts web search syntax (`"exact phrase"`, `or`, `-excluded`). Pass
+    the returned `next_cursor` to get the next page.
+    """
+    query = func.websearch_to_tsquery(ITEM_SEARCH_CONFIG, q)
+    # ts_rank_cd returns a real, as a double it survives the round trip through
+    # the cursor exactly and equal ranks compare equal to the decoded value
+    rank = cast(func.ts_rank_cd(item_search_vector, query), Double)
+    statement = select(Item, rank).where(item_search_vector.op("@@")(query))
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
+        if hospital_id:
+            statement = statement.where(Item.hospital_id == hospital_id)
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
+        statement = statement.where(
+            Item.hospital_id == current_user.hospital_id,
+            Item.owner_id == current_user.id,
         )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, 2)
+        try:
+            last_rank, last_id = float(last_rank), uuid.UUID(last_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(
+            or_(rank < last_rank, and_(rank == last_rank, col(Item.id) < last_id))
         )
-        items = session.exec(statement).all()
+    statement = statement.order_by(rank.desc(), col(Item.id).desc()).limit(limit + 1)
+    rows = session.exec(statement).all()
 
-    return ItemsPublic(data=items, count=count)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_item, last_rank = rows[-1]
+        next_cursor = encode_cursor([last_rank, last_item.id])
+    return ItemSearchResults(data=[item for item, _ in rows], next_cursor=next_cursor)
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+@cached(ItemPublic, ttl=60, tags=lambda id, **_: [f"item:{id}"])
+def read_item(
+    session: ReadSessionDep, current_user: ReadCurrentUser, id: uuid.UUID
+) -> Any:
     """
     Get item by ID.
     """
@@ -61,13 +176,39 @@ def create_item(
     """
     Create new item.
     """
-    item = Item.model_validate(item_in, update={"owner_id": current_user.id})
+    item = Item.model_validate(
+        item_in,
+        update={"owner_id": current_user.id, "hospital_id": current_user.hospital_id},
+    )
+    if settings.ITEM_WRITE_COALESCING:
+        item = item_writer.create(item)
+        pin_session_client(session)
+        return item
     session.add(item)
+    invalidate_on_commit(session, *item_cache_tags(item))
     session.commit()
-    session.refresh(item)
     return item
 
 
+def _owned_item(id: uuid.UUID, current_user: User) -> list[ColumnElement[bool]]:
+    """Conditions matching item ``id`` if ``current_user`` may change it."""
+    conditions = [col(Item.id) == id]
+    if not current_user.is_superuser:
+        # Items carry their owner's hospital, which also prunes to one partition
+        conditions += [
+            col(Item.owner_id) == current_user.id,
+            col(Item.hospital_id) == current_user.hospital_id,
+        ]
+    return conditions
+
+
+def _raise_not_changed(session: Session, id: uuid.UUID) -> NoReturn:
+    """Tell apart a missing item from another user's after a no-op write."""
+    if session.exec(select(Item.id).where(Item.id == id)).first() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    raise HTTPException(status_code=400, detail="Not enough permissions")
+
+
 @router.put("/{id}", response_model=ItemPublic)
 def update_item(
     *,
@@ -79,16 +220,20 @@ def update_item(
     """
     Update an item.
     """
-    item = session.get(Item, id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
+    # One UPDATE ... RETURNING checks ownership, writes and reads the item back
     update_dict = item_in.model_dump(exclude_unset=True)
-    item.sqlmodel_update(update_dict)
-    session.add(item)
+    statement = (
+        update(Item)
+        .where(*_owned_item(id, current_user))
+        .values(**update_dict, updated_at=datetime.utcnow())
+        .returning(Item)
+        .options(lazyload("*"))
+    )
+    item = session.scalars(statement).first()
+    if item is None:
+        _raise_not_changed(session, id)
+    invalidate_on_commit(session, *item_cache_tags(item))
     session.commit()
-    session.refresh(item)
     return item
 
 
@@ -99,11 +244,12 @@ def delete_item(
     """
     Delete an item.
     """
-    item = session.get(Item, id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(item)
+    statement = (
+        delete(Item).where(*_owned_item(id, current_user)).returning(Item.owner_id)
+    )
+    owner_id = session.scalars(statement).first()
+    if owner_id is None:
+        _raise_not_changed(session, id)
+    invalidate_on_commit(session, f"item:{id}", *owner_items_cache_tags(owner_id))
     session.commit()
     return Message(message="Item deleted successfully")
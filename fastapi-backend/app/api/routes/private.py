@@ -8,6 +8,7 @@ from app.core.security import get_password_hash
 from app.models import (
     User,
     UserPublic,
+    normalize_email,
 )
 
 router = APIRouter(tags=["private"], prefix="/private")
@@ -27,7 +28,7 @@ def create_user(user_in: PrivateUserCreate, session: SessionDep) -> Any:
     """
 
     user = User(
-        email=user_in.email,
+        email=normalize_email(user_in.email),
         full_name=user_in.full_name,
         hashed_password=get_password_hash(user_in.password),
     )
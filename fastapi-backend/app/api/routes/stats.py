@@ -0,0 +1,34 @@
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app import crud
+from app.api.deps import ReadSessionDep, get_current_active_superuser
+from app.models import HierarchyStats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get(
+    "/hierarchy",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=HierarchyStats,
+)
+def read_hierarchy_stats(
+    session: ReadSessionDep,
+    province_id: uuid.UUID | None = None,
+    district_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    User and item counts rolled up by location.
+
+    Without parameters returns the national totals broken down by province.
+    Drill down with `province_id` (by district) and `district_id` (by hospital).
+    """
+    stats = crud.get_hierarchy_stats(
+        session=session, province_id=province_id, district_id=district_id
+    )
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return stats
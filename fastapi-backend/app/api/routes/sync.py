@@ -0,0 +1,193 @@
+"""
+Delta sync of the items and users a client can see.
+
+``GET /sync`` without ``since`` returns everything, later calls pass the
+``next_token`` of the previous response and only get the rows written since,
+plus the ids of deleted rows. Soft-deleted users are reported as deleted.
+
+Rows carry the id of the transaction that last wrote them (``row_version``,
+see migration 5b9d3e7a1c48). A token holds the oldest transaction still
+running when its sync started; the next sync returns the versions at or above
+it, so a transaction that commits late is never skipped. Rows of the few
+transactions that were running may be sent twice, clients upsert by id.
+
+Transaction ids and the snapshot xmin are shared by the whole cluster, so one
+long transaction anywhere in it, in any database (an idle in transaction
+session, a long report, a migration), holds the floor back: while it runs,
+every client's sync re-sends everything written since it started.
+
+Each stream (items, users, deletions) is paged on (row_version, id). While
+``has_more`` is set the token carries the positions within the current sync
+and the client should call again straight away.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import BigInteger, String, Uuid, bindparam, cast, tuple_
+from sqlmodel import Session, col, func, select
+
+from app.api.deps import ReadCurrentUser, ReadSessionDep
+from app.api.pagination import decode_cursor, encode_cursor
+from app.core.config import settings
+from app.models import (
+    Item,
+    SyncChanges,
+    SyncDeleted,
+    Tombstone,
+    User,
+    item_row_version,
+    user_row_version,
+)
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# (row_version, id) of the last row sent on a stream
+Position = tuple[int, uuid.UUID] | None
+
+STREAMS = ("items", "users", "deleted")
+
+
+def _encode_token(
+    floor: int, next_floor: int, issued_at: datetime, positions: list[Position]
+) -> str:
+    return encode_cursor(
+        [
+            floor,
+            next_floor,
+            issued_at.isoformat(),
+            [list(position) if position else None for position in positions],
+        ]
+    )
+
+
+def _decode_token(token: str) -> tuple[int, int, datetime, list[Position]]:
+    try:
+        floor, next_floor, issued_at, positions = decode_cursor(token, 4)
+        if len(positions) != len(STREAMS):
+            raise ValueError
+        return (
+            int(floor),
+            int(next_floor),
+            datetime.fromisoformat(issued_at),
+            [
+                (int(position[0]), uuid.UUID(position[1])) if position else None
+                for position in positions
+            ],
+        )
+    except (HTTPException, ValueError, TypeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _page(
+    session: Session,
+    statement: Any,
+    version: Any,
+    id: Any,
+    floor: int,
+    position: Position,
+) -> tuple[list[Any], bool]:
+    statement = statement.where(version >= floor)
+    if position:
+        last_version, last_id = position
+        after = tuple_(
+            bindparam(None, last_version, BigInteger), bindparam(None, last_id, Uuid)
+        )
+        statement = statement.where(tuple_(version, id) > after)
+    limit = settings.SYNC_PAGE_SIZE
+    rows = session.exec(statement.order_by(version, id).limit(limit + 1)).all()
+    return list(rows[:limit]), len(rows) > limit
+
+
+@router.get("/", response_model=SyncChanges)
+def sync(
+    session: ReadSessionDep, current_user: ReadCurrentUser, since: str | None = None
+) -> Any:
+    """
+    Items, users and deletions changed since the `since` token.
+
+    Superusers get all items and users, other users their own items and
+    their own account. A token older than `SYNC_TOMBSTONE_RETENTION_DAYS` is
+    rejected with 410, clients then sync again without `since`.
+    """
+    now = datetime.utcnow()
+    positions: list[Position] = [None] * len(STREAMS)
+    if since:
+        floor, next_floor, issued_at, positions = _decode_token(since)
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if issued_at < now - retention:
+            raise HTTPException(
+                status_code=410, detail="Sync token expired, sync again without since"
+            )
+    else:
+        floor = 0
+    if not any(positions):
+        # Start of a sync, everything older than this has finished
+        next_floor = session.exec(
+            select(
+                cast(
+                    cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String),
+                    BigInteger,
+                )
+            )
+        ).one()
+        issued_at = now
+
+    items_statement = select(Item, item_row_version)
+    users_statement = select(User, user_row_version)
+    deleted_statement = select(Tombstone)
+    if not current_user.is_superuser:
+        items_statement = items_statement.where(
+            Item.hospital_id == current_user.hospital_id,
+            Item.owner_id == current_user.id,
+        )
+        users_statement = users_statement.where(User.id == current_user.id)
+        deleted_statement = deleted_statement.where(
+            Tombstone.owner_id == current_user.id, Tombstone.entity == "item"
+        )
+
+    item_rows, more_items = _page(
+        session, items_statement, item_row_version, col(Item.id), floor, positions[0]
+    )
+    user_rows, more_users = _page(
+        session, users_statement, user_row_version, col(User.id), floor, positions[1]
+    )
+    tombstones, more_deleted = _page(
+        session,
+        deleted_statement,
+        col(Tombstone.row_version),
+        col(Tombstone.id),
+        floor,
+        positions[2],
+    )
+
+    has_more = more_items or more_users or more_deleted
+    if has_more:
+        if item_rows:
+            positions[0] = (item_rows[-1][1], item_rows[-1][0].id)
+        if user_rows:
+            positions[1] = (user_rows[-1][1], user_rows[-1][0].id)
+        if tombstones:
+            positions[2] = (tombstones[-1].row_version, tombstones[-1].id)
+        next_token = _encode_token(floor, next_floor, issued_at, positions)
+    else:
+        next_token = _encode_token(next_floor, next_floor, issued_at, [None] * 3)
+
+    deleted = [
+        SyncDeleted(entity=tombstone.entity, id=tombstone.id)
+        for tombstone in tombstones
+    ]
+    deleted += [
+        SyncDeleted(entity="user", id=user.id)
+        for user, _ in user_rows
+        if user.deleted_at is not None
+    ]
+    return SyncChanges(
+        items=[item for item, _ in item_rows],
+        users=[user for user, _ in user_rows if user.deleted_at is None],
+        deleted=deleted,
+        next_token=next_token,
+        has_more=has_more,
+    )
@@ -1,32 +1,46 @@
 import uuid
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, func, select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
+    ReadCurrentUser,
+    ReadSessionDep,
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.filters import EQ, RANGE, Listing
+from app.core.cache import cached
 from app.core.config import settings
+from app.core.locations import location_registry
 from app.core.security import get_password_hash, verify_password
 from app.models import (
-    Item,
     Message,
     UpdatePassword,
     User,
     UserPublic,
+    UserPurge,
+    UserPurgePublic,
     UsersPublic,
     UserUpdate,
     UserUpdateMe,
 )
+from app.purge import purge_user
 from app.utils import generate_new_account_email, send_email
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+users_listing = Listing(
+    User,
+    fields={"id": RANGE, "hospital_id": EQ, "is_active": EQ, "created_at": RANGE},
+    sortable={"id", "created_at"},
+    time_ordered={"id"},
+)
+
 
 # Pydantic models for frontend signup request
 class SignupRequest(BaseModel):
@@ -77,14 +91,6 @@ def register_user(session: SessionDep, signup_data: SignupRequest) -> Any:
             detail="Password and confirm password do not match"
         )
     
-    # Check if user already exists
-    user = crud.get_user_by_email(session=session, email=signup_data.email)
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this email already exists in the system",
-        )
-    
     try:
         # Register user with location resolution
         user = crud.register_user_with_location(
@@ -97,6 +103,11 @@ def register_user(session: SessionDep, signup_data: SignupRequest) -> Any:
             hospital_name=signup_data.hospital
         )
         return user
+    except crud.DuplicateEmailError:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this email already exists in the system",
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -106,19 +117,55 @@ def register_user(session: SessionDep, signup_data: SignupRequest) -> Any:
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: ReadSessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    filters: list[str] = Query(default=[], alias="filter"),
+    sort: str | None = None,
+) -> Any:
     """
     Retrieve users.
+
+    Filter with `filter=<field>:<op>:<value>` (repeatable) and sort with
+    `sort=created_at` or `sort=-created_at`, e.g.
+    `filter=hospital_id:eq:<id>&filter=is_active:eq:true&sort=-created_at`.
     """
-    count_statement = select(func.count()).select_from(User)
+    query = users_listing.parse(filters, sort)
+    count_statement = (
+        select(func.count())
+        .select_from(User)
+        .where(col(User.deleted_at).is_(None), *query.where)
+    )
     count = session.exec(count_statement).one()
 
-    statement = select(User).offset(skip).limit(limit)
+    statement = (
+        select(User)
+        .where(col(User.deleted_at).is_(None), *query.where)
+        .order_by(*query.order_by)
+        .offset(skip)
+        .limit(limit)
+    )
     users = session.exec(statement).all()
 
     return UsersPublic(data=users, count=count)
 
 
+@router.get(
+    "/purges/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=list[UserPurgePublic],
+)
+def read_user_purges(session: ReadSessionDep, limit: int = 100) -> Any:
+    """
+    Progress of the purges of deleted users, newest first.
+    """
+    statement = (
+        select(UserPurge).order_by(col(UserPurge.requested_at).desc()).limit(limit)
+    )
+    return session.exec(statement).all()
+
+
 # @router.post(
 #     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 # )
@@ -153,18 +200,14 @@ def update_user_me(
     """
     Update own user.
     """
-    if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
-        if existing_user and existing_user.id != current_user.id:
-            raise HTTPException(
-                status_code=409, detail="User with this email already exists"
-            )
-    user_data = user_in.model_dump(exclude_unset=True)
-    current_user.sqlmodel_update(user_data)
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
-    return current_user
+    try:
+        return crud.update_user_me(
+            session=session, db_user=current_user, user_in=user_in
+        )
+    except crud.DuplicateEmailError:
+        raise HTTPException(
+            status_code=409, detail="User with this email already exists"
+        )
 
 
 @router.patch("/me/password", response_model=Message)
@@ -188,7 +231,7 @@ def update_password_me(
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+def read_user_me(current_user: ReadCurrentUser) -> Any:
     """
     Get current user.
     """
@@ -196,16 +239,21 @@ def read_user_me(current_user: CurrentUser) -> Any:
 
 
 @router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+def delete_user_me(
+    session: SessionDep, current_user: CurrentUser, background_tasks: BackgroundTasks
+) -> Any:
     """
     Delete own user.
+
+    The account is hidden immediately, its items are purged in the background.
     """
     if current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
+    crud.soft_delete_user(session=session, db_user=current_user)
+    # Purge on the session's bind, the engine outside of tests
+    background_tasks.add_task(purge_user, current_user.id, db_engine=session.get_bind())
     return Message(message="User deleted successfully")
 
 
@@ -263,13 +311,14 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
 
 
 @router.get("/locations/hospitals/{district_id}", response_model=list[HospitalResponse])
-def get_hospitals_by_district(district_id: str, session: SessionDep) -> Any:
+@cached(list[HospitalResponse], ttl=300, tags=lambda **_: ["locations"])
+def get_hospitals_by_district(district_id: str) -> Any:
     """
     Get all hospitals in a specific district.
     """
     try:
         district_uuid = uuid.UUID(district_id)
-        hospitals = crud.get_hospitals_by_district(session=session, district_id=district_uuid)
+        hospitals = location_registry.hospitals_by_district(district_uuid)
         return [
             HospitalResponse(
                 id=str(hospital.id),
@@ -283,6 +332,7 @@ def get_hospitals_by_district(district_id: str, session: SessionDep) -> Any:
 
 
 @router.get("/{user_id}", response_model=UserPublic)
+@cached(UserPublic, ttl=60, tags=lambda user_id, **_: [f"user:{user_id}"])
 def read_user_by_id(
     user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
 ) -> Any:
@@ -297,6 +347,8 @@ def read_user_by_id(
             status_code=403,
             detail="The user doesn't have enough privileges",
         )
+    if not user or user.deleted_at:
+        raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
@@ -315,38 +367,40 @@ def update_user(
     Update a user.
     """
     db_user = session.get(User, user_id)
-    if not db_user:
+    if not db_user or db_user.deleted_at:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
-    if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
-        if existing_user and existing_user.id != user_id:
-            raise HTTPException(
-                status_code=409, detail="User with this email already exists"
-            )
-
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    try:
+        db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    except crud.DuplicateEmailError:
+        raise HTTPException(
+            status_code=409, detail="User with this email already exists"
+        )
     return db_user
 
 
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
 def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+    session: SessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
 ) -> Message:
     """
     Delete a user.
+
+    The account is hidden immediately, its items are purged in the background.
+    Progress is visible at `/users/purges/`.
     """
     user = session.get(User, user_id)
-    if not user:
+    if not user or user.deleted_at:
         raise HTTPException(status_code=404, detail="User not found")
     if user == current_user:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
-    session.delete(user)
-    session.commit()
+    crud.soft_delete_user(session=session, db_user=user)
+    background_tasks.add_task(purge_user, user_id, db_engine=session.get_bind())
     return Message(message="User deleted successfully")
\ No newline at end of file
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.core.health import readiness
+from app.core.metrics import registry
+from app.core.profiling import profile_store
+from app.models import DependencyStatus, Message, ReadinessStatus
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -29,3 +35,72 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/livez")
+async def livez() -> bool:
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return True
+
+
+@router.get("/readyz", response_model=ReadinessStatus)
+def readyz(response: Response) -> ReadinessStatus:
+    """
+    Readiness: the worker is warmed up and the database is reachable.
+
+    Responds with 503 while not ready. Dependency probes are cached.
+    """
+    ready, checks = readiness.status()
+    if not ready:
+        response.status_code = 503
+    return ReadinessStatus(
+        ready=ready,
+        warmed_up=readiness.warmed_up.is_set(),
+        checks={
+            name: DependencyStatus(ok=result.ok, detail=result.detail)
+            for name, result in checks.items()
+        },
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """
+    Metrics of this worker in the Prometheus text format.
+    """
+    return registry.render()
+
+
+@router.get(
+    "/profiles/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def list_profiles() -> list[dict[str, Any]]:
+    """
+    List the request profiles kept by this worker, newest first.
+    """
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def download_profile(profile_id: str) -> JSONResponse:
+    """
+    Download a request profile in speedscope format.
+
+    Profiles live in the memory of the worker that served the request, so the
+    download may need a retry when running several workers.
+    """
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return JSONResponse(
+        content=profile.to_speedscope(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'
+        },
+    )
@@ -0,0 +1,82 @@
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any
+
+from app.benchmarks import cases
+from app.benchmarks.runner import (
+    RESULTS_DIR,
+    Benchmark,
+    build_report,
+    check_thresholds,
+    run_benchmark,
+    write_json,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GROUPS = ("serialization", "security", "email", "crud")
+
+
+def _run(benchmarks: list[Benchmark], pattern: str | None) -> dict[str, dict[str, Any]]:
+    results = {}
+    for benchmark in benchmarks:
+        if pattern and pattern not in benchmark.name:
+            continue
+        results[benchmark.name] = run_benchmark(benchmark)
+        logger.info(f"{benchmark.name}: {results[benchmark.name]['median_us']}us")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the hot path microbenchmarks.")
+    parser.add_argument("--group", choices=GROUPS, action="append")
+    parser.add_argument("-k", dest="pattern", help="only run matching benchmarks")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "latest.json")
+    parser.add_argument("--baseline", type=Path, default=RESULTS_DIR / "baseline.json")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    groups = args.group or GROUPS
+
+    results: dict[str, dict[str, Any]] = {}
+    if "serialization" in groups:
+        results.update(_run(cases.serialization_benchmarks(), args.pattern))
+    if "security" in groups:
+        results.update(_run(cases.security_benchmarks(), args.pattern))
+    if "email" in groups:
+        try:
+            results.update(_run(cases.email_benchmarks(), args.pattern))
+        except FileNotFoundError as e:
+            logger.warning(f"Skipping email benchmarks, templates not built: {e}")
+    if "crud" in groups:
+        with cases.rolled_back_session() as session:
+            results.update(_run(cases.crud_benchmarks(session), args.pattern))
+
+    report = build_report(results)
+    write_json(args.output, report)
+    logger.info(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        logger.info(f"Baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        logger.warning(
+            f"No baseline at {args.baseline}, run with --save-baseline to create one"
+        )
+        return
+    baseline = json.loads(args.baseline.read_text())
+    failures = check_thresholds(report, baseline, threshold=args.threshold)
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        sys.exit(1)
+    logger.info("All benchmarks within threshold of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmarks for the request hot paths.
+
+Database benchmarks run inside a transaction that is rolled back at the end,
+so they can point at a development database without leaving rows behind.
+"""
+
+import itertools
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import jwt
+from sqlmodel import Session
+
+from app import crud
+from app.benchmarks.runner import Benchmark
+from app.core import security
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    District,
+    Hospital,
+    ItemPublic,
+    ItemsPublic,
+    Province,
+    UserCreate,
+    UserPublic,
+    UsersPublic,
+)
+from app.utils import render_email_template
+
+DATASET_SIZE = 1000
+PASSWORD = "benchmark-password"
+
+
+@contextmanager
+def rolled_back_session() -> Iterator[Session]:
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        with Session(bind=connection) as session:
+            yield session
+        transaction.rollback()
+
+
+def _hospital(session: Session) -> Hospital:
+    suffix = uuid.uuid4().hex[:8]
+    province = Province(name=f"bench-province-{suffix}")
+    district = District(name=f"bench-district-{suffix}", province_id=province.id)
+    hospital = Hospital(name=f"bench-hospital-{suffix}", district_id=district.id)
+    session.add_all([province, district, hospital])
+    session.flush()
+    return hospital
+
+
+def serialization_benchmarks() -> list[Benchmark]:
+    owner_id = uuid.uuid4()
+    hospital_id = uuid.uuid4()
+    created_at = datetime.utcnow()
+    items = ItemsPublic(
+        data=[
+            ItemPublic(
+                id=uuid.uuid4(),
+                owner_id=owner_id,
+                title=f"item {n}",
+                description="benchmark item",
+                created_at=created_at,
+            )
+            for n in range(DATASET_SIZE)
+        ],
+        count=DATASET_SIZE,
+    )
+    users = UsersPublic(
+        data=[
+            UserPublic(
+                id=uuid.uuid4(),
+                email=f"user{n}@example.com",
+                full_name=f"User {n}",
+                hospital_id=hospital_id,
+            )
+            for n in range(DATASET_SIZE)
+        ],
+        count=DATASET_SIZE,
+    )
+    return [
+        Benchmark("serialize.items_public", items.model_dump_json, iterations=20),
+        Benchmark("serialize.users_public", users.model_dump_json, iterations=20),
+    ]
+
+
+def security_benchmarks() -> list[Benchmark]:
+    expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    subject = uuid.uuid4()
+    token = security.create_access_token(subject, expires_delta=expires)
+    return [
+        Benchmark(
+            "security.create_access_token",
+            lambda: security.create_access_token(subject, expires_delta=expires),
+            iterations=1000,
+        ),
+        Benchmark(
+            "security.decode_access_token",
+            lambda: jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            ),
+            iterations=1000,
+        ),
+    ]
+
+
+def email_benchmarks() -> list[Benchmark]:
+    context = {
+        "project_name": settings.PROJECT_NAME,
+        "username": "user@example.com",
+        "email": "user@example.com",
+        "valid_hours": settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
+        "link": settings.FRONTEND_HOST,
+    }
+    return [
+        Benchmark(
+            "utils.render_email_template",
+            lambda: render_email_template(
+                template_name="reset_password.html", context=context
+            ),
+            iterations=200,
+        )
+    ]
+
+
+def crud_benchmarks(session: Session) -> list[Benchmark]:
+    hospital = _hospital(session)
+    district = hospital.district
+    province = district.province
+    users = [
+        crud.create_user(
+            session=session,
+            user_create=UserCreate(
+                email=f"bench-{n}-{uuid.uuid4().hex[:8]}@example.com",
+                password=PASSWORD,
+                hospital_id=hospital.id,
+            ),
+        )
+        for n in range(DATASET_SIZE // 10)
+    ]
+    emails = itertools.cycle([user.email for user in users])
+    counter = itertools.count()
+
+    def create_user() -> None:
+        crud.create_user(
+            session=session,
+            user_create=UserCreate(
+                email=f"bench-new-{next(counter)}-{uuid.uuid4().hex[:8]}@example.com",
+                password=PASSWORD,
+                hospital_id=hospital.id,
+            ),
+        )
+
+    def register_user_with_location() -> None:
+        crud.register_user_with_location(
+            session=session,
+            name="Benchmark User",
+            email=f"bench-reg-{next(counter)}-{uuid.uuid4().hex[:8]}@example.com",
+            password=PASSWORD,
+            province_name=province.name,
+            district_name=district.name,
+            hospital_name=hospital.name,
+        )
+
+    return [
+        Benchmark(
+            "crud.get_user_by_email",
+            lambda: crud.get_user_by_email(session=session, email=next(emails)),
+            iterations=200,
+        ),
+        Benchmark(
+            "crud.authenticate",
+            lambda: crud.authenticate(
+                session=session, email=next(emails), password=PASSWORD
+            ),
+            iterations=10,
+            rounds=3,
+        ),
+        Benchmark("crud.create_user", create_user, iterations=10, rounds=3),
+        # The national rollup is expected to stay in single-digit milliseconds
+        Benchmark(
+            "crud.get_hierarchy_stats",
+            lambda: crud.get_hierarchy_stats(session=session),
+            iterations=200,
+        ),
+        Benchmark(
+            "crud.register_user_with_location",
+            register_user_with_location,
+            iterations=10,
+            rounds=3,
+        ),
+    ]
@@ -0,0 +1,170 @@
+"""
+Hospital-scoped item queries on a large synthetic dataset.
+
+Generates ``--items`` items spread over ``--hospitals`` hospitals with
+``generate_series`` inside a transaction, runs the ``read_items`` statements
+with ``EXPLAIN (ANALYZE, BUFFERS)`` and rolls everything back at the end.
+
+    python -m app.benchmarks.partitioning --items 50000000
+
+At 50M items expect the load to take a while and to need several GB of disk.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, text
+
+from app.benchmarks.runner import RESULTS_DIR, write_json
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USERS_SQL = """
+CREATE TEMP TABLE bench_hospital ON COMMIT DROP AS
+SELECT gen_random_uuid() AS id, n FROM generate_series(1, :hospitals) AS n;
+
+INSERT INTO province (id, name) VALUES ('00000000-0000-0000-0000-000000000001', 'bench province');
+INSERT INTO district (id, name, province_id)
+VALUES ('00000000-0000-0000-0000-000000000002', 'bench district', '00000000-0000-0000-0000-000000000001');
+INSERT INTO hospital (id, name, district_id)
+SELECT id, 'bench hospital ' || n, '00000000-0000-0000-0000-000000000002' FROM bench_hospital;
+
+CREATE TEMP TABLE bench_user ON COMMIT DROP AS
+SELECT gen_random_uuid() AS id, h.id AS hospital_id, row_number() OVER () - 1 AS rn
+FROM bench_hospital h, generate_series(1, :users_per_hospital);
+
+INSERT INTO "user" (id, email, is_active, is_superuser, hashed_password, hospital_id, created_at, updated_at)
+SELECT id, 'bench-' || id || '@example.com', true, false, 'x', hospital_id, now(), now()
+FROM bench_user
+"""
+
+ITEMS_SQL = """
+INSERT INTO item (id, title, description, owner_id, hospital_id)
+SELECT gen_random_uuid(),
+    'item ' || s || ' ' || (:words)[1 + s % cardinality(:words)],
+    'benchmark ' || (:words)[1 + (s / 7) % cardinality(:words)],
+    u.id, u.hospital_id
+FROM generate_series(:start, :stop) AS s
+JOIN bench_user u ON u.rn = s % (SELECT count(*) FROM bench_user)
+"""
+
+WORDS = [
+    "syringe",
+    "needle",
+    "condom",
+    "kit",
+    "swab",
+    "glove",
+    "bandage",
+    "test",
+    "sample",
+    "referral",
+    "counselling",
+    "outreach",
+    "register",
+]
+
+
+def seed_users(
+    connection: Connection, *, hospitals: int, users_per_hospital: int
+) -> None:
+    """Create ``hospitals`` hospitals with ``users_per_hospital`` users each."""
+    for statement in USERS_SQL.split(";\n"):
+        connection.execute(
+            text(statement),
+            {"hospitals": hospitals, "users_per_hospital": users_per_hospital},
+        )
+
+
+def seed_items(connection: Connection, *, start: int, stop: int) -> None:
+    """Add items number ``start`` to ``stop`` (inclusive) spread over the users."""
+    connection.execute(text(ITEMS_SQL), {"start": start, "stop": stop, "words": WORDS})
+    connection.execute(text("ANALYZE item"))
+
+
+QUERIES = {
+    "owner_items": (
+        "SELECT * FROM item WHERE hospital_id = :hospital_id AND owner_id = :owner_id "
+        "LIMIT 100"
+    ),
+    "owner_items_count": (
+        "SELECT count(*) FROM item WHERE hospital_id = :hospital_id "
+        "AND owner_id = :owner_id"
+    ),
+    "hospital_items": "SELECT * FROM item WHERE hospital_id = :hospital_id LIMIT 100",
+    "hospital_items_count": "SELECT count(*) FROM item WHERE hospital_id = :hospital_id",
+}
+
+
+def _partitions_scanned(plan: dict[str, Any]) -> set[str]:
+    scanned = set()
+    relation = plan.get("Relation Name")
+    if relation:
+        scanned.add(relation)
+    for child in plan.get("Plans", []):
+        scanned |= _partitions_scanned(child)
+    return scanned
+
+
+def run_queries(connection: Connection, repeat: int) -> dict[str, Any]:
+    owner = connection.execute(
+        text("SELECT owner_id, hospital_id FROM item LIMIT 1")
+    ).one()
+    params = {"owner_id": owner.owner_id, "hospital_id": owner.hospital_id}
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = connection.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params
+        ).scalar_one()[0]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            connection.execute(text(sql), params).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "partitions_scanned": sorted(_partitions_scanned(plan["Plan"])),
+            "plan_execution_ms": plan["Execution Time"],
+        }
+        logger.info(f"{name}: {results[name]}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=50_000_000)
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--users-per-hospital", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--output", type=Path, default=RESULTS_DIR / "partitioning.json"
+    )
+    args = parser.parse_args()
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        start = time.perf_counter()
+        seed_users(
+            connection,
+            hospitals=args.hospitals,
+            users_per_hospital=args.users_per_hospital,
+        )
+        seed_items(connection, start=1, stop=args.items)
+        logger.info(f"Seeded {args.items} items in {time.perf_counter() - start:.1f}s")
+        results = run_queries(connection, args.repeat)
+        transaction.rollback()
+
+    report = {"items": args.items, "hospitals": args.hospitals, "queries": results}
+    write_json(args.output, report)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
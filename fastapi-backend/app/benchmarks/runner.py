@@ -0,0 +1,81 @@
+"""
+Tiny timing harness for the microbenchmarks.
+
+Each benchmark is run for a few warm-up iterations and then for ``rounds``
+rounds of ``iterations`` calls. Per-call timings of every round are kept so the
+JSON report shows the spread, and the median is what gets compared against the
+baseline.
+"""
+
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[], Any]
+    iterations: int = 100
+    rounds: int = 5
+    warmup: int = 3
+
+
+def run_benchmark(benchmark: Benchmark) -> dict[str, Any]:
+    for _ in range(benchmark.warmup):
+        benchmark.func()
+    per_call_us = []
+    for _ in range(benchmark.rounds):
+        start = time.perf_counter()
+        for _ in range(benchmark.iterations):
+            benchmark.func()
+        elapsed = time.perf_counter() - start
+        per_call_us.append(elapsed / benchmark.iterations * 1_000_000)
+    return {
+        "iterations": benchmark.iterations,
+        "rounds": benchmark.rounds,
+        "median_us": round(statistics.median(per_call_us), 3),
+        "min_us": round(min(per_call_us), 3),
+        "max_us": round(max(per_call_us), 3),
+    }
+
+
+def build_report(results: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+
+def check_thresholds(
+    report: dict[str, Any], baseline: dict[str, Any], *, threshold: float
+) -> list[str]:
+    """Return one message per benchmark slower than the baseline by ``threshold``."""
+    failures = []
+    for name, base in baseline.get("benchmarks", {}).items():
+        current = report["benchmarks"].get(name)
+        if current is None:
+            continue
+        limit = base["median_us"] * (1 + threshold)
+        if current["median_us"] > limit:
+            slowdown = current["median_us"] / base["median_us"] - 1
+            failures.append(
+                f"{name}: {current['median_us']}us vs baseline "
+                f"{base['median_us']}us ({slowdown:+.0%})"
+            )
+    return failures
+
+
+def write_json(path: Path, data: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n")
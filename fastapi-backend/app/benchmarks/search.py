@@ -0,0 +1,130 @@
+"""
+Full-text item search as the item table grows.
+
+Seeds items in steps (``--sizes``, 10M by default at the end) inside a single
+transaction and, after each step, times the ``/items/search`` statements for a
+few queries: first page, a deep page through the keyset cursor and a hospital
+scoped search. Everything is rolled back at the end.
+
+    python -m app.benchmarks.search --sizes 1000000,2500000,5000000,10000000
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, text
+
+from app.benchmarks.partitioning import seed_items, seed_users
+from app.benchmarks.runner import RESULTS_DIR, write_json
+from app.core.db import engine
+from app.models import ITEM_SEARCH_CONFIG
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RANK = "ts_rank_cd(search_vector, websearch_to_tsquery(:config, :q))"
+MATCH = "search_vector @@ websearch_to_tsquery(:config, :q)"
+
+STATEMENTS = {
+    "first_page": (
+        f"SELECT id, {RANK} AS rank FROM item WHERE {MATCH} "
+        "ORDER BY rank DESC, id DESC LIMIT 21"
+    ),
+    "next_page": (
+        f"SELECT id, {RANK} AS rank FROM item WHERE {MATCH} "
+        f"AND ({RANK}, id) < (:last_rank, :last_id) "
+        "ORDER BY rank DESC, id DESC LIMIT 21"
+    ),
+    "hospital_first_page": (
+        f"SELECT id, {RANK} AS rank FROM item WHERE {MATCH} "
+        "AND hospital_id = :hospital_id ORDER BY rank DESC, id DESC LIMIT 21"
+    ),
+}
+
+# A rare term, a common term, a phrase and a negation
+SEARCHES = ["referral", "syringe", '"benchmark glove"', "kit -swab"]
+
+
+def time_search(
+    connection: Connection, statement: str, params: dict[str, Any], repeat: int
+) -> dict[str, Any]:
+    plan = connection.execute(
+        text(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}"), params
+    ).scalar_one()[0]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(text(statement), params).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "plan_execution_ms": plan["Execution Time"],
+        "uses_index": "ix_item_search_vector" in json.dumps(plan["Plan"]),
+    }
+
+
+def run_searches(connection: Connection, repeat: int) -> dict[str, Any]:
+    hospital_id = connection.execute(
+        text("SELECT hospital_id FROM item LIMIT 1")
+    ).scalar_one()
+    results: dict[str, Any] = {}
+    for q in SEARCHES:
+        params: dict[str, Any] = {
+            "config": ITEM_SEARCH_CONFIG,
+            "q": q,
+            "hospital_id": hospital_id,
+        }
+        # Start the deep page from the 20th row of the first page, as a client
+        # following next_cursor would
+        page = connection.execute(text(STATEMENTS["first_page"]), params).all()
+        if page:
+            params["last_rank"], params["last_id"] = page[-2].rank, page[-2].id
+        results[q] = {
+            name: time_search(connection, statement, params, repeat)
+            for name, statement in STATEMENTS.items()
+            if name != "next_page" or page
+        }
+        logger.info(f"{q}: {results[q]}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000000,2500000,5000000,10000000")
+    parser.add_argument("--hospitals", type=int, default=50)
+    parser.add_argument("--users-per-hospital", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "search.json")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    report: dict[str, Any] = {"hospitals": args.hospitals, "sizes": {}}
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        seed_users(
+            connection,
+            hospitals=args.hospitals,
+            users_per_hospital=args.users_per_hospital,
+        )
+        seeded = 0
+        for size in sizes:
+            start = time.perf_counter()
+            seed_items(connection, start=seeded + 1, stop=size)
+            seeded = size
+            logger.info(
+                f"Seeded up to {size} items in {time.perf_counter() - start:.1f}s"
+            )
+            report["sizes"][size] = run_searches(connection, args.repeat)
+        transaction.rollback()
+
+    write_json(args.output, report)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Insert throughput and primary key index size with UUIDv4 and UUIDv7 keys.
+
+Fills two scratch tables shaped like ``item`` with ``--rows`` rows each, one
+keyed by random UUIDv4 and one by time-ordered UUIDv7, in batches of
+``--batch`` rows committed one by one (like concurrent single inserts, only
+cheaper to drive). Reports the rows per second of the first and last tenth of
+the load, where random keys slow down once the index outgrows the cache, and
+the index and table sizes at the end. The tables are dropped afterwards.
+
+    python -m app.benchmarks.uuid_keys --rows 10000000
+
+UUIDv7 ids are generated in SQL with the same layout as app/core/ids.py
+(``uuidv7()`` is only built into PostgreSQL 18).
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, text
+
+from app.benchmarks.runner import RESULTS_DIR, write_json
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Overlays the millisecond timestamp on a v4 UUID and flips the version bits
+# from 0100 to 0111
+UUID7_FUNCTION = """
+CREATE OR REPLACE FUNCTION pg_temp.bench_uuid7() RETURNS uuid AS $$
+SELECT encode(
+    set_bit(set_bit(overlay(uuid_send(gen_random_uuid())
+        PLACING substring(int8send((extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+        FROM 1 FOR 6), 52, 1), 53, 1),
+    'hex')::uuid
+$$ LANGUAGE sql VOLATILE
+"""
+
+ID_EXPRESSIONS = {"v4": "gen_random_uuid()", "v7": "pg_temp.bench_uuid7()"}
+
+CREATE_SQL = """
+CREATE TABLE bench_uuid_{kind} (
+    id uuid PRIMARY KEY,
+    title varchar(255) NOT NULL,
+    owner_id uuid NOT NULL,
+    created_at timestamp NOT NULL DEFAULT timezone('utc', now())
+)
+"""
+
+INSERT_SQL = """
+INSERT INTO bench_uuid_{kind} (id, title, owner_id)
+SELECT {id_expression}, 'item ' || s, '00000000-0000-0000-0000-000000000001'
+FROM generate_series(1, :batch) AS s
+"""
+
+SIZES_SQL = """
+SELECT pg_relation_size('bench_uuid_{kind}_pkey') AS index_bytes,
+    pg_relation_size('bench_uuid_{kind}') AS table_bytes
+"""
+
+
+def load(connection: Connection, kind: str, rows: int, batch: int) -> dict[str, Any]:
+    connection.execute(text(CREATE_SQL.format(kind=kind)))
+    connection.commit()
+    insert = text(INSERT_SQL.format(kind=kind, id_expression=ID_EXPRESSIONS[kind]))
+    timings = []
+    start = time.perf_counter()
+    for done in range(0, rows, batch):
+        size = min(batch, rows - done)
+        batch_start = time.perf_counter()
+        connection.execute(insert, {"batch": size})
+        connection.commit()
+        timings.append((size, time.perf_counter() - batch_start))
+        if len(timings) % 100 == 0:
+            logger.info(f"{kind}: {done + size} rows")
+    total = time.perf_counter() - start
+    tenth = max(len(timings) // 10, 1)
+
+    def rate(part: list[tuple[int, float]]) -> float:
+        return round(sum(n for n, _ in part) / sum(s for _, s in part))
+
+    sizes = connection.execute(text(SIZES_SQL.format(kind=kind))).one()
+    return {
+        "seconds": round(total, 1),
+        "rows_per_second": round(rows / total),
+        "first_tenth_rows_per_second": rate(timings[:tenth]),
+        "last_tenth_rows_per_second": rate(timings[-tenth:]),
+        "index_bytes": sizes.index_bytes,
+        "table_bytes": sizes.table_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "uuid_keys.json")
+    args = parser.parse_args()
+
+    report: dict[str, Any] = {"rows": args.rows, "batch": args.batch, "keys": {}}
+    with engine.connect() as connection:
+        connection.execute(text(UUID7_FUNCTION))
+        connection.commit()
+        for kind in ID_EXPRESSIONS:
+            try:
+                report["keys"][kind] = load(connection, kind, args.rows, args.batch)
+                logger.info(f"{kind}: {report['keys'][kind]}")
+            finally:
+                connection.rollback()
+                connection.execute(text(f"DROP TABLE IF EXISTS bench_uuid_{kind}"))
+                connection.commit()
+
+    write_json(args.output, report)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
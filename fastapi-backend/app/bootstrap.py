@@ -0,0 +1,131 @@
+"""
+Single-process container bootstrap.
+
+Replaces running ``backend_pre_start.py``, ``alembic upgrade head`` and
+``initial_data.py`` as three separate processes. Everything shares one engine,
+and each phase is skipped when there is nothing to do:
+
+* the database wait backs off exponentially instead of polling every second,
+* migrations only run when the database is not already at the Alembic head,
+* seeding only runs when the seed file checksum differs from the stored one.
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Engine
+from sqlmodel import Session
+from tenacity import (
+    after_log,
+    before_log,
+    retry,
+    stop_after_delay,
+    wait_exponential,
+)
+
+from app.core.cache import invalidate_on_commit
+from app.core.db import SEED_FILE, engine, init_db
+from app.models import SeedState
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).parent.parent / "alembic.ini"
+SEED_NAME = "locations"
+
+max_wait_seconds = 60 * 5  # 5 minutes
+
+
+@contextmanager
+def phase(name: str, timings: dict[str, float]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        logger.info(f"{name} took {timings[name]:.3f}s")
+
+
+@retry(
+    stop=stop_after_delay(max_wait_seconds),
+    wait=wait_exponential(multiplier=0.05, max=5),
+    before=before_log(logger, logging.DEBUG),
+    after=after_log(logger, logging.WARN),
+)
+def wait_for_db(db_engine: Engine) -> None:
+    with db_engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+def alembic_config() -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(Path(__file__).parent / "alembic"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def migrate(db_engine: Engine) -> bool:
+    """Upgrade to head, returns ``False`` when the database was already there."""
+    config = alembic_config()
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with db_engine.begin() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+        if current == heads:
+            return False
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+    return True
+
+
+def seed_checksum(seed_file: Path = SEED_FILE) -> str:
+    return hashlib.sha256(seed_file.read_bytes()).hexdigest()
+
+
+def seed(db_engine: Engine) -> bool:
+    """Load the seed data, returns ``False`` when it was already loaded."""
+    checksum = seed_checksum()
+    with Session(db_engine) as session:
+        state = session.get(SeedState, SEED_NAME)
+        if state and state.checksum == checksum:
+            return False
+        init_db(session)
+        invalidate_on_commit(session, "locations")
+        state = state or SeedState(name=SEED_NAME, checksum=checksum)
+        state.checksum = checksum
+        state.applied_at = datetime.utcnow()
+        session.add(state)
+        session.commit()
+    return True
+
+
+def bootstrap(db_engine: Engine) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    with phase("total", timings):
+        with phase("wait_for_db", timings):
+            wait_for_db(db_engine)
+        with phase("migrate", timings):
+            if not migrate(db_engine):
+                logger.info("Database already at head, skipping migrations")
+        with phase("seed", timings):
+            if not seed(db_engine):
+                logger.info("Seed data unchanged, skipping seeding")
+    return timings
+
+
+def main() -> None:
+    logger.info("Bootstrapping service")
+    bootstrap(engine)
+    logger.info("Service bootstrapped")
+
+
+if __name__ == "__main__":
+    main()
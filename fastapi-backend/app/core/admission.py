@@ -0,0 +1,194 @@
+"""
+Admission control and load shedding.
+
+Without it every request that arrives is accepted and waits, unbounded, for
+a thread of the AnyIO pool, so under overload latency climbs for everyone and
+requests time out after the work was done anyway. The middleware bounds, per
+route class (see app/core/route_classes.py), how many requests run at once
+(``ADMISSION_CONCURRENCY``) and how many may wait (``ADMISSION_QUEUE``).
+
+Shedding is driven by queue wait rather than counts alone: each class tracks
+how long its requests hold their slot, and a request whose expected wait
+(its place in the queue times that service time, spread over the slots) is
+above ``ADMISSION_MAX_WAIT_MS`` is turned away at once instead of queueing
+for an answer that would come too late. A queued request that still waits
+longer than that gives up. Shed requests get a 503 with ``Retry-After``.
+
+Classes are limited separately, so a burst of signups (bcrypt bound) does not
+hold back ``/users/me``. Health checks and classes without a limit are never
+held back. A slot is released once the response starts, so long streams
+(``/events``) only hold it while their handler runs.
+
+Limits are per worker. The defaults add up to fewer slots than the AnyIO
+pool's 40 threads, so admitted sync handlers do not queue again there.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.route_classes import route_class
+
+# Weight of the latest request in the service time average
+_SERVICE_TIME_WEIGHT = 0.1
+
+decisions_counter = registry.counter(
+    "admission_decisions_total",
+    "Admission decisions by route class: admitted, queued (admitted after "
+    "waiting), shed_queue_full, shed_expected_wait and shed_timeout.",
+    labels=["route_class", "decision"],
+)
+queue_wait_histogram = registry.histogram(
+    "admission_queue_wait_seconds",
+    "Time admitted requests waited for a slot.",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+    labels=["route_class"],
+)
+in_flight_gauge = registry.gauge(
+    "admission_in_flight", "Requests holding a slot.", labels=["route_class"]
+)
+queued_gauge = registry.gauge(
+    "admission_queued", "Requests waiting for a slot.", labels=["route_class"]
+)
+
+
+class Shed(Exception):
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClassLimiter:
+    """Slots and queue of one route class, used from the event loop only."""
+
+    def __init__(
+        self, name: str, concurrency: int, queue_size: int, max_wait: float
+    ) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.service_time = 0.0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    def expected_wait(self) -> float:
+        return (len(self._waiters) + 1) * self.service_time / self.concurrency
+
+    def _retry_after(self) -> float:
+        return max(self.expected_wait(), self.max_wait)
+
+    async def acquire(self) -> float:
+        """Wait for a slot, returns how long it took. Raises ``Shed``."""
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            in_flight_gauge.inc(route_class=self.name)
+            decisions_counter.inc(route_class=self.name, decision="admitted")
+            return 0.0
+        if len(self._waiters) >= self.queue_size:
+            raise Shed("shed_queue_full", self._retry_after())
+        if self.expected_wait() > self.max_wait:
+            raise Shed("shed_expected_wait", self._retry_after())
+
+        start = time.perf_counter()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        queued_gauge.inc(route_class=self.name)
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except BaseException as e:
+            # Timed out or the client went away just as it was handed a slot,
+            # pass the slot on
+            if future.done() and not future.cancelled():
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise Shed("shed_timeout", self._retry_after()) from None
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            queued_gauge.dec(route_class=self.name)
+        decisions_counter.inc(route_class=self.name, decision="queued")
+        return time.perf_counter() - start
+
+    def release(self, service_time: float | None = None) -> None:
+        if service_time is not None:
+            self.service_time += _SERVICE_TIME_WEIGHT * (
+                service_time - self.service_time
+            )
+        # Hand the slot straight to the next waiter still waiting
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+        in_flight_gauge.dec(route_class=self.name)
+
+
+def default_limiters() -> dict[str, ClassLimiter]:
+    return {
+        name: ClassLimiter(
+            name,
+            concurrency,
+            settings.ADMISSION_QUEUE.get(name, 0),
+            settings.ADMISSION_MAX_WAIT_MS.get(name, 1000) / 1000,
+        )
+        for name, concurrency in settings.ADMISSION_CONCURRENCY.items()
+    }
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self, app: ASGIApp, limiters: dict[str, ClassLimiter] | None = None
+    ) -> None:
+        self.app = app
+        self.limiters = default_limiters() if limiters is None else limiters
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiters.get(route_class(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            waited = await limiter.acquire()
+        except Shed as shed:
+            decisions_counter.inc(route_class=limiter.name, decision=shed.reason)
+            response = JSONResponse(
+                {"detail": "Server busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(max(math.ceil(shed.retry_after), 1))},
+            )
+            await response(scope, receive, send)
+            return
+        queue_wait_histogram.observe(waited, route_class=limiter.name)
+
+        start = time.perf_counter()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                limiter.release(time.perf_counter() - start)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
@@ -0,0 +1,300 @@
+"""
+Response cache for GET endpoints.
+
+``@cached(Model, ttl=..., tags=...)`` goes under the route decorator. On a hit
+the stored JSON bytes are returned as they are, on a miss the endpoint runs,
+its result is serialized with ``Model`` (the route's response model) and
+stored. Errors are never cached.
+
+Keys are made of the endpoint, its parameters and the caller's authorization
+scope: ``superuser``, ``user:<id>`` for other users (when the endpoint takes
+the current user) or the ``scope`` given to the decorator. Dependencies still
+run on every request, so a hit is only served to callers that passed the
+route's authentication and permission checks.
+
+Every entry is tagged with the entities it was built from (``user:<id>``,
+``items:owner:<id>``...). Writes invalidate tags with
+``invalidate_on_commit(session, *tags)``; the tags are bumped once the
+transaction commits and dropped if it rolls back. Invalidation works with tag
+versions: an entry records the version of each of its tags when it is stored
+and is ignored once any of them has moved on. Versions are read before the
+endpoint runs, so a write that commits while a response is being built makes
+that response stale immediately. Every bump draws a new random version rather
+than counting up, so a version that expired and was bumped again can never
+match an entry stored under the old one.
+
+Backends:
+
+* ``off`` (default): no caching.
+* ``redis``: any server speaking the Redis protocol, shared by all workers.
+  Needs the optional ``redis`` package.
+* ``memory``: an LRU in the worker. Invalidations only reach the worker that
+  made the write, other workers would serve a client stale data right after
+  its own write, so it is only allowed with ``SERVER_WORKERS=1``.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any, Protocol
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_HEADER = "x-cache"
+
+
+def new_version() -> int:
+    """A tag version no earlier bump has used, 0 stands for never bumped."""
+    return secrets.randbits(63) or 1
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    def versions(self, tags: list[str]) -> list[int]: ...
+
+    def bump(self, tags: list[str]) -> None: ...
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry expiry, private to the process."""
+
+    def __init__(self, max_entries: int, max_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        # tag -> (version, expires_at)
+        self._versions: dict[str, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags: list[str]) -> list[int]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                version if expires_at > now else 0
+                for version, expires_at in (
+                    self._versions.get(tag, (0, 0.0)) for tag in tags
+                )
+            ]
+
+    def bump(self, tags: list[str]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # A version only has to outlive the entries stored before it, so
+            # versions older than the longest TTL can be forgotten
+            self._versions = {
+                tag: value for tag, value in self._versions.items() if value[1] > now
+            }
+            for tag in tags:
+                self._versions[tag] = (new_version(), now + self.max_ttl)
+
+
+class RedisBackend:
+    """
+    Shared cache on a Redis protocol server.
+
+    ``client`` is a ``redis.Redis`` (or anything with the same ``get``,
+    ``set``, ``mget`` and ``pipeline`` methods).
+    """
+
+    def __init__(self, client: Any, max_ttl: float, prefix: str = "cache:") -> None:
+        self.client = client
+        self.max_ttl = max_ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        value: bytes | None = self.client.get(self.prefix + key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def versions(self, tags: list[str]) -> list[int]:
+        if not tags:
+            return []
+        values = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump(self, tags: list[str]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.set(
+                f"{self.prefix}tag:{tag}", new_version(), px=int(self.max_ttl * 1000)
+            )
+        pipeline.execute()
+
+
+def build_backend() -> CacheBackend | None:
+    if settings.CACHE_BACKEND == "off":
+        return None
+    if settings.CACHE_BACKEND == "redis":
+        import redis
+
+        client = redis.Redis.from_url(str(settings.CACHE_REDIS_URL))
+        return RedisBackend(client, max_ttl=settings.CACHE_MAX_TTL_SECONDS)
+    return MemoryBackend(
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_ttl=settings.CACHE_MAX_TTL_SECONDS,
+    )
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend | None) -> None:
+        self.backend = backend
+
+    def invalidate(self, *tags: str) -> None:
+        if self.backend is None or not tags:
+            return
+        try:
+            self.backend.bump(sorted(set(tags)))
+        except Exception as e:
+            logger.error(f"Cache invalidation of {tags} failed: {e}")
+
+    def lookup(self, key: str, tags: list[str]) -> tuple[bytes | None, list[int]]:
+        """Return the stored body if still current, and the tags' versions."""
+        assert self.backend is not None
+        try:
+            stored = self.backend.get(key)
+            versions = self.backend.versions(tags)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed: {e}")
+            return None, []
+        if stored is None:
+            return None, versions
+        header, _, body = stored.partition(b"\n")
+        if json.loads(header) != versions:
+            return None, versions
+        return body, versions
+
+    def store(self, key: str, body: bytes, versions: list[int], ttl: float) -> None:
+        assert self.backend is not None
+        try:
+            self.backend.set(key, json.dumps(versions).encode() + b"\n" + body, ttl)
+        except Exception as e:
+            logger.warning(f"Cache store failed: {e}")
+
+
+response_cache = ResponseCache(build_backend())
+
+
+def _caller_scope(kwargs: dict[str, Any], default: str) -> str:
+    # Imported here, app.models is not needed by the backends
+    from app.models import User
+
+    for value in kwargs.values():
+        if isinstance(value, User):
+            return "superuser" if value.is_superuser else f"user:{value.id}"
+    return default
+
+
+def _cache_key(name: str, scope: str, kwargs: dict[str, Any]) -> str:
+    params = {
+        name: value
+        for name, value in kwargs.items()
+        if not isinstance(value, Session) and type(value).__name__ != "User"
+    }
+    digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{name}:{scope}:{digest}"
+
+
+def cached(
+    model: Any,
+    *,
+    ttl: float,
+    tags: Callable[..., Iterable[str]],
+    scope: str = "public",
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Cache a sync GET endpoint's response for ``ttl`` seconds.
+
+    ``tags`` is called with the endpoint's keyword arguments and returns the
+    tags of the entry. ``scope`` names the audience of endpoints that do not
+    take the current user, e.g. ``"superuser"`` for routes guarded by
+    ``get_current_active_superuser``.
+    """
+    if ttl > settings.CACHE_MAX_TTL_SECONDS:
+        raise ValueError(f"ttl {ttl} is above CACHE_MAX_TTL_SECONDS")
+    adapter = TypeAdapter(model)
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(**kwargs: Any) -> Any:
+            if response_cache.backend is None:
+                return func(**kwargs)
+            key = _cache_key(name, _caller_scope(kwargs, scope), kwargs)
+            entry_tags = sorted(set(tags(**kwargs)))
+            body, versions = response_cache.lookup(key, entry_tags)
+            if body is not None:
+                return Response(
+                    body, media_type="application/json", headers={CACHE_HEADER: "hit"}
+                )
+            result = func(**kwargs)
+            if isinstance(result, Response):
+                return result
+            body = adapter.dump_json(
+                adapter.validate_python(result, from_attributes=True)
+            )
+            if len(versions) == len(entry_tags):
+                response_cache.store(key, body, versions, ttl)
+            return Response(
+                body, media_type="application/json", headers={CACHE_HEADER: "miss"}
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_on_commit(session: Session, *tags: str) -> None:
+    """Invalidate ``tags`` once the session's transaction commits."""
+    session.info.setdefault("cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_tags_after_rollback(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop("cache_tags", None)
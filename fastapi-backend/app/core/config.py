@@ -69,6 +69,34 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Optional streaming replicas ("host" or "host:port", comma separated) that
+    # serve read-only routes, see app/core/replicas.py
+    POSTGRES_REPLICA_SERVERS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    # Clients are pinned to the primary for this long after they write
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[PostgresDsn]:
+        uris: list[PostgresDsn] = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(
+                MultiHostUrl.build(
+                    scheme="postgresql+psycopg",
+                    username=self.POSTGRES_USER,
+                    password=self.POSTGRES_PASSWORD,
+                    host=host,
+                    port=int(port) if port else self.POSTGRES_PORT,
+                    path=self.POSTGRES_DB,
+                )
+            )
+        return uris
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -91,6 +119,109 @@ class Settings(BaseSettings):
     def emails_enabled(self) -> bool:
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
+    # Response cache of GET endpoints, see app/core/cache.py. "memory" is
+    # private to each worker and only allowed with a single one, use "redis"
+    # to share it between workers.
+    CACHE_BACKEND: Literal["memory", "redis", "off"] = "off"
+    CACHE_REDIS_URL: str | None = None
+    CACHE_MAX_ENTRIES: int = 10_000
+    # Upper bound for route TTLs, also how long invalidations are remembered
+    CACHE_MAX_TTL_SECONDS: float = 300.0
+
+    # Responses to requests with an Idempotency-Key header are kept this long
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # A claimed key lapses after this long if the request never finishes
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0
+    # How long a duplicate waits for the first request before giving up (409)
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+    # Larger responses are not stored, their retries run again
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 64 * 1024
+
+    # Group commit of POST /items/, see app/core/item_writer.py
+    ITEM_WRITE_COALESCING: bool = False
+    ITEM_WRITE_WINDOW_MS: float = 5.0
+    ITEM_WRITE_MAX_BATCH: int = 100
+
+    # GET /sync: rows per page and how long deletions are remembered. Clients
+    # whose token is older must resync from scratch.
+    SYNC_PAGE_SIZE: int = 1000
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # GET /events: heartbeat interval, events kept per worker for resuming and
+    # events queued per client before a slow client is dropped
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_BUFFER_SIZE: int = 10000
+    EVENTS_QUEUE_SIZE: int = 1000
+
+    # python -m app.server: worker processes, and requests after which a
+    # worker is replaced (0 never) plus a random jitter, see app/server.py
+    SERVER_WORKERS: int = 4
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+
+    # Statement timeout of request transactions per route class, see
+    # app/core/route_classes.py (0 or missing: no timeout)
+    STATEMENT_TIMEOUT_MS: dict[str, int] = {
+        "auth": 2000,
+        "me": 1000,
+        "read": 5000,
+        "write": 5000,
+        "export": 60000,
+        "health": 1000,
+    }
+    # The DB circuit breaker opens when, over the window, the share of failed
+    # statements or the mean pool checkout time crosses its threshold (after
+    # at least DB_BREAKER_MIN_CALLS), then rejects requests for
+    # DB_BREAKER_OPEN_SECONDS before letting probes through
+    DB_BREAKER_ENABLED: bool = True
+    DB_BREAKER_WINDOW_SECONDS: int = 10
+    DB_BREAKER_MIN_CALLS: int = 20
+    DB_BREAKER_ERROR_RATE: float = 0.5
+    DB_BREAKER_POOL_WAIT_MS: float = 1000.0
+    DB_BREAKER_OPEN_SECONDS: float = 5.0
+    DB_BREAKER_HALF_OPEN_PROBES: int = 2
+
+    # Admission control per route class, per worker, see app/core/admission.py:
+    # requests running at once, requests waiting, and the longest (expected)
+    # wait before a request is shed with 503. Classes left out are not limited.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_CONCURRENCY: dict[str, int] = {
+        "auth": 4,
+        "me": 8,
+        "read": 16,
+        "write": 8,
+        "export": 2,
+    }
+    ADMISSION_QUEUE: dict[str, int] = {
+        "auth": 16,
+        "me": 64,
+        "read": 128,
+        "write": 64,
+        "export": 8,
+    }
+    ADMISSION_MAX_WAIT_MS: dict[str, int] = {
+        "auth": 2000,
+        "me": 500,
+        "read": 1000,
+        "write": 2000,
+        "export": 5000,
+    }
+
+    # Deleted accounts are purged in batches of this many items
+    USER_PURGE_BATCH_SIZE: int = 1000
+    USER_PURGE_BATCH_PAUSE_SECONDS: float = 0.05
+
+    # Readiness probes are cached so frequent health checks do not load the DB
+    HEALTH_PROBE_TTL_SECONDS: float = 5.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    SMTP_PROBE_TTL_SECONDS: float = 60.0
+
+    # On-demand profiling of single requests (superusers only), see
+    # app/core/profiling.py. The middleware is not installed when disabled.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_INTERVAL_MS: float = 1.0
+    PROFILING_BUFFER_SIZE: int = 20
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -106,6 +237,18 @@ class Settings(BaseSettings):
             else:
                 raise ValueError(message)
 
+    @model_validator(mode="after")
+    def _check_cache_backend(self) -> Self:
+        if self.CACHE_BACKEND == "redis" and not self.CACHE_REDIS_URL:
+            raise ValueError("CACHE_REDIS_URL is required when CACHE_BACKEND is redis")
+        if self.CACHE_BACKEND == "memory" and self.SERVER_WORKERS > 1:
+            # The other workers would serve a client stale data after its writes
+            raise ValueError(
+                "CACHE_BACKEND memory only sees the writes of its own worker, "
+                "use redis when SERVER_WORKERS is above 1"
+            )
+        return self
+
     @model_validator(mode="after")
     def _enforce_non_default_secrets(self) -> Self:
         self._check_default_secret("SECRET_KEY", self.SECRET_KEY)
@@ -6,9 +6,24 @@ from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.db_guards import TimedQueuePool
+from app.core.replicas import ReplicaRouter
 from app.models import User, UserCreate, Province, District, Hospital
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), poolclass=TimedQueuePool)
+replica_engines = [
+    create_engine(str(uri), poolclass=TimedQueuePool)
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+replica_router = ReplicaRouter(
+    engine,
+    replica_engines,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    lag_check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+)
+
+SEED_FILE = Path(__file__).parent.parent / "data" / "province_district_hospitals.json"
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -38,7 +53,7 @@ def init_db(session: Session) -> None:
 
     # load seed data
     # Load JSON data
-    seed_file = Path("app/data/province_district_hospitals.json")
+    seed_file = SEED_FILE
     if not seed_file.exists():
         print("Seed file not found:", seed_file)
         return
@@ -58,8 +73,7 @@ def init_db(session: Session) -> None:
         if not province:
             province = Province(name=province_name)
             session.add(province)
-            session.commit()
-            session.refresh(province)
+            session.flush()
 
         # 2. District
         district = session.exec(
@@ -71,8 +85,7 @@ def init_db(session: Session) -> None:
         if not district:
             district = District(name=district_name, province_id=province.id)
             session.add(district)
-            session.commit()
-            session.refresh(district)
+            session.flush()
 
         # 3. Hospital
         hospital = session.exec(
@@ -0,0 +1,256 @@
+"""
+Statement timeouts and the DB circuit breaker.
+
+Request sessions (``get_db``, ``get_read_db``) carry their route class in
+``session.info``. Every transaction they begin starts with ``SET LOCAL
+statement_timeout`` for that class (``STATEMENT_TIMEOUT_MS``), so a slow query
+is cancelled instead of holding a worker thread and a connection. Background
+sessions have no route class and keep the server's default.
+
+The circuit breaker watches every statement and every pool checkout. When,
+over the last ``DB_BREAKER_WINDOW_SECONDS``, the share of failed statements
+(connection errors, timeouts) or the mean checkout time crosses its
+threshold, it opens: request sessions fail straight away with
+``CircuitOpenError`` (a 503 with ``Retry-After``, like other transient
+database errors) instead of queueing for a database that cannot serve them.
+After ``DB_BREAKER_OPEN_SECONDS`` it lets ``DB_BREAKER_HALF_OPEN_PROBES``
+transactions through; the first statement to succeed closes it again, a
+failure reopens it.
+
+Sessions only connect on their first query, so cached responses are still
+served while the circuit is open.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+import psycopg
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import SessionTransaction
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+state_gauge = registry.gauge(
+    "db_breaker_state", "DB circuit breaker state: 0 closed, 1 open, 2 half open."
+)
+rejected_counter = registry.counter(
+    "db_breaker_rejected_total", "Requests rejected while the DB circuit was open."
+)
+opened_counter = registry.counter(
+    "db_breaker_opened_total", "Times the DB circuit breaker opened."
+)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Database unavailable")
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    __slots__ = ("second", "calls", "failures", "waits", "wait_seconds")
+
+    def __init__(self, second: int) -> None:
+        self.second = second
+        self.calls = 0
+        self.failures = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        *,
+        window: int,
+        min_calls: int,
+        error_rate: float,
+        max_wait: float,
+        open_seconds: float,
+        probes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.max_wait = max_wait
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.clock = clock
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes_left = 0
+        self._buckets: deque[_Bucket] = deque()
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: float) -> _Bucket:
+        second = int(now)
+        while self._buckets and self._buckets[0].second <= second - self.window:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1].second != second:
+            self._buckets.append(_Bucket(second))
+        return self._buckets[-1]
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"DB circuit breaker {self.state} -> {state}")
+        self.state = state
+        state_gauge.set(_STATE_VALUES[state])
+
+    def _open(self, now: float) -> None:
+        self._set_state(OPEN)
+        self._opened_at = now
+        self._buckets.clear()
+        opened_counter.inc()
+
+    def _check_thresholds(self, now: float) -> None:
+        calls = sum(bucket.calls for bucket in self._buckets)
+        failures = sum(bucket.failures for bucket in self._buckets)
+        if calls >= self.min_calls and failures / calls >= self.error_rate:
+            self._open(now)
+            return
+        waits = sum(bucket.waits for bucket in self._buckets)
+        wait_seconds = sum(bucket.wait_seconds for bucket in self._buckets)
+        if waits >= self.min_calls and wait_seconds / waits >= self.max_wait:
+            self._open(now)
+
+    def allow(self) -> None:
+        """Raise ``CircuitOpenError`` unless a transaction may go ahead."""
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            now = self.clock()
+            if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._set_state(HALF_OPEN)
+                self._probes_left = self.probes
+            if self.state == HALF_OPEN and self._probes_left > 0:
+                self._probes_left -= 1
+                return
+            if self.state == CLOSED:
+                return
+            retry_after = max(self._opened_at + self.open_seconds - now, 1.0)
+        rejected_counter.inc()
+        raise CircuitOpenError(retry_after)
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            now = self.clock()
+            if self.state == HALF_OPEN:
+                if ok:
+                    self._set_state(CLOSED)
+                else:
+                    self._open(now)
+                return
+            if self.state == OPEN:
+                return
+            bucket = self._bucket(now)
+            bucket.calls += 1
+            if not ok:
+                bucket.failures += 1
+                self._check_thresholds(now)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                return
+            now = self.clock()
+            bucket = self._bucket(now)
+            bucket.waits += 1
+            bucket.wait_seconds += seconds
+            if seconds >= self.max_wait:
+                self._check_thresholds(now)
+
+
+db_breaker = CircuitBreaker(
+    window=settings.DB_BREAKER_WINDOW_SECONDS,
+    min_calls=settings.DB_BREAKER_MIN_CALLS,
+    error_rate=settings.DB_BREAKER_ERROR_RATE,
+    max_wait=settings.DB_BREAKER_POOL_WAIT_MS / 1000,
+    open_seconds=settings.DB_BREAKER_OPEN_SECONDS,
+    probes=settings.DB_BREAKER_HALF_OPEN_PROBES,
+)
+
+
+class TimedQueuePool(QueuePool):
+    """A ``QueuePool`` reporting how long checkouts take to the breaker."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeoutError:
+            db_breaker.record(False)
+            raise
+        db_breaker.record_wait(time.perf_counter() - start)
+        return entry
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_success(*_args: Any) -> None:
+    if settings.DB_BREAKER_ENABLED:
+        db_breaker.record(True)
+
+
+@event.listens_for(Engine, "handle_error")
+def _record_failure(context: ExceptionContext) -> None:
+    # Only failures of the database itself, not constraint violations
+    if settings.DB_BREAKER_ENABLED and (
+        context.is_disconnect
+        or isinstance(context.original_exception, psycopg.OperationalError)
+    ):
+        db_breaker.record(False)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _check_breaker(session: Session, transaction: SessionTransaction) -> None:
+    # Before the connection is checked out, so rejections do not wait on the pool
+    if (
+        settings.DB_BREAKER_ENABLED
+        and transaction.parent is None
+        and "route_class" in session.info
+    ):
+        db_breaker.allow()
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(
+    session: Session, _transaction: SessionTransaction, connection: Connection
+) -> None:
+    route_class = session.info.get("route_class")
+    timeout = settings.STATEMENT_TIMEOUT_MS.get(route_class or "", 0)
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def database_unavailable_handler(_request: Request, exc: Exception) -> JSONResponse:
+    """
+    503 for an open circuit and for transient database errors (lost
+    connections, statement timeouts, serialization failures), which are
+    worth retrying.
+    """
+    retry_after = exc.retry_after if isinstance(exc, CircuitOpenError) else 1.0
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database unavailable, retry later"},
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
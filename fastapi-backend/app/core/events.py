@@ -0,0 +1,227 @@
+"""
+Change events for ``GET /events``.
+
+Triggers on item and "user" send a ``NOTIFY entity_changes`` for every
+statement writing rows, listing their ids, see migration 8d2f6a4b1e90. Each
+row becomes one event. A statement writing too many rows to list is sent
+without ids and becomes a ``reset``. Notifications are delivered to every
+listener at commit, in commit order, whatever worker made the write. Each
+worker runs one listener thread on a dedicated connection (not one from the
+pool) and fans the events out to its own subscribers.
+
+Every subscriber has a bounded queue. A client that does not keep up is
+dropped once its queue is full; it reconnects and resumes instead of the
+worker buffering without limit.
+
+Resuming: the event ids are derived from the notification, so all workers
+give the same event the same id. Each worker keeps the last
+``EVENTS_BUFFER_SIZE`` events, a client reconnecting with ``Last-Event-ID``
+gets the buffered events after that one. If the id is no longer buffered (or
+the listener lost its connection meanwhile) the client gets a ``reset`` event
+and should catch up with ``GET /sync``.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+
+import psycopg
+from sqlalchemy import Engine
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "entity_changes"
+
+subscribers_gauge = registry.gauge(
+    "events_subscribers", "Open GET /events streams of this worker."
+)
+dropped_counter = registry.counter(
+    "events_dropped_subscribers_total",
+    "GET /events streams closed because the client did not keep up.",
+)
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    entity: str
+    op: str
+    row_id: uuid.UUID | None = None
+    owner_id: uuid.UUID | None = None
+
+    @classmethod
+    def from_notification(cls, payload: str) -> list["Event"]:
+        data = json.loads(payload)
+        if data["rows"] is None:
+            # Too many rows to list, the client has to resync
+            return [RESET]
+        prefix = f"{data['version']}.{data['entity']}.{data['op']}"
+        return [
+            cls(
+                id=f"{prefix}.{row_id}",
+                entity=data["entity"],
+                op=data["op"],
+                row_id=uuid.UUID(row_id),
+                owner_id=uuid.UUID(owner_id),
+            )
+            for row_id, owner_id in data["rows"]
+        ]
+
+    def encode(self) -> bytes:
+        if self.entity == "reset":
+            return b"event: reset\ndata: {}\n\n"
+        data = json.dumps({"op": self.op, "id": str(self.row_id)})
+        return f"id: {self.id}\nevent: {self.entity}\ndata: {data}\n\n".encode()
+
+
+RESET = Event(id="", entity="reset", op="reset")
+# Ends the streams when the broker stops
+STOP = Event(id="", entity="stop", op="stop")
+
+
+@dataclass(frozen=True)
+class EventScope:
+    """What a caller may see, the same scoping as ``read_items``."""
+
+    user_id: uuid.UUID
+    is_superuser: bool
+
+    def allows(self, event: Event) -> bool:
+        if self.is_superuser or event.entity in ("reset", "stop"):
+            return True
+        return event.owner_id == self.user_id
+
+
+@dataclass(eq=False)
+class Subscription:
+    scope: EventScope
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[Event] = field(
+        default_factory=lambda: asyncio.Queue(settings.EVENTS_QUEUE_SIZE)
+    )
+    dropped: bool = False
+
+    def offer(self, event: Event) -> None:
+        """Queue ``event``, runs on the subscriber's event loop."""
+        if self.dropped or not self.scope.allows(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            dropped_counter.inc()
+
+
+class EventBroker:
+    def __init__(self, engine: Engine, buffer_size: int) -> None:
+        self.conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self._buffer: deque[Event] = deque(maxlen=buffer_size)
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(
+        self, scope: EventScope, last_event_id: str | None = None
+    ) -> tuple[Subscription, list[Event]]:
+        """
+        Subscribe from the running event loop. Returns the subscription and
+        the buffered events to replay after ``last_event_id``, or ``[RESET]``
+        if that event is no longer buffered.
+        """
+        self._start()
+        subscription = Subscription(scope, asyncio.get_running_loop())
+        with self._lock:
+            # Under the lock no event can fall between the replay and the queue
+            buffered = list(self._buffer)
+            self._subscriptions.add(subscription)
+        subscribers_gauge.inc()
+        if not last_event_id:
+            return subscription, []
+        ids = [event.id for event in buffered]
+        if last_event_id not in ids:
+            return subscription, [RESET]
+        replay = buffered[ids.index(last_event_id) + 1 :]
+        return subscription, [event for event in replay if scope.allows(event)]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.discard(subscription)
+        subscribers_gauge.dec()
+
+    def publish(self, event: Event) -> None:
+        with self._lock:
+            if event is RESET:
+                self._buffer.clear()
+            elif event is not STOP:
+                self._buffer.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The loop is closed, the stream is gone
+                self.unsubscribe(subscription)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._listen, name="event-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self.publish(STOP)
+
+    def _listen(self) -> None:
+        delay = 1.0
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as connection:
+                    connection.execute(f"LISTEN {CHANNEL}")
+                    if connected_before:
+                        # Events were missed while disconnected
+                        self.publish(RESET)
+                    connected_before = True
+                    delay = 1.0
+                    while not self._stop.is_set():
+                        for notify in connection.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except psycopg.Error as e:
+                logger.warning(f"Event listener disconnected: {e}")
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _handle(self, payload: str) -> None:
+        try:
+            events = Event.from_notification(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid change notification {payload!r}: {e}")
+            return
+        for event in events:
+            self.publish(event)
+
+
+event_broker = EventBroker(engine, settings.EVENTS_BUFFER_SIZE)
@@ -0,0 +1,135 @@
+"""
+Liveness, readiness and worker warm-up.
+
+A worker only reports ready once it has warmed up: the DB pool is connected,
+the location registry is loaded and the email templates are compiled. Until
+then the load balancer keeps traffic away from it.
+
+Dependency probes are cached for a few seconds, so a load balancer polling
+``/readyz`` every second from several nodes costs the database at most one
+``SELECT 1`` per worker per TTL.
+"""
+
+import logging
+import socket
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.locations import location_registry
+from app.utils import compile_email_templates
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    detail: str
+    checked_at: float
+
+
+class CachedProbe:
+    """Runs ``check`` at most once per ``ttl`` seconds, concurrent callers share it."""
+
+    def __init__(self, check: Callable[[], str], ttl: float) -> None:
+        self.check = check
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result: ProbeResult | None = None
+
+    def result(self) -> ProbeResult:
+        result = self._result
+        if result and time.monotonic() - result.checked_at < self.ttl:
+            return result
+        with self._lock:
+            result = self._result
+            if result and time.monotonic() - result.checked_at < self.ttl:
+                return result
+            try:
+                result = ProbeResult(True, self.check(), time.monotonic())
+            except Exception as e:
+                logger.warning(f"Health probe failed: {e}")
+                result = ProbeResult(
+                    False, str(e) or type(e).__name__, time.monotonic()
+                )
+            self._result = result
+            return result
+
+
+def _check_db(db_engine: Engine) -> str:
+    with db_engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+    return "ok"
+
+
+def _check_smtp() -> str:
+    if not settings.emails_enabled:
+        return "disabled"
+    assert settings.SMTP_HOST
+    with socket.create_connection(
+        (settings.SMTP_HOST, settings.SMTP_PORT),
+        timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    ):
+        pass
+    return "ok"
+
+
+class Readiness:
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.warmed_up = threading.Event()
+        self.db = CachedProbe(
+            lambda: _check_db(self.engine), ttl=settings.HEALTH_PROBE_TTL_SECONDS
+        )
+        # SMTP is only reported, a mail outage should not take workers out
+        self.smtp = CachedProbe(_check_smtp, ttl=settings.SMTP_PROBE_TTL_SECONDS)
+
+    def warm_up(self) -> None:
+        start = time.perf_counter()
+        pool = self.engine.pool
+        size = pool.size() if hasattr(pool, "size") else 1
+        connections = [self.engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
+        # Already loaded when the master preloaded it, see app/server.py
+        if not location_registry.loaded:
+            with Session(self.engine) as session:
+                location_registry.load(session)
+        templates = compile_email_templates()
+        self.warmed_up.set()
+        logger.info(
+            f"Warm-up finished in {time.perf_counter() - start:.3f}s "
+            f"({size} connections, {templates} email templates)"
+        )
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Retry the warm-up with backoff until it succeeds."""
+
+        def run() -> None:
+            delay = 0.1
+            while not self.warmed_up.is_set():
+                try:
+                    self.warm_up()
+                except Exception as e:
+                    logger.warning(f"Warm-up failed, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 10)
+
+        thread = threading.Thread(target=run, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> tuple[bool, dict[str, ProbeResult]]:
+        checks = {"database": self.db.result(), "smtp": self.smtp.result()}
+        ready = self.warmed_up.is_set() and checks["database"].ok
+        return ready, checks
+
+
+readiness = Readiness(engine)
@@ -0,0 +1,282 @@
+"""
+``Idempotency-Key`` support for write requests.
+
+A POST, PUT, PATCH or DELETE carrying an ``Idempotency-Key`` header is run at
+most once per key. The first request claims the key by inserting a pending
+row in ``idempotency_key``, runs normally and stores its response (body
+zlib-compressed) for ``IDEMPOTENCY_TTL_HOURS``. Retries with the same key get
+the stored response back, marked with ``Idempotent-Replayed: true``, without
+running the handler again.
+
+A retry that arrives while the first request is still running polls the row
+until the response is stored, so duplicates never run in parallel. If the
+first request fails (an exception or a 5xx response) its claim is released
+and a waiting retry takes over. A claim also lapses after
+``IDEMPOTENCY_LOCK_SECONDS`` in case the worker died mid-request.
+
+Keys are scoped to the caller (its ``Authorization`` header), the method and
+the path. Reusing a key for a different request body is rejected with a 422.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import anyio
+from sqlalchemy import Engine
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, delete, select
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class StoredResponse:
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class IdempotencyStore:
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._last_cleanup = 0.0
+        self._cleanup_lock = threading.Lock()
+
+    def claim(self, key: str, request_hash: str) -> bool:
+        """Claim ``key``, also taking over expired entries and lapsed claims."""
+        now = datetime.utcnow()
+        statement = (
+            insert(IdempotencyKey)
+            .values(
+                key=key,
+                request_hash=request_hash,
+                status="pending",
+                created_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            )
+            .on_conflict_do_update(
+                index_elements=[IdempotencyKey.key],
+                set_={
+                    "request_hash": request_hash,
+                    "status": "pending",
+                    "response_status": None,
+                    "response_headers": None,
+                    "response_body": None,
+                    "created_at": now,
+                    "expires_at": now
+                    + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                },
+                where=col(IdempotencyKey.expires_at) < now,
+            )
+            .returning(col(IdempotencyKey.key))
+        )
+        with Session(self.engine) as session:
+            claimed = session.execute(statement).first() is not None
+            session.commit()
+        return claimed
+
+    def get(self, key: str) -> IdempotencyKey | None:
+        with Session(self.engine) as session:
+            return session.get(IdempotencyKey, key)
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with Session(self.engine) as session:
+            entry = session.get(IdempotencyKey, key)
+            if entry is None:
+                return
+            entry.status = "done"
+            entry.response_status = response.status
+            entry.response_headers = json.dumps(response.headers)
+            entry.response_body = zlib.compress(response.body)
+            entry.expires_at = datetime.utcnow() + timedelta(
+                hours=settings.IDEMPOTENCY_TTL_HOURS
+            )
+            session.add(entry)
+            session.commit()
+
+    def release(self, key: str) -> None:
+        with Session(self.engine) as session:
+            session.execute(
+                delete(IdempotencyKey).where(
+                    col(IdempotencyKey.key) == key,
+                    col(IdempotencyKey.status) == "pending",
+                )
+            )
+            session.commit()
+
+    def cleanup(self, batch_size: int = 1000) -> None:
+        """Delete a batch of expired keys, at most once a minute per worker."""
+        with self._cleanup_lock:
+            if time.monotonic() - self._last_cleanup < 60:
+                return
+            self._last_cleanup = time.monotonic()
+        expired = (
+            select(IdempotencyKey.key)
+            .where(col(IdempotencyKey.expires_at) < datetime.utcnow())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        with Session(self.engine) as session:
+            session.execute(
+                delete(IdempotencyKey).where(col(IdempotencyKey.key).in_(expired))
+            )
+            session.commit()
+
+
+def _stored_response(entry: IdempotencyKey) -> Response:
+    assert entry.response_status is not None and entry.response_body is not None
+    response = Response(
+        zlib.decompress(entry.response_body), status_code=entry.response_status
+    )
+    response.raw_headers = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in json.loads(entry.response_headers or "[]")
+    ]
+    response.raw_headers.append((REPLAYED_HEADER.encode(), b"true"))
+    return response
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp, store: IdempotencyStore | None = None) -> None:
+        self.app = app
+        self._store = store
+
+    @property
+    def store(self) -> IdempotencyStore:
+        if self._store is None:
+            from app.core.db import engine
+
+            self._store = IdempotencyStore(engine)
+        return self._store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": "Invalid Idempotency-Key header"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key = hashlib.sha256(
+            b"\0".join(
+                [
+                    headers.get(b"authorization", b""),
+                    scope["method"].encode(),
+                    scope["path"].encode(),
+                    idempotency_key,
+                ]
+            )
+        ).hexdigest()
+        request_hash = hashlib.sha256(
+            scope.get("query_string", b"") + b"\0" + body
+        ).hexdigest()
+
+        replay = await self._claim_or_wait(key, request_hash)
+        if replay is not None:
+            await replay(scope, receive, send)
+            return
+        await self._run_and_store(scope, body, send, key)
+        await run_in_threadpool(self.store.cleanup)
+
+    async def _claim_or_wait(self, key: str, request_hash: str) -> Response | None:
+        """Return the response to replay, or None once this request owns the key."""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            if await run_in_threadpool(self.store.claim, key, request_hash):
+                return None
+            entry = await run_in_threadpool(self.store.get, key)
+            if entry is not None:
+                if entry.request_hash != request_hash:
+                    return JSONResponse(
+                        {
+                            "detail": "Idempotency-Key was already used for a "
+                            "different request"
+                        },
+                        status_code=422,
+                    )
+                if entry.status == "done":
+                    return _stored_response(entry)
+            # Pending elsewhere (or just released), wait and try again
+            if time.monotonic() >= deadline:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+            await anyio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _run_and_store(
+        self, scope: Scope, body: bytes, send: Send, key: str
+    ) -> None:
+        sent_body = False
+        captured = StoredResponse(status=500, headers=[], body=b"")
+
+        async def replay_body() -> Message:
+            nonlocal sent_body
+            if sent_body:
+                return {"type": "http.disconnect"}
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                captured.status = message["status"]
+                captured.headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                captured.body += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await run_in_threadpool(self.store.release, key)
+            raise
+        if (
+            captured.status >= 500
+            or len(captured.body) > settings.IDEMPOTENCY_MAX_BODY_BYTES
+        ):
+            await run_in_threadpool(self.store.release, key)
+            return
+        try:
+            await run_in_threadpool(self.store.complete, key, captured)
+        except Exception as e:
+            # The client already has its response, a retry will run again
+            logger.error(f"Storing the response for an idempotency key failed: {e}")
+            await run_in_threadpool(self.store.release, key)
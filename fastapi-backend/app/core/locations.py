@@ -0,0 +1,61 @@
+"""
+In-memory registry of the province → district → hospital hierarchy.
+
+The hierarchy is reference data: it only changes when the seed file changes,
+but it is needed by signup forms and dropdowns on every page load. Each worker
+loads it once during warm-up and serves it from memory afterwards.
+"""
+
+import threading
+import uuid
+from collections import defaultdict
+
+from sqlmodel import Session, select
+
+from app.models import (
+    District,
+    DistrictPublic,
+    Hospital,
+    HospitalPublic,
+    Province,
+    ProvincePublic,
+)
+
+
+class LocationRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.provinces: list[ProvincePublic] = []
+        self._districts: dict[uuid.UUID, list[DistrictPublic]] = {}
+        self._hospitals: dict[uuid.UUID, list[HospitalPublic]] = {}
+
+    def load(self, session: Session) -> None:
+        provinces = [
+            ProvincePublic(id=p.id, name=p.name)
+            for p in session.exec(select(Province).order_by(Province.name))
+        ]
+        districts: dict[uuid.UUID, list[DistrictPublic]] = defaultdict(list)
+        for d in session.exec(select(District).order_by(District.name)):
+            districts[d.province_id].append(
+                DistrictPublic(id=d.id, name=d.name, province_id=d.province_id)
+            )
+        hospitals: dict[uuid.UUID, list[HospitalPublic]] = defaultdict(list)
+        for h in session.exec(select(Hospital).order_by(Hospital.name)):
+            hospitals[h.district_id].append(
+                HospitalPublic(id=h.id, name=h.name, district_id=h.district_id)
+            )
+        with self._lock:
+            self.provinces = provinces
+            self._districts = dict(districts)
+            self._hospitals = dict(hospitals)
+            self.loaded = True
+
+    def districts_by_province(self, province_id: uuid.UUID) -> list[DistrictPublic]:
+        return self._districts.get(province_id, [])
+
+    def hospitals_by_district(self, district_id: uuid.UUID) -> list[HospitalPublic]:
+        return self._hospitals.get(district_id, [])
+
+
+location_registry = LocationRegistry()
@@ -0,0 +1,283 @@
+"""
+On-demand request profiling for superusers.
+
+The middleware is only installed when ``settings.PROFILING_ENABLED`` is set, so
+normal deployments do not pay anything for it. When installed, a request is
+profiled only if it carries the ``X-Profile`` header (or ``?profile=1``) *and*
+its bearer token belongs to an active superuser.
+
+Profiling uses a small sampling profiler that walks ``sys._current_frames()``
+from a background thread. Unlike ``cProfile``, which only sees the thread that
+enabled it, this also captures sync endpoints running in the AnyIO threadpool.
+Only the profiled request is recorded: the event loop thread while it runs the
+request's task, and threadpool workers while they run a call made from the
+request, which they do in a copy of its context. Stacks that never enter the
+``app`` package are dropped.
+
+Finished profiles are kept in a bounded ring buffer in speedscope's JSON format
+(https://www.speedscope.app) and can be downloaded from
+``/utils/profiles/{profile_id}``.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import Context, ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+_ENABLED_VALUES = ("1", "true", "yes")
+
+# Id of the profile of the request whose context this is
+_profiled_request: ContextVar[str | None] = ContextVar("profiled_request", default=None)
+
+_APP_DIR = str(Path(__file__).resolve().parent.parent)
+
+
+@dataclass
+class RequestProfile:
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    duration_ms: float = 0.0
+    samples: list[list[int]] = field(default_factory=list)
+    weights: list[float] = field(default_factory=list)
+    frames: list[dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": len(self.samples),
+        }
+
+    def to_speedscope(self) -> dict[str, Any]:
+        end = sum(self.weights)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.path}",
+            "exporter": settings.PROJECT_NAME,
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": f"{self.method} {self.path}",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": end,
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads running the profiled request's code.
+
+    ``start`` is called from the request's task, the code running in a context
+    where ``_profiled_request`` is the profile's id belongs to the request too.
+    """
+
+    def __init__(self, profile: RequestProfile, interval: float) -> None:
+        self.profile = profile
+        self.interval = interval
+        self._frame_index: dict[tuple[str, str, int], int] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_ident: int | None = None
+        self._task: asyncio.Task[Any] | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            self._loop_ident = threading.get_ident()
+            self._task = asyncio.current_task()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _frame_id(self, frame: FrameType) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self.profile.frames)
+            self._frame_index[key] = index
+            self.profile.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _runs_request(self, ident: int, frame: FrameType) -> bool:
+        if ident == self._loop_ident:
+            # The task the loop is running, concurrent requests are other tasks
+            return asyncio.current_task(self._loop) is self._task
+        # Threadpool workers keep the context they run a call in as a local
+        current: FrameType | None = frame
+        while current is not None:
+            for value in current.f_locals.values():
+                if (
+                    isinstance(value, Context)
+                    and value.get(_profiled_request) == self.profile.id
+                ):
+                    return True
+            current = current.f_back
+        return False
+
+    def _sample(self, own_ident: int) -> list[list[int]]:
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or not self._runs_request(ident, frame):
+                continue
+            stack: list[FrameType] = []
+            in_app = False
+            current: FrameType | None = frame
+            while current is not None:
+                stack.append(current)
+                if current.f_code.co_filename.startswith(_APP_DIR):
+                    in_app = True
+                current = current.f_back
+            if in_app:
+                stacks.append([self._frame_id(f) for f in reversed(stack)])
+        return stacks
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed_ms = (now - last) * 1000
+            last = now
+            for stack in self._sample(own_ident):
+                self.profile.samples.append(stack)
+                self.profile.weights.append(elapsed_ms)
+
+
+class ProfileStore:
+    """Bounded, thread-safe ring buffer of finished profiles."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._profiles: OrderedDict[str, RequestProfile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+profile_store = ProfileStore(max_size=settings.PROFILING_BUFFER_SIZE)
+
+
+def _is_profiling_requested(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1").lower() in _ENABLED_VALUES
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return any(value.lower() in _ENABLED_VALUES for value in query.get("profile", []))
+
+
+def _bearer_token(scope: Scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization: str = value.decode("latin-1")
+            scheme, _, token = authorization.partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+def _is_superuser_token(token: str) -> bool:
+    # Imported lazily to avoid a circular import through app.api.deps.
+    from app.api.deps import get_current_active_superuser, get_current_user
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        try:
+            user = get_current_user(session=session, token=token)
+            get_current_active_superuser(current_user=user)
+        except HTTPException:
+            return False
+    return True
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _is_profiling_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        if not token or not await run_in_threadpool(_is_superuser_token, token):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            id=uuid.uuid4().hex,
+            method=scope["method"],
+            path=scope["path"],
+            started_at=datetime.now(timezone.utc),
+        )
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile.id.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        profiler = SamplingProfiler(
+            profile, interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        )
+        start = time.perf_counter()
+        context_token = _profiled_request.set(profile.id)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            _profiled_request.reset(context_token)
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            profile_store.add(profile)
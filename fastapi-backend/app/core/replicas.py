@@ -0,0 +1,139 @@
+"""
+Routing of read-only sessions to Postgres streaming replicas.
+
+Reads go to a replica (round robin) unless:
+
+* the client wrote something in the last ``READ_YOUR_WRITES_SECONDS``, so it
+  is pinned to the primary and sees its own writes, or
+* the replica's replay lag is above ``REPLICA_MAX_LAG_SECONDS`` (or the lag
+  check fails), in which case it is skipped until the next check.
+
+With no replicas configured every read goes to the primary. A pin is the time
+until which the client reads from the primary. It travels with the client (a
+signed cookie, see ``app.api.deps.get_client_pin``) rather than living in a
+worker's memory, so whichever worker serves the next request honours it, and
+pins are compared against the wall clock for the same reason. It is meant to
+cover the immediate "write, then reload the page" pattern, not to be a global
+consistency guarantee.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import ORMExecuteState
+from sqlmodel import Session
+
+logger = logging.getLogger(__name__)
+
+REPLICA_LAG_QUERY = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def query_replica_lag(engine: Engine) -> float:
+    with engine.connect() as connection:
+        return float(connection.exec_driver_sql(REPLICA_LAG_QUERY).scalar_one())
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: list[Engine],
+        *,
+        max_lag: float,
+        pin_seconds: float,
+        lag_check_interval: float,
+        lag_probe: Callable[[Engine], float] = query_replica_lag,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.pin_seconds = pin_seconds
+        self.lag_check_interval = lag_check_interval
+        self.lag_probe = lag_probe
+        self.clock = clock
+        self._lag: dict[int, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.cycle(range(len(replicas)))
+
+    def pin_until(self) -> float:
+        """Until when a client that just wrote reads from the primary."""
+        return self.clock() + self.pin_seconds
+
+    def replica_lag(self, index: int) -> float:
+        now = self.clock()
+        cached = self._lag.get(index)
+        if cached and now - cached[1] < self.lag_check_interval:
+            return cached[0]
+        try:
+            lag = self.lag_probe(self.replicas[index])
+        except Exception as e:
+            logger.warning(f"Replica {index} lag check failed: {e}")
+            lag = float("inf")
+        self._lag[index] = (lag, now)
+        return lag
+
+    def engine_for_read(self, pinned_until: float = 0.0) -> Engine:
+        if not self.replicas or pinned_until > self.clock():
+            return self.primary
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                index = next(self._round_robin)
+            if self.replica_lag(index) <= self.max_lag:
+                return self.replicas[index]
+        return self.primary
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_wrote(session: Session, _flush_context: object) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@dataclass
+class ClientPin:
+    """
+    A client's read-your-writes pin, ``until`` is a wall clock timestamp.
+
+    ``on_extend`` hands a new pin back to the client, the next request may be
+    served by another worker.
+    """
+
+    until: float = 0.0
+    on_extend: Callable[[float], None] | None = None
+
+    def extend(self, until: float) -> None:
+        if until <= self.until:
+            return
+        self.until = until
+        if self.on_extend is not None:
+            self.on_extend(until)
+
+
+def pin_session_client(session: Session) -> None:
+    """Pin the session's client, e.g. after a write committed by another session."""
+    router: ReplicaRouter | None = session.info.get("replica_router")
+    pin: ClientPin | None = session.info.get("client_pin")
+    if router is not None and pin is not None:
+        pin.extend(router.pin_until())
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_write(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        pin_session_client(session)
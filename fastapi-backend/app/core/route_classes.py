@@ -0,0 +1,57 @@
+"""
+Route classes: groups of routes with similar cost, limits and deadlines.
+
+* ``health``: probes and metrics, cheap and never held back
+* ``auth``: password hashing (login, signup, password changes), CPU bound
+* ``me``: the caller's own account, loaded on every page
+* ``export``: bulk reads (``/sync``, ``/stats``) that legitimately run long
+* ``read`` and ``write``: everything else, by HTTP method
+
+Statement timeouts (``STATEMENT_TIMEOUT_MS``) and admission limits
+(``ADMISSION_CONCURRENCY`` and friends) are set per class.
+"""
+
+from app.core.config import settings
+
+HEALTH = "health"
+AUTH = "auth"
+ME = "me"
+EXPORT = "export"
+READ = "read"
+WRITE = "write"
+
+ROUTE_CLASSES = (HEALTH, AUTH, ME, EXPORT, READ, WRITE)
+
+# Paths below the API prefix, without trailing slash
+_HEALTH_PATHS = {
+    "/utils/livez",
+    "/utils/readyz",
+    "/utils/health-check",
+    "/utils/metrics",
+}
+_AUTH_PATHS = {
+    "/login/access-token",
+    "/login",
+    "/users/signup",
+    "/users/me/password",
+    "/reset-password",
+    "/private/users",
+}
+_ME_PATHS = {"/users/me", "/login/test-token", "/logout"}
+_AUTH_PREFIXES = ("/password-recovery/",)
+_EXPORT_PREFIXES = ("/sync", "/stats/")
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def route_class(method: str, path: str) -> str:
+    """The class of a request, from its method and URL path."""
+    path = path.removeprefix(settings.API_V1_STR).rstrip("/")
+    if path in _HEALTH_PATHS:
+        return HEALTH
+    if path in _AUTH_PATHS or path.startswith(_AUTH_PREFIXES):
+        return AUTH
+    if path in _ME_PATHS:
+        return ME
+    if method in _READ_METHODS:
+        return EXPORT if path.startswith(_EXPORT_PREFIXES) else READ
+    return WRITE
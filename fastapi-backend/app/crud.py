@@ -1,23 +1,75 @@
 import uuid
+from datetime import datetime
 from typing import Any
 
-from sqlmodel import Session, select
+from psycopg.errors import UniqueViolation
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, col, func, select, update
 
+from app.core.cache import invalidate_on_commit
 from app.core.security import get_password_hash, verify_password
 from app.models import (
-    Item, ItemCreate, User, UserCreate, UserUpdate, UserRegister,
-    Province, District, Hospital
+    Item, ItemCreate, User, UserCreate, UserUpdate, UserUpdateMe, UserRegister,
+    UserPurge, Province, District, Hospital, HospitalStats, HierarchyNode,
+    HierarchyStats, normalize_email
 )
 
+USER_EMAIL_INDEX = "ix_user_email"
+
+
+class DuplicateEmailError(ValueError):
+    """Raised when a write collides with another user's email."""
+
+
+def email_cache_tag(email: str) -> str:
+    """Tag of entries looked up by the email of a user, see ``user_cache_tags``."""
+    return f"email:{normalize_email(email)}"
+
+
+def user_cache_tags(user: User) -> list[str]:
+    """Response cache tags of entries built from ``user``."""
+    return [f"user:{user.id}", email_cache_tag(user.email)]
+
+
+def item_cache_tags(item: Item) -> list[str]:
+    """Response cache tags of entries built from ``item`` or listing it."""
+    return [f"item:{item.id}", f"items:owner:{item.owner_id}", "items"]
+
+
+def owner_items_cache_tags(owner_id: uuid.UUID) -> list[str]:
+    return [f"items:owner:{owner_id}", "items"]
+
+
+def _commit_user(*, session: Session, db_user: User) -> User:
+    """
+    Commit a new or changed user, relying on the unique email index to detect
+    duplicates instead of looking them up first.
+    """
+    session.add(db_user)
+    invalidate_on_commit(session, *user_cache_tags(db_user))
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        if (
+            isinstance(e.orig, UniqueViolation)
+            and e.orig.diag.constraint_name == USER_EMAIL_INDEX
+        ):
+            raise DuplicateEmailError(
+                f"The user with email '{db_user.email}' already exists"
+            ) from e
+        raise
+    # Ids and timestamps have Python-side defaults, the flushed object is
+    # already complete and is not reloaded
+    return db_user
+
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User.model_validate(
         user_create, update={"hashed_password": get_password_hash(user_create.password)}
     )
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return _commit_user(session=session, db_user=db_obj)
 
 
 def create_user_from_registration(
@@ -28,10 +80,7 @@ def create_user_from_registration(
         user_register, 
         update={"hashed_password": get_password_hash(user_register.password)}
     )
-    session.add(db_obj)
-    session.commit()
-    session.refresh(db_obj)
-    return db_obj
+    return _commit_user(session=session, db_user=db_obj)
 
 
 def register_user_with_location(
@@ -88,15 +137,56 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
         password = user_data["password"]
         hashed_password = get_password_hash(password)
         extra_data["hashed_password"] = hashed_password
+    invalidate_on_commit(session, *user_cache_tags(db_user))
+    new_hospital_id = user_data.get("hospital_id")
+    if new_hospital_id and new_hospital_id != db_user.hospital_id:
+        invalidate_on_commit(session, *owner_items_cache_tags(db_user.id))
+        # Items carry the owner's hospital, moving them re-partitions the rows
+        statement = (
+            update(Item)
+            .where(col(Item.owner_id) == db_user.id)
+            .values(hospital_id=new_hospital_id)
+        )
+        session.exec(statement)  # type: ignore
     db_user.sqlmodel_update(user_data, update=extra_data)
+    return _commit_user(session=session, db_user=db_user)
+
+
+def update_user_me(*, session: Session, db_user: User, user_in: UserUpdateMe) -> User:
+    user_data = user_in.model_dump(exclude_unset=True)
+    invalidate_on_commit(session, *user_cache_tags(db_user))
+    db_user.sqlmodel_update(user_data)
+    return _commit_user(session=session, db_user=db_user)
+
+
+def soft_delete_user(*, session: Session, db_user: User) -> UserPurge:
+    """
+    Hide the user straight away and record a pending purge of their items,
+    see app/purge.py.
+    """
+    total_items = session.exec(
+        select(func.count())
+        .select_from(Item)
+        .where(Item.hospital_id == db_user.hospital_id, Item.owner_id == db_user.id)
+    ).one()
+    db_user.deleted_at = datetime.utcnow()
+    db_user.is_active = False
+    purge = UserPurge(
+        user_id=db_user.id, email=db_user.email, total_items=total_items
+    )
     session.add(db_user)
+    session.add(purge)
+    invalidate_on_commit(
+        session, *user_cache_tags(db_user), *owner_items_cache_tags(db_user.id)
+    )
     session.commit()
-    session.refresh(db_user)
-    return db_user
+    return purge
 
 
 def get_user_by_email(*, session: Session, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
+    statement = select(User).where(
+        User.email == normalize_email(email), col(User.deleted_at).is_(None)
+    )
     session_user = session.exec(statement).first()
     return session_user
 
@@ -110,11 +200,24 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     return db_user
 
 
-def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
-    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
+def create_item(
+    *,
+    session: Session,
+    item_in: ItemCreate,
+    owner_id: uuid.UUID,
+    hospital_id: uuid.UUID | None = None,
+) -> Item:
+    if hospital_id is None:
+        owner = session.get(User, owner_id)
+        if not owner:
+            raise ValueError(f"User '{owner_id}' not found")
+        hospital_id = owner.hospital_id
+    db_item = Item.model_validate(
+        item_in, update={"owner_id": owner_id, "hospital_id": hospital_id}
+    )
     session.add(db_item)
+    invalidate_on_commit(session, *item_cache_tags(db_item))
     session.commit()
-    session.refresh(db_item)
     return db_item
 
 
@@ -165,6 +268,77 @@ def get_hospital_by_user_email(*, session: Session, email: str) -> Hospital | No
     statement = (
         select(Hospital)
         .join(User, Hospital.id == User.hospital_id)
-        .where(User.email == email.lower())
+        .where(
+            User.email == normalize_email(email), col(User.deleted_at).is_(None)
+        )
+    )
+    return session.exec(statement).first()
+
+
+def get_hierarchy_stats(
+    *,
+    session: Session,
+    province_id: uuid.UUID | None = None,
+    district_id: uuid.UUID | None = None,
+) -> HierarchyStats | None:
+    """
+    User and item counts of the country, a province or a district, with the
+    counts of the level below. Returns None if the province or district does
+    not exist.
+
+    Counts come from the trigger-maintained hospital_stats rows. Only columns
+    are selected, so the selectin relationships of the location models are
+    never loaded.
+    """
+    user_count: ColumnElement[int] = func.coalesce(func.sum(HospitalStats.user_count), 0)
+    item_count: ColumnElement[int] = func.coalesce(func.sum(HospitalStats.item_count), 0)
+    if district_id:
+        level = "district"
+        name = session.exec(
+            select(District.name).where(District.id == district_id)
+        ).first()
+        statement = (
+            select(Hospital.id, Hospital.name, user_count, item_count)
+            .outerjoin(HospitalStats, col(HospitalStats.hospital_id) == Hospital.id)
+            .where(Hospital.district_id == district_id)
+            .group_by(col(Hospital.id))
+            .order_by(Hospital.name)
+        )
+    elif province_id:
+        level = "province"
+        name = session.exec(
+            select(Province.name).where(Province.id == province_id)
+        ).first()
+        statement = (
+            select(District.id, District.name, user_count, item_count)
+            .outerjoin(Hospital, col(Hospital.district_id) == District.id)
+            .outerjoin(HospitalStats, col(HospitalStats.hospital_id) == Hospital.id)
+            .where(District.province_id == province_id)
+            .group_by(col(District.id))
+            .order_by(District.name)
+        )
+    else:
+        level = "country"
+        name = "All provinces"
+        statement = (
+            select(Province.id, Province.name, user_count, item_count)
+            .outerjoin(District, col(District.province_id) == Province.id)
+            .outerjoin(Hospital, col(Hospital.district_id) == District.id)
+            .outerjoin(HospitalStats, col(HospitalStats.hospital_id) == Hospital.id)
+            .group_by(col(Province.id))
+            .order_by(Province.name)
+        )
+    if name is None:
+        return None
+    children = [
+        HierarchyNode(id=id, name=child_name, user_count=users, item_count=items)
+        for id, child_name, users, items in session.exec(statement).all()
+    ]
+    return HierarchyStats(
+        level=level,
+        id=district_id or province_id,
+        name=name,
+        user_count=sum(child.user_count for child in children),
+        item_count=sum(child.item_count for child in children),
+        children=children,
     )
-    return session.exec(statement).first()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+from app.loadtest.runner import DEFAULT_BASELINE, compare_to_baseline, run_load_test
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def wait_for_server(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    url = f"{base_url}{settings.API_V1_STR}/utils/health-check/"
+    while True:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Server at {base_url} did not become healthy")
+        time.sleep(0.5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the HTTP load scenarios.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--wait", type=float, default=60.0)
+    args = parser.parse_args()
+
+    wait_for_server(args.base_url, args.wait)
+    report = run_load_test(
+        base_url=args.base_url,
+        users=args.users,
+        concurrency=args.concurrency,
+        items=args.items,
+        pages=args.pages,
+        seed=args.seed,
+    )
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(output + "\n")
+        logger.info(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        # Latencies are machine specific, each machine records its own
+        raise SystemExit(
+            f"No baseline at {args.baseline} to compare to, record one on a known "
+            "good commit with --save-baseline"
+        )
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare_to_baseline(report, baseline, tolerance=args.tolerance)
+    for regression in regressions:
+        logger.error(regression)
+    if regressions:
+        sys.exit(1)
+    logger.info("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
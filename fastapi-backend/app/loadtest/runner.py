@@ -0,0 +1,224 @@
+"""
+Scripted HTTP load scenarios against a running backend.
+
+Every virtual user walks through the same journey a hospital user does in the
+frontend: sign up, log in, read ``/users/me``, create, read, update and delete
+items, and page through the item list. Latencies are recorded per route
+template (``GET /items/{id}``, not the concrete URL) so the report can be
+compared run to run.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+
+SEED_FILE = Path(__file__).parent.parent / "data" / "province_district_hospitals.json"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+        return ordered[index]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.routes: dict[str, RouteStats] = defaultdict(RouteStats)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            stats = self.routes[route]
+            stats.latencies_ms.append(elapsed_ms)
+            if not ok:
+                stats.errors += 1
+
+    def report(self, duration_s: float) -> dict[str, Any]:
+        routes = {}
+        for route, stats in sorted(self.routes.items()):
+            count = len(stats.latencies_ms)
+            routes[route] = {
+                "requests": count,
+                "errors": stats.errors,
+                "throughput_rps": round(count / duration_s, 2) if duration_s else 0.0,
+                "p50_ms": round(stats.percentile(50), 2),
+                "p95_ms": round(stats.percentile(95), 2),
+                "p99_ms": round(stats.percentile(99), 2),
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {
+            "duration_s": round(duration_s, 3),
+            "requests": total,
+            "throughput_rps": round(total / duration_s, 2) if duration_s else 0.0,
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    def __init__(
+        self,
+        *,
+        client: httpx.Client,
+        recorder: Recorder,
+        rng: random.Random,
+        locations: list[dict[str, str]],
+    ) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.locations = locations
+
+    def _call(
+        self, route: str, method: str, url: str, expected: int = 200, **kwargs: Any
+    ) -> httpx.Response:
+        start = time.perf_counter()
+        response = self.client.request(method, settings.API_V1_STR + url, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.recorder.record(route, elapsed_ms, response.status_code == expected)
+        return response
+
+    def run(self, *, user_index: int, items: int, pages: int) -> None:
+        location = self.rng.choice(self.locations)
+        email = f"load-{user_index}-{self.rng.getrandbits(48):x}@example.com"
+        password = f"pw-{self.rng.getrandbits(64):x}"
+        self._call(
+            "POST /users/signup",
+            "POST",
+            "/users/signup",
+            json={
+                "name": f"Load User {user_index}",
+                "email": email,
+                "password": password,
+                "confirmPassword": password,
+                "province": location["province"],
+                "district": location["district"],
+                "hospital": location["hospital"],
+            },
+        )
+        response = self._call(
+            "POST /login/access-token",
+            "POST",
+            "/login/access-token",
+            data={"username": email, "password": password},
+        )
+        if response.status_code != 200:
+            return
+        token = response.json()["access_token"]
+        self.client.headers["Authorization"] = f"Bearer {token}"
+
+        self._call("GET /users/me", "GET", "/users/me")
+
+        item_ids = []
+        for n in range(items):
+            response = self._call(
+                "POST /items/",
+                "POST",
+                "/items/",
+                json={"title": f"item {n}", "description": "load test item"},
+            )
+            if response.status_code == 200:
+                item_ids.append(response.json()["id"])
+
+        for item_id in item_ids:
+            self._call("GET /items/{id}", "GET", f"/items/{item_id}")
+            self._call(
+                "PUT /items/{id}",
+                "PUT",
+                f"/items/{item_id}",
+                json={"title": "updated"},
+            )
+
+        page_size = max(1, items // max(pages, 1))
+        for page in range(pages):
+            self._call(
+                "GET /items/",
+                "GET",
+                "/items/",
+                params={"skip": page * page_size, "limit": page_size},
+            )
+
+        for item_id in item_ids[: len(item_ids) // 2]:
+            self._call("DELETE /items/{id}", "DELETE", f"/items/{item_id}")
+
+
+def run_load_test(
+    *,
+    base_url: str,
+    users: int,
+    concurrency: int,
+    items: int,
+    pages: int,
+    seed: int,
+) -> dict[str, Any]:
+    locations = json.loads(SEED_FILE.read_text())
+    recorder = Recorder()
+    next_user = iter(range(users))
+    next_user_lock = threading.Lock()
+
+    def worker(worker_index: int) -> None:
+        rng = random.Random(seed + worker_index)
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            while True:
+                with next_user_lock:
+                    user_index = next(next_user, None)
+                if user_index is None:
+                    return
+                client.headers.pop("Authorization", None)
+                VirtualUser(
+                    client=client, recorder=recorder, rng=rng, locations=locations
+                ).run(user_index=user_index, items=items, pages=pages)
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), name=f"load-user-{i}")
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.perf_counter() - start)
+
+
+def compare_to_baseline(
+    report: dict[str, Any], baseline: dict[str, Any], *, tolerance: float
+) -> list[str]:
+    """Return one message per route that regressed by more than ``tolerance``."""
+    regressions = []
+    for route, base in baseline.get("routes", {}).items():
+        current = report["routes"].get(route)
+        if current is None:
+            regressions.append(f"{route}: missing from this run")
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{route}: {metric} {current[metric]} > baseline {base[metric]}"
+                )
+        if current["errors"] > base["errors"]:
+            regressions.append(
+                f"{route}: errors {current['errors']} > baseline {base['errors']}"
+            )
+    base_rps = baseline.get("throughput_rps", 0)
+    if base_rps and report["throughput_rps"] < base_rps * (1 - tolerance):
+        regressions.append(
+            f"throughput {report['throughput_rps']} rps < baseline {base_rps} rps"
+        )
+    return regressions
@@ -1,10 +1,25 @@
+import threading
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from sqlalchemy.exc import OperationalError
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
+from app.core.db_guards import CircuitOpenError, database_unavailable_handler
+from app.core.events import event_broker
+from app.core.health import readiness
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.item_writer import item_writer
+from app.core.profiling import ProfilingMiddleware
+from app.openapi import OpenAPIDocument
+from app.openapi import install as install_openapi
+from app.purge import run_maintenance
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,12 +29,45 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Warm up in the background so /livez answers straight away while
+    # /readyz keeps the worker out of rotation until it is done
+    readiness.warm_up_in_background()
+    # Load the prebuilt schema now rather than on the first docs request
+    openapi_document.load()
+    # Finish purges of deleted users interrupted by a restart and prune
+    # expired sync tombstones
+    threading.Thread(target=run_maintenance, name="purge", daemon=True).start()
+    yield
+    # Commit the inserts still waiting for a group commit
+    item_writer.stop()
+    # End the open event streams
+    event_broker.stop()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    # Served from the prebuilt schema instead, see app/openapi.py
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+app.add_exception_handler(CircuitOpenError, database_unavailable_handler)
+app.add_exception_handler(OperationalError, database_unavailable_handler)
+
+# Added before CORS so replayed responses still get the CORS headers
+app.add_middleware(IdempotencyMiddleware)
+
+# Outside the idempotency store so shed requests cost nothing, inside CORS so
+# browsers can read the 503
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -30,4 +78,10 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+openapi_document = OpenAPIDocument(app)
+install_openapi(app, openapi_document, f"{settings.API_V1_STR}/openapi.json")
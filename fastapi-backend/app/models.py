@@ -2,12 +2,25 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, List
 
-from pydantic import EmailStr
+from pydantic import EmailStr, field_validator
+from sqlalchemy import BigInteger, Column, Computed, Index, LargeBinary, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.core.ids import uuid7
+
 if TYPE_CHECKING:
     from .models import District, Hospital, User, Item
 
+def normalize_email(email: str) -> str:
+    """Canonical form of an email, the one stored in and looked up from the DB."""
+    return email.strip().lower()
+
+
+def _normalize_optional_email(email: str | None) -> str | None:
+    return normalize_email(email) if email is not None else None
+
+
 class TimestampMixin(SQLModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -18,19 +31,21 @@ class ProvinceBase(SQLModel):
 
 class DistrictBase(SQLModel):
     name: str = Field(max_length=255)
-    province_id: uuid.UUID = Field(foreign_key="province.id", nullable=False)
+    province_id: uuid.UUID = Field(foreign_key="province.id", nullable=False, index=True)
 
 class HospitalBase(SQLModel):
     name: str = Field(max_length=255)
-    district_id: uuid.UUID = Field(foreign_key="district.id", nullable=False)
+    district_id: uuid.UUID = Field(foreign_key="district.id", nullable=False, index=True)
 
 class UserBase(SQLModel):
-    email: EmailStr = Field(index=True, max_length=255)
+    email: EmailStr = Field(max_length=255)
     is_active: bool = True
     is_superuser: bool = False
     hospital_id: uuid.UUID
     full_name: str | None = Field(default=None, max_length=255)
 
+    _normalize_email = field_validator("email")(_normalize_optional_email)
+
 class ItemBase(SQLModel):
     title: str = Field(min_length=1, max_length=255)
     description: str | None = Field(default=None, max_length=255)
@@ -39,39 +54,158 @@ class ItemBase(SQLModel):
 class Province(ProvinceBase, table=True):
     __tablename__ = "province"
     
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     districts: List["District"] = Relationship(back_populates="province", sa_relationship_kwargs={"lazy": "selectin"})
 
 class District(DistrictBase, table=True):
     __tablename__ = "district"
     
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     province: "Province" = Relationship(back_populates="districts", sa_relationship_kwargs={"lazy": "selectin"})
     hospitals: List["Hospital"] = Relationship(back_populates="district", sa_relationship_kwargs={"lazy": "selectin"})
 
 class Hospital(HospitalBase, table=True):
     __tablename__ = "hospital"
     
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     district: "District" = Relationship(back_populates="hospitals", sa_relationship_kwargs={"lazy": "selectin"})
     users: List["User"] = Relationship(back_populates="hospital", sa_relationship_kwargs={"lazy": "selectin"})
 
 class User(UserBase, TimestampMixin, table=True):
     __tablename__ = "user"
+    # Listing filters and sorts, see users_listing in app/api/routes/users.py.
+    # The hospital_id indexes also serve the hospital_id foreign key.
+    __table_args__ = (
+        Index("ix_user_hospital_id_created_at", "hospital_id", "created_at"),
+        Index("ix_user_hospital_id_is_active_created_at", "hospital_id", "is_active", "created_at"),
+        Index("ix_user_created_at", "created_at"),
+        # Unique among live users, the email of a soft-deleted user can be
+        # registered again before the purge removes the row
+        Index("ix_user_email", "email", unique=True, postgresql_where=text("deleted_at IS NULL")),
+    )
     
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     hashed_password: str
     hospital_id: uuid.UUID = Field(foreign_key="hospital.id", nullable=False)
+    # Set when the account is deleted, the row itself is removed by the purge
+    deleted_at: datetime | None = Field(default=None)
     hospital: "Hospital" = Relationship(back_populates="users", sa_relationship_kwargs={"lazy": "selectin"})
-    items: List["Item"] = Relationship(back_populates="owner", cascade_delete=True, sa_relationship_kwargs={"lazy": "selectin"})
+    # Items are removed by the database's ON DELETE CASCADE (or the batched
+    # purge), never loaded by the ORM just to be deleted
+    items: List["Item"] = Relationship(back_populates="owner", passive_deletes="all", sa_relationship_kwargs={"lazy": "select"})
 
-class Item(ItemBase, table=True):
+class Item(ItemBase, TimestampMixin, table=True):
     __tablename__ = "item"
+    # Hash-partitioned on hospital_id by migration 8b4e2d6f1a37, the database
+    # primary key is (id, hospital_id). The ORM keeps identifying items by id.
+    # Listing filters and sorts, see items_listing in app/api/routes/items.py.
+    # The owner_id indexes also serve the owner_id foreign key.
+    __table_args__ = (
+        Index("ix_item_owner_id_created_at", "owner_id", "created_at"),
+        Index("ix_item_owner_id_title", "owner_id", "title", postgresql_ops={"title": "text_pattern_ops"}),
+        Index("ix_item_created_at", "created_at"),
+        Index("ix_item_title", "title", postgresql_ops={"title": "text_pattern_ops"}),
+    )
     
-    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    id: uuid.UUID = Field(default_factory=uuid7, primary_key=True)
     owner_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    # Denormalized from the owner so hospital-scoped queries prune to one partition
+    hospital_id: uuid.UUID = Field(foreign_key="hospital.id", nullable=False, index=True)
     owner: "User" = Relationship(back_populates="items", sa_relationship_kwargs={"lazy": "selectin"})
 
+# Full-text search document of an item, a generated column kept up to date by
+# Postgres. It is added to the table but not mapped, so loading items never
+# fetches it; queries reference it as ``item_search_vector``.
+ITEM_SEARCH_CONFIG = "simple"
+item_search_vector = Column(
+    "search_vector",
+    TSVECTOR,
+    Computed(
+        f"to_tsvector('{ITEM_SEARCH_CONFIG}', coalesce(title, '') || ' ' || coalesce(description, ''))",
+        persisted=True,
+    ),
+)
+Item.__table__.append_column(item_search_vector)
+Index("ix_item_search_vector", item_search_vector, postgresql_using="gin")
+
+# Change version of a row for GET /sync: the id of the last transaction that
+# wrote it (pg_current_xact_id). Set together with updated_at by a trigger,
+# see migration 5b9d3e7a1c48. Like the search vector it is not mapped.
+item_row_version = Column("row_version", BigInteger, nullable=False, server_default="0")
+Item.__table__.append_column(item_row_version)
+Index("ix_item_row_version_id", item_row_version, Item.__table__.c.id)
+Index(
+    "ix_item_owner_id_row_version_id",
+    Item.__table__.c.owner_id,
+    item_row_version,
+    Item.__table__.c.id,
+)
+user_row_version = Column("row_version", BigInteger, nullable=False, server_default="0")
+User.__table__.append_column(user_row_version)
+Index("ix_user_row_version_id", user_row_version, User.__table__.c.id)
+
+class Tombstone(SQLModel, table=True):
+    __tablename__ = "tombstone"
+    # Written by the delete triggers on item and "user", pruned after
+    # SYNC_TOMBSTONE_RETENTION_DAYS by app/purge.py
+    __table_args__ = (
+        Index("ix_tombstone_row_version_id", "row_version", "id"),
+        Index("ix_tombstone_owner_id_row_version_id", "owner_id", "row_version", "id"),
+    )
+
+    entity: str = Field(primary_key=True, max_length=20)
+    id: uuid.UUID = Field(primary_key=True)
+    # The item's owner, or the user itself
+    owner_id: uuid.UUID
+    deleted_at: datetime = Field(index=True)
+    row_version: int = Field(sa_type=BigInteger)
+
+class UserPurge(SQLModel, table=True):
+    __tablename__ = "user_purge"
+
+    # No foreign key, the row outlives the user it describes
+    user_id: uuid.UUID = Field(primary_key=True)
+    email: str = Field(max_length=255)
+    status: str = Field(default="pending", max_length=20)
+    total_items: int = 0
+    deleted_items: int = 0
+    requested_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+    error: str | None = Field(default=None, max_length=255)
+
+class HospitalStats(SQLModel, table=True):
+    __tablename__ = "hospital_stats"
+
+    # Maintained by statement-level triggers on user and item, see migration
+    # 4e8a1f6b9c27. Never written by the application.
+    hospital_id: uuid.UUID = Field(foreign_key="hospital.id", primary_key=True, ondelete="CASCADE")
+    # Users that are not soft-deleted
+    user_count: int = 0
+    item_count: int = 0
+
+class IdempotencyKey(SQLModel, table=True):
+    __tablename__ = "idempotency_key"
+
+    # sha256 of the caller, method, path and Idempotency-Key header, see
+    # app/core/idempotency.py
+    key: str = Field(primary_key=True, max_length=64)
+    request_hash: str = Field(max_length=64)
+    status: str = Field(default="pending", max_length=20)
+    response_status: int | None = None
+    # JSON list of [name, value] pairs
+    response_headers: str | None = None
+    # zlib-compressed
+    response_body: bytes | None = Field(default=None, sa_type=LargeBinary)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+class SeedState(SQLModel, table=True):
+    __tablename__ = "seed_state"
+
+    name: str = Field(primary_key=True, max_length=255)
+    checksum: str = Field(max_length=64)
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
+
 # API schemas for creation
 class UserCreate(UserBase):
     password: str = Field(min_length=8, max_length=40)
@@ -83,6 +217,8 @@ class UserRegister(SQLModel):
     full_name: str | None = Field(default=None, max_length=255)
     hospital_id: uuid.UUID = Field(foreign_key="hospital.id", nullable=False)
 
+    _normalize_email = field_validator("email")(_normalize_optional_email)
+
 class ItemCreate(ItemBase):
     pass
 
@@ -95,6 +231,8 @@ class UserUpdateMe(SQLModel):
     full_name: str | None = Field(default=None, max_length=255)
     email: EmailStr | None = Field(default=None, max_length=255)
 
+    _normalize_email = field_validator("email")(_normalize_optional_email)
+
 class ItemUpdate(ItemBase):
     title: str | None = Field(default=None, min_length=1, max_length=255)  # type: ignore
 
@@ -114,6 +252,17 @@ class UserPublic(UserBase):
 class ItemPublic(ItemBase):
     id: uuid.UUID
     owner_id: uuid.UUID
+    created_at: datetime
+
+class UserPurgePublic(SQLModel):
+    user_id: uuid.UUID
+    email: str
+    status: str
+    total_items: int
+    deleted_items: int
+    requested_at: datetime
+    finished_at: datetime | None
+    error: str | None
 
 # List response schemas
 class UsersPublic(SQLModel):
@@ -124,10 +273,50 @@ class ItemsPublic(SQLModel):
     data: list[ItemPublic]
     count: int
 
+class ItemSearchResults(SQLModel):
+    data: list[ItemPublic]
+    next_cursor: str | None = None
+
+class SyncDeleted(SQLModel):
+    entity: str
+    id: uuid.UUID
+
+class SyncChanges(SQLModel):
+    items: list[ItemPublic]
+    users: list[UserPublic]
+    deleted: list[SyncDeleted]
+    # Pass as `since` to get the next changes
+    next_token: str
+    # More changes are waiting, sync again straight away
+    has_more: bool
+
+class HierarchyNode(SQLModel):
+    id: uuid.UUID
+    name: str
+    user_count: int
+    item_count: int
+
+class HierarchyStats(SQLModel):
+    level: str
+    id: uuid.UUID | None = None
+    name: str
+    user_count: int
+    item_count: int
+    children: list[HierarchyNode]
+
 # Other schemas
 class Message(SQLModel):
     message: str
 
+class DependencyStatus(SQLModel):
+    ok: bool
+    detail: str
+
+class ReadinessStatus(SQLModel):
+    ready: bool
+    warmed_up: bool
+    checks: dict[str, DependencyStatus]
+
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
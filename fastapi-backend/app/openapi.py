@@ -0,0 +1,165 @@
+"""
+Prebuilt OpenAPI schema.
+
+FastAPI builds the schema on the first request to the docs, walking every
+route and model, in every worker after each deploy. Instead the image build
+writes it once::
+
+    python -m app.openapi --output app/openapi.json
+
+and workers check that file at startup against a hash of the schema of their
+own routes and models (the private routes depend on ``ENVIRONMENT``), so a
+stale file is never served. Either way the schema is built once per worker at
+startup, not on a request. It is served from precomputed identity and gzip
+bytes with an ``ETag``, so clients revalidate without downloading it again.
+
+The frontend's copy in ``local-shared-data/openapi.json`` is written by the
+same command (its default output) and checked for drift with::
+
+    python -m app.openapi --check
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+from fastapi.responses import HTMLResponse, Response
+
+logger = logging.getLogger(__name__)
+
+PREBUILT_SCHEMA = Path(__file__).parent / "openapi.json"
+SHARED_SCHEMA = Path(
+    os.environ.get(
+        "OPENAPI_OUTPUT_FILE",
+        Path(__file__).parent.parent.parent / "local-shared-data" / "openapi.json",
+    )
+)
+
+
+def render(schema: dict[str, Any]) -> bytes:
+    return json.dumps(schema, indent=2, ensure_ascii=False).encode() + b"\n"
+
+
+def digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def matches(app: FastAPI, body: bytes) -> bool:
+    """Whether ``body`` is the schema this app and configuration generate."""
+    return digest(body) == digest(render(app.openapi()))
+
+
+class OpenAPIDocument:
+    def __init__(self, app: FastAPI, prebuilt: Path = PREBUILT_SCHEMA) -> None:
+        self.app = app
+        self.prebuilt = prebuilt
+        self._lock = threading.Lock()
+        self._body: bytes | None = None
+        self._gzipped = b""
+        self.etag = ""
+
+    def _load_prebuilt(self) -> bytes | None:
+        try:
+            body = self.prebuilt.read_bytes()
+        except OSError:
+            return None
+        if not matches(self.app, body):
+            logger.warning(f"{self.prebuilt} does not match the app, regenerating")
+            return None
+        return body
+
+    def load(self) -> bytes:
+        """Load (or generate) the schema once, returns the JSON bytes."""
+        if self._body is not None:
+            return self._body
+        with self._lock:
+            if self._body is None:
+                body = self._load_prebuilt() or render(self.app.openapi())
+                self._gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+                self.etag = f'"{digest(body)[:32]}"'
+                self._body = body
+        return self._body
+
+    def response(self, request: Request) -> Response:
+        body = self.load()
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if self.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body = self._gzipped
+        return Response(body, media_type="application/json", headers=headers)
+
+
+def install(app: FastAPI, document: OpenAPIDocument, openapi_url: str) -> None:
+    """Serve ``document`` and the docs pages, for an app created without them."""
+
+    def openapi(request: Request) -> Response:
+        return document.response(request)
+
+    def swagger_ui(_request: Request) -> HTMLResponse:
+        return get_swagger_ui_html(
+            openapi_url=openapi_url,
+            title=f"{app.title} - Swagger UI",
+            oauth2_redirect_url="/docs/oauth2-redirect",
+        )
+
+    def swagger_ui_redirect(_request: Request) -> HTMLResponse:
+        return get_swagger_ui_oauth2_redirect_html()
+
+    def redoc(_request: Request) -> HTMLResponse:
+        return get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc")
+
+    # Plain routes, they are not part of the schema
+    app.add_route(openapi_url, openapi, include_in_schema=False)
+    app.add_route("/docs", swagger_ui, include_in_schema=False)
+    app.add_route("/docs/oauth2-redirect", swagger_ui_redirect, include_in_schema=False)
+    app.add_route("/redoc", redoc, include_in_schema=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write or check the OpenAPI schema.")
+    parser.add_argument("--output", type=Path, default=SHARED_SCHEMA)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if the file differs from the schema of the current routes",
+    )
+    args = parser.parse_args()
+
+    from app.main import app
+
+    body = render(app.openapi())
+    if args.check:
+        current = args.output.read_bytes() if args.output.exists() else b""
+        if current != body:
+            print(
+                f"{args.output} is out of date, run python -m app.openapi",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        return
+    args.output.write_bytes(body)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
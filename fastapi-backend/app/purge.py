@@ -0,0 +1,163 @@
+"""
+Background purge of deleted accounts.
+
+Deleting a user only marks it deleted (see ``crud.soft_delete_user``). The
+items are removed here in bounded batches, each in its own short transaction,
+so no request holds locks or memory for the whole account. Once the items are
+gone the user row itself is deleted.
+
+Purges are started as a background task by the delete routes. Purges that were
+interrupted (for example by a restart) are resumed at startup, or by running
+this module directly, which also prunes expired sync tombstones. Batches use
+``SKIP LOCKED`` so several workers resuming the same purge do not block each
+other.
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, Engine, tuple_
+from sqlmodel import Session, col, delete, select, update
+
+from app.core.cache import invalidate_on_commit
+from app.core.config import settings
+from app.core.db import engine
+from app.crud import owner_items_cache_tags
+from app.models import Item, Tombstone, User, UserPurge
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def purge_batch(
+    *, session: Session, user_id: uuid.UUID, hospital_id: uuid.UUID, batch_size: int
+) -> int:
+    """Delete up to ``batch_size`` of the user's items, returns how many."""
+    batch = (
+        select(Item.id)
+        .where(Item.hospital_id == hospital_id, Item.owner_id == user_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        delete(Item)
+        .where(col(Item.hospital_id) == hospital_id, col(Item.id).in_(batch))
+        .returning(Item.id)
+    )
+    deleted = session.exec(statement).scalars().all()  # type: ignore
+    session.exec(  # type: ignore
+        update(UserPurge)
+        .where(col(UserPurge.user_id) == user_id)
+        .values(status="running", deleted_items=UserPurge.deleted_items + len(deleted))
+    )
+    invalidate_on_commit(
+        session,
+        *owner_items_cache_tags(user_id),
+        *(f"item:{item_id}" for item_id in deleted),
+    )
+    session.commit()
+    return len(deleted)
+
+
+def purge_user(
+    user_id: uuid.UUID,
+    *,
+    db_engine: Engine | Connection = engine,
+    batch_size: int | None = None,
+    pause: float | None = None,
+) -> None:
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    if pause is None:
+        pause = settings.USER_PURGE_BATCH_PAUSE_SECONDS
+    with Session(db_engine) as session:
+        user = session.get(User, user_id)
+        purge = session.get(UserPurge, user_id)
+        if purge is None or purge.status == "done":
+            return
+        try:
+            if user is not None:
+                hospital_id = user.hospital_id
+                while purge_batch(
+                    session=session,
+                    user_id=user_id,
+                    hospital_id=hospital_id,
+                    batch_size=batch_size,
+                ):
+                    if pause:
+                        time.sleep(pause)
+                session.exec(delete(User).where(col(User.id) == user_id))  # type: ignore
+            session.exec(  # type: ignore
+                update(UserPurge)
+                .where(col(UserPurge.user_id) == user_id)
+                .values(status="done", finished_at=datetime.utcnow())
+            )
+            session.commit()
+            logger.info(f"Purged user {user_id}")
+        except Exception as e:
+            session.rollback()
+            logger.exception(f"Purge of user {user_id} failed")
+            session.exec(  # type: ignore
+                update(UserPurge)
+                .where(col(UserPurge.user_id) == user_id)
+                .values(status="failed", error=str(e)[:255])
+            )
+            session.commit()
+
+
+def prune_tombstones(db_engine: Engine = engine, batch_size: int | None = None) -> int:
+    """
+    Delete the tombstones no valid sync token can ask for anymore, returns how
+    many. A day of slack covers transactions still running when a token was
+    issued.
+    """
+    batch_size = batch_size or settings.USER_PURGE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(
+        days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1
+    )
+    total = 0
+    with Session(db_engine) as session:
+        while True:
+            batch = (
+                select(Tombstone.entity, Tombstone.id)
+                .where(col(Tombstone.deleted_at) < cutoff)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = session.exec(  # type: ignore
+                delete(Tombstone).where(
+                    tuple_(col(Tombstone.entity), col(Tombstone.id)).in_(batch)
+                )
+            )
+            session.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                return total
+
+
+def resume_pending_purges(db_engine: Engine = engine) -> None:
+    with Session(db_engine) as session:
+        pending = session.exec(
+            select(UserPurge.user_id).where(
+                col(UserPurge.status).in_(["pending", "running"])
+            )
+        ).all()
+    for user_id in pending:
+        purge_user(user_id, db_engine=db_engine)
+
+
+def run_maintenance(db_engine: Engine = engine) -> None:
+    resume_pending_purges(db_engine)
+    pruned = prune_tombstones(db_engine)
+    logger.info(f"Pruned {pruned} tombstones")
+
+
+def main() -> None:
+    logger.info("Resuming pending user purges")
+    run_maintenance()
+    logger.info("Pending user purges finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Preforking server.
+
+``fastapi run --workers N`` spawns N fresh interpreters, each importing the
+app and loading the reference data on its own. Instead::
+
+    python -m app.server --workers 4
+
+imports the app once in the master, loads the shared read-only state there
+(the location hierarchy, the compiled email templates and the OpenAPI
+schema) and then forks the workers, which share those pages with the master
+copy-on-write. The heap is frozen before forking so the garbage collector of
+the workers does not touch (and so copy) the shared objects.
+
+Connections must not cross a fork: the master closes its pool before forking
+and every worker starts with an empty one.
+
+With ``SERVER_MAX_REQUESTS`` set a worker exits after that many requests
+(plus up to ``SERVER_MAX_REQUESTS_JITTER``, so they do not all restart at
+once) and the master forks a fresh one, which bounds the memory a worker can
+accumulate. Workers that exit for any other reason are replaced as well.
+SIGTERM or SIGINT stop the workers gracefully, then the master.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from types import FrameType
+
+import uvicorn
+from sqlmodel import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> None:
+    """Import the app and load the state every worker would load on its own."""
+    from app.core.db import engine
+    from app.core.locations import location_registry
+    from app.main import openapi_document
+    from app.utils import compile_email_templates
+
+    openapi_document.load()
+    compile_email_templates()
+    try:
+        with Session(engine) as session:
+            location_registry.load(session)
+    except Exception as e:
+        # The workers load it during their warm-up instead
+        logger.warning(f"Could not preload the locations: {e}")
+    engine.dispose()
+
+
+def _reset_engines() -> None:
+    """Drop the pooled connections inherited from the master, without closing them."""
+    from app.core.db import engine, replica_engines
+
+    for db_engine in [engine, *replica_engines]:
+        db_engine.dispose(close=False)
+
+
+class Arbiter:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        max_requests: int,
+        max_requests_jitter: int,
+    ) -> None:
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.config = uvicorn.Config("app.main:app", host=host, port=port)
+        self.socket: socket.socket | None = None
+        self.children: set[int] = set()
+        self.stopping = False
+
+    def run(self) -> None:
+        # Nothing created while preloading is garbage, skip collecting it
+        gc.disable()
+        preload()
+        self.socket = self.config.bind_socket()
+        gc.freeze()
+        gc.enable()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        logger.info(f"Master {os.getpid()} forking {self.workers} workers")
+        for _ in range(self.workers):
+            self._spawn()
+        while self.children:
+            pid, status = os.wait()
+            self.children.discard(pid)
+            if self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0:
+                logger.warning(f"Worker {pid} exited with {code}")
+                # Do not fork in a tight loop if workers keep failing
+                time.sleep(1)
+            self._spawn()
+        logger.info("All workers stopped")
+
+    def _stop(self, signum: int, _frame: FrameType | None) -> None:
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+        code = 0
+        try:
+            self._serve()
+        except BaseException:
+            logger.exception("Worker failed")
+            code = 1
+        finally:
+            # Leave without running the master's cleanup
+            os._exit(code)
+
+    def _serve(self) -> None:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        _reset_engines()
+        from app.main import app
+
+        config = uvicorn.Config(
+            app,
+            host=self.config.host,
+            port=self.config.port,
+            limit_max_requests=(
+                self.max_requests + random.randint(0, self.max_requests_jitter)
+                if self.max_requests
+                else None
+            ),
+        )
+        assert self.socket
+        logger.info(f"Worker {os.getpid()} serving")
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with preforked workers.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Arbiter(
+        args.host,
+        args.port,
+        args.workers,
+        settings.SERVER_MAX_REQUESTS,
+        settings.SERVER_MAX_REQUESTS_JITTER,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
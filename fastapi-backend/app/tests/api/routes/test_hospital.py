@@ -0,0 +1,35 @@
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.cache import CACHE_HEADER, MemoryBackend, response_cache
+from app.core.config import settings
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture
+def memory_cache() -> Generator[None, None, None]:
+    previous = response_cache.backend
+    response_cache.backend = MemoryBackend(max_entries=100, max_ttl=300)
+    yield
+    response_cache.backend = previous
+
+
+def test_hospital_by_email_hides_deleted_users(
+    client: TestClient,
+    db: Session,
+    memory_cache: None,  # noqa: ARG001
+) -> None:
+    user = create_random_user(db)
+    url = f"{settings.API_V1_STR}/hospitals/by-email/{user.email.upper()}"
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.json()["id"] == str(user.hospital_id)
+    assert client.get(url).headers[CACHE_HEADER] == "hit"
+
+    crud.soft_delete_user(session=db, db_user=user)
+    assert client.get(url).status_code == 404
+    assert crud.get_hospital_by_user_email(session=db, email=user.email) is None
@@ -4,7 +4,10 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.db import engine
 from app.tests.utils.item import create_random_item
+from app.tests.utils.query_plans import capture_statements
+from app.tests.utils.utils import random_lower_string
 
 
 def test_create_item(
@@ -24,6 +27,23 @@ def test_create_item(
     assert "owner_id" in content
 
 
+def test_create_item_idempotent(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    headers = {**superuser_token_headers, "Idempotency-Key": random_lower_string()}
+    data = {"title": "Foo", "description": "Fighters"}
+    first = client.post(f"{settings.API_V1_STR}/items/", headers=headers, json=data)
+    second = client.post(f"{settings.API_V1_STR}/items/", headers=headers, json=data)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    assert second.headers["idempotent-replayed"] == "true"
+
+    response = client.post(
+        f"{settings.API_V1_STR}/items/", headers=headers, json={"title": "Other"}
+    )
+    assert response.status_code == 422
+
+
 def test_read_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -79,6 +99,126 @@ def test_read_items(
     assert len(content["data"]) >= 2
 
 
+def test_read_items_filtered_and_sorted(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={
+            "filter": [
+                f"hospital_id:eq:{item.hospital_id}",
+                f"title:prefix:{item.title}",
+            ],
+        },
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [found["id"] for found in content["data"]] == [str(item.id)]
+    assert content["count"] == 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"filter": f"hospital_id:eq:{item.hospital_id}", "sort": "-created_at"},
+    )
+    assert response.status_code == 200
+    created = [found["created_at"] for found in response.json()["data"]]
+    assert created == sorted(created, reverse=True)
+
+
+def test_read_items_unindexed_filter(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"filter": "title:prefix:a", "sort": "created_at"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        "Unsupported combination, no index covers filtering on title "
+        "and sorting by created_at"
+    )
+
+
+def test_search_items(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/search",
+        headers=superuser_token_headers,
+        params={"q": item.title},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [found["id"] for found in content["data"]] == [str(item.id)]
+    assert content["next_cursor"] is None
+
+
+def test_search_items_paginates(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    word = random_lower_string()
+    for _ in range(3):
+        item = create_random_item(db)
+        item.description = f"{word} {item.description}"
+        db.add(item)
+    db.commit()
+    url = f"{settings.API_V1_STR}/items/search"
+    seen = []
+    params: dict[str, str | int] = {"q": word, "limit": 2}
+    while True:
+        response = client.get(url, headers=superuser_token_headers, params=params)
+        assert response.status_code == 200
+        content = response.json()
+        seen += [found["id"] for found in content["data"]]
+        if not content["next_cursor"]:
+            break
+        params["cursor"] = content["next_cursor"]
+    assert len(seen) == len(set(seen)) == 3
+
+
+def test_search_items_paginates_through_equal_ranks(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    word = random_lower_string()
+    items = [create_random_item(db) for _ in range(5)]
+    for item in items:
+        # Same text, same rank
+        item.description = word
+        db.add(item)
+    db.commit()
+    url = f"{settings.API_V1_STR}/items/search"
+    seen = []
+    params: dict[str, str | int] = {"q": word, "limit": 2}
+    while True:
+        response = client.get(url, headers=superuser_token_headers, params=params)
+        assert response.status_code == 200
+        content = response.json()
+        seen += [found["id"] for found in content["data"]]
+        if not content["next_cursor"]:
+            break
+        params["cursor"] = content["next_cursor"]
+    # Ties are broken by id, descending
+    assert seen == sorted((str(item.id) for item in items), reverse=True)
+
+
+def test_search_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/search",
+        headers=superuser_token_headers,
+        params={"q": "foo", "cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
 def test_update_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -97,6 +237,26 @@ def test_update_item(
     assert content["owner_id"] == str(item.owner_id)
 
 
+def test_update_item_single_statement(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    # Read before capturing, the committed item would be refreshed in there
+    item_id = create_random_item(db).id
+    with capture_statements(engine) as captured:
+        response = client.put(
+            f"{settings.API_V1_STR}/items/{item_id}",
+            headers=superuser_token_headers,
+            json={"title": "Updated title"},
+        )
+    assert response.status_code == 200
+    item_statements = [
+        statement for statement, _ in captured.statements if " item" in statement
+    ]
+    assert len(item_statements) == 1
+    assert item_statements[0].lstrip().startswith("UPDATE item")
+    assert "RETURNING" in item_statements[0]
+
+
 def test_update_item_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
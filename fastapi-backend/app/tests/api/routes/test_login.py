@@ -6,7 +6,7 @@ from sqlmodel import Session
 from app.core.config import settings
 from app.core.security import verify_password
 from app.crud import create_user
-from app.models import UserCreate
+from app.models import Hospital, UserCreate
 from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 from app.utils import generate_password_reset_token
@@ -72,7 +72,7 @@ def test_recovery_password_user_not_exits(
     assert r.status_code == 404
 
 
-def test_reset_password(client: TestClient, db: Session) -> None:
+def test_reset_password(client: TestClient, db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
     new_password = random_lower_string()
@@ -83,6 +83,7 @@ def test_reset_password(client: TestClient, db: Session) -> None:
         password=password,
         is_active=True,
         is_superuser=False,
+        hospital_id=hospital.id,
     )
     user = create_user(session=db, user_create=user_create)
     token = generate_password_reset_token(email=email)
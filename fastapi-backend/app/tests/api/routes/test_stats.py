@@ -0,0 +1,79 @@
+import uuid
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Hospital
+from app.tests.utils.item import create_random_item
+
+
+def _hierarchy(
+    client: TestClient, headers: dict[str, str], **params: uuid.UUID
+) -> dict[str, Any]:
+    response = client.get(
+        f"{settings.API_V1_STR}/stats/hierarchy",
+        headers=headers,
+        params={name: str(value) for name, value in params.items()},
+    )
+    assert response.status_code == 200
+    stats: dict[str, Any] = response.json()
+    return stats
+
+
+def _child(stats: dict[str, Any], id: uuid.UUID) -> dict[str, Any]:
+    return next(child for child in stats["children"] if child["id"] == str(id))
+
+
+def test_hierarchy_stats_follow_writes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    hospital = db.get(Hospital, item.hospital_id)
+    assert hospital
+    district = hospital.district
+    before = _hierarchy(client, superuser_token_headers, district_id=district.id)
+
+    db.delete(item)
+    db.commit()
+    after = _hierarchy(client, superuser_token_headers, district_id=district.id)
+    assert after["level"] == "district"
+    assert after["name"] == district.name
+    assert after["item_count"] == before["item_count"] - 1
+    assert (
+        _child(after, hospital.id)["item_count"]
+        == _child(before, hospital.id)["item_count"] - 1
+    )
+
+    country = _hierarchy(client, superuser_token_headers)
+    assert country["level"] == "country"
+    by_province = _hierarchy(
+        client, superuser_token_headers, province_id=district.province_id
+    )
+    assert (
+        _child(country, district.province_id)["item_count"]
+        == (by_province["item_count"])
+    )
+    assert _child(by_province, district.id)["item_count"] == after["item_count"]
+
+
+def test_hierarchy_stats_unknown_location(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/stats/hierarchy",
+        headers=superuser_token_headers,
+        params={"district_id": str(uuid.uuid4())},
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Location not found"
+
+
+def test_hierarchy_stats_requires_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/stats/hierarchy", headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
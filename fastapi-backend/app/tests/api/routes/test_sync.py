@@ -0,0 +1,108 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+# Sync tokens are transaction ids, the changes have to be committed
+pytestmark = pytest.mark.commits
+
+
+def _sync(
+    client: TestClient, headers: dict[str, str], since: str | None = None
+) -> dict[str, Any]:
+    params = {"since": since} if since else {}
+    response = client.get(
+        f"{settings.API_V1_STR}/sync/", headers=headers, params=params
+    )
+    assert response.status_code == 200
+    page: dict[str, Any] = response.json()
+    return page
+
+
+def _sync_all(
+    client: TestClient, headers: dict[str, str], since: str | None
+) -> dict[str, Any]:
+    changes: dict[str, Any] = {"items": [], "users": [], "deleted": []}
+    while True:
+        page = _sync(client, headers, since)
+        for stream in changes:
+            changes[stream] += page[stream]
+        since = page["next_token"]
+        if not page["has_more"]:
+            changes["next_token"] = since
+            return changes
+
+
+def _create_item(
+    client: TestClient, headers: dict[str, str], title: str
+) -> dict[str, Any]:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/", headers=headers, json={"title": title}
+    )
+    assert response.status_code == 200
+    item: dict[str, Any] = response.json()
+    return item
+
+
+def test_sync_returns_changes_since_token(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    first = _create_item(client, normal_user_token_headers, "First")
+    token = _sync_all(client, normal_user_token_headers, None)["next_token"]
+
+    second = _create_item(client, normal_user_token_headers, "Second")
+    changes = _sync_all(client, normal_user_token_headers, token)
+    ids = [item["id"] for item in changes["items"]]
+    assert second["id"] in ids
+    assert first["id"] not in ids
+
+    # Nothing changed since
+    unchanged = _sync(client, normal_user_token_headers, changes["next_token"])
+    assert unchanged["items"] == []
+    assert unchanged["deleted"] == []
+
+
+def test_sync_reports_deleted_items(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    item = _create_item(client, normal_user_token_headers, "Deleted")
+    token = _sync_all(client, normal_user_token_headers, None)["next_token"]
+    response = client.delete(
+        f"{settings.API_V1_STR}/items/{item['id']}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+
+    changes = _sync_all(client, normal_user_token_headers, token)
+    assert {"entity": "item", "id": item["id"]} in changes["deleted"]
+
+
+def test_sync_pages(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    token = _sync_all(client, normal_user_token_headers, None)["next_token"]
+    created = [
+        _create_item(client, normal_user_token_headers, f"Paged {n}")["id"]
+        for n in range(3)
+    ]
+    monkeypatch.setattr(settings, "SYNC_PAGE_SIZE", 1)
+
+    first_page = _sync(client, normal_user_token_headers, token)
+    assert first_page["has_more"]
+    changes = _sync_all(client, normal_user_token_headers, token)
+    assert [item["id"] for item in changes["items"]] == created
+
+
+def test_sync_invalid_token(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/sync/",
+        headers=normal_user_token_headers,
+        params={"since": "not-a-token"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid sync token"
@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.health import readiness
+
+
+def test_livez(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/utils/livez")
+    assert r.status_code == 200
+    assert r.json() is True
+
+
+def test_readyz_after_warm_up(client: TestClient) -> None:
+    readiness.warm_up()
+    r = client.get(f"{settings.API_V1_STR}/utils/readyz")
+    assert r.status_code == 200
+    content = r.json()
+    assert content["ready"] is True
+    assert content["checks"]["database"]["ok"] is True
@@ -0,0 +1,44 @@
+import jwt
+from fastapi import Request, Response
+
+from app.api.deps import PIN_COOKIE, get_client_pin
+
+
+def _request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [
+        (name.lower().encode(), value.encode())
+        for name, value in (headers or {}).items()
+    ]
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": "/",
+            "headers": raw_headers,
+            "client": ("10.0.0.1", 1234),
+        }
+    )
+
+
+def test_no_cookie_means_no_pin() -> None:
+    response = Response()
+    pin = get_client_pin(_request(), response)
+    assert pin.until == 0.0
+    assert "set-cookie" not in response.headers
+
+
+def test_extended_pin_round_trips_through_the_cookie() -> None:
+    response = Response()
+    get_client_pin(_request("POST"), response).extend(1234.5)
+    cookie = response.headers["set-cookie"].split(";")[0]
+    assert cookie.startswith(f"{PIN_COOKIE}=")
+
+    pin = get_client_pin(_request(headers={"Cookie": cookie}), Response())
+    assert pin.until == 1234.5
+
+
+def test_tampered_pin_cookie_is_ignored() -> None:
+    forged = jwt.encode({"until": 1234.5}, "not-the-secret", algorithm="HS256")
+    for cookie in (forged, "garbage"):
+        request = _request(headers={"Cookie": f"{PIN_COOKIE}={cookie}"})
+        assert get_client_pin(request, Response()).until == 0.0
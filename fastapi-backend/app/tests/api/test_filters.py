@@ -0,0 +1,103 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.items import items_listing
+from app.api.routes.users import users_listing
+from app.core.ids import uuid7, uuid7_min
+
+
+def test_filters_compile_to_conditions() -> None:
+    query = items_listing.parse(
+        ["created_at:gte:2024-01-01T02:00:00+02:00", "created_at:lt:2024-02-01"],
+        "-created_at",
+    )
+    assert [str(condition) for condition in query.where] == [
+        "item.created_at >= :created_at_1",
+        "item.created_at < :created_at_1",
+    ]
+    # Stored as naive UTC
+    assert query.where[0].right.value.isoformat() == "2024-01-01T00:00:00"
+    assert [str(order) for order in query.order_by] == ["item.created_at DESC"]
+
+
+def test_prefix_filter_escapes_wildcards() -> None:
+    query = items_listing.parse(["title:prefix:50%_off"], scope={"owner_id"})
+    assert query.where[0].right.value == "50\\%\\_off%"
+
+
+def test_partition_key_does_not_need_an_index() -> None:
+    hospital_id = uuid.uuid4()
+    query = items_listing.parse([f"hospital_id:eq:{hospital_id}"], "created_at")
+    assert query.where[0].right.value == hospital_id
+
+
+def test_time_ordered_id_takes_timestamps() -> None:
+    last_id = uuid7()
+    query = items_listing.parse(
+        ["id:gte:2024-01-01T00:00:00Z", f"id:lt:{last_id}"], "-id"
+    )
+    assert query.where[0].right.value == uuid7_min(datetime(2024, 1, 1))
+    assert query.where[1].right.value == last_id
+    assert [str(order) for order in query.order_by] == ["item.id DESC"]
+
+
+def test_id_sort_needs_an_index_for_the_owner_scope() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        items_listing.parse([], "-id", scope={"hospital_id", "owner_id"})
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "filters, sort, detail",
+    [
+        (["title"], None, "Invalid filter 'title', expected <field>:<op>:<value>"),
+        (["email:eq:a@example.com"], None, "Cannot filter on 'email'"),
+        (
+            ["is_active:gt:true"],
+            None,
+            "Invalid operator 'gt' for is_active, use one of: eq",
+        ),
+        (
+            ["created_at:gte:yesterday"],
+            None,
+            "Invalid value for created_at: 'yesterday'",
+        ),
+        ([], "email", "Cannot sort on 'email'"),
+        (
+            ["is_active:eq:true"],
+            "-created_at",
+            "Unsupported combination, no index covers filtering on is_active "
+            "and sorting by created_at",
+        ),
+    ],
+)
+def test_invalid_or_unindexed_filters_are_rejected(
+    filters: list[str], sort: str | None, detail: str
+) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        users_listing.parse(filters, sort)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+
+
+def test_range_filters_limited_to_one_field() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        items_listing.parse(["created_at:gte:2024-01-01", "title:prefix:a"])
+    assert exc_info.value.detail == "Range and prefix filters are limited to one field"
+
+
+def test_indexed_combinations_are_allowed() -> None:
+    hospital_id = uuid.uuid4()
+    users_listing.parse(
+        [f"hospital_id:eq:{hospital_id}", "is_active:eq:true"], "-created_at"
+    )
+    users_listing.parse([f"hospital_id:eq:{hospital_id}"], "created_at")
+    items_listing.parse(
+        ["created_at:gte:2024-01-01"],
+        "-created_at",
+        scope={"hospital_id", "owner_id"},
+    )
+    items_listing.parse(["title:prefix:Con"], scope={"hospital_id", "owner_id"})
@@ -0,0 +1,139 @@
+"""
+Query plan regression tests.
+
+Seeds a realistic volume of users and items, calls the main endpoints while
+recording every statement they issue, and fails if Postgres plans a filtered
+sequential scan of a large table for any of them. The 35 hospitals hash to
+only some of the 16 item partitions, so scans of tiny partitions, or of a
+partition the hospital filter mostly keeps, are expected and not counted.
+"""
+
+import uuid
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Hospital, User
+from app.tests.utils.query_plans import (
+    capture_statements,
+    explain,
+    filtered_seq_scans,
+    relation_rows,
+)
+from app.tests.utils.user import user_authentication_headers
+
+# Seeds with commits, EXPLAIN and ANALYZE run on other connections
+pytestmark = pytest.mark.commits
+
+SEED_USERS = 500
+SEED_ITEMS_PER_USER = 40
+PASSWORD = "plan-test-password"
+
+
+@pytest.fixture(scope="module")
+def seeded_user(module_db: Session) -> Generator[User, None, None]:
+    from app.core.security import get_password_hash
+
+    hospitals = module_db.exec(select(Hospital.id)).all()
+    prefix = f"plan-{uuid.uuid4().hex[:8]}"
+    params = {
+        "prefix": prefix,
+        "users": SEED_USERS,
+        "items": SEED_ITEMS_PER_USER,
+        "hospitals": [str(h) for h in hospitals],
+        "password": get_password_hash(PASSWORD),
+    }
+    module_db.execute(
+        text(
+            'INSERT INTO "user" (id, email, is_active, is_superuser, hashed_password, '
+            "hospital_id, created_at, updated_at) "
+            "SELECT gen_random_uuid(), :prefix || '-' || n || '@example.com', true, "
+            "false, :password, "
+            "(CAST(:hospitals AS uuid[]))[1 + n % cardinality(CAST(:hospitals AS uuid[]))], "
+            "now(), now() FROM generate_series(1, :users) AS n"
+        ),
+        params,
+    )
+    module_db.execute(
+        text(
+            "INSERT INTO item (id, title, description, owner_id, hospital_id) "
+            "SELECT gen_random_uuid(), 'item ' || n, 'plan test', u.id, u.hospital_id "
+            'FROM "user" u, generate_series(1, :items) AS n '
+            "WHERE u.email LIKE :prefix || '-%'"
+        ),
+        params,
+    )
+    module_db.commit()
+    module_db.execute(text('ANALYZE "user"'))
+    module_db.execute(text("ANALYZE item"))
+    user = module_db.exec(
+        select(User).where(User.email == f"{prefix}-1@example.com")
+    ).one()
+    yield user
+    module_db.execute(
+        text('DELETE FROM "user" WHERE email LIKE :prefix'), {"prefix": f"{prefix}-%"}
+    )
+    module_db.commit()
+
+
+def test_main_endpoints_use_indexes(
+    client: TestClient, seeded_user: User, superuser_token_headers: dict[str, str]
+) -> None:
+    api = settings.API_V1_STR
+    headers = user_authentication_headers(
+        client=client, email=seeded_user.email, password=PASSWORD
+    )
+    with capture_statements(engine) as captured:
+        assert client.get(f"{api}/users/me", headers=headers).status_code == 200
+        assert client.get(f"{api}/items/", headers=headers).status_code == 200
+        r = client.post(f"{api}/items/", headers=headers, json={"title": "plan"})
+        item_id = r.json()["id"]
+        assert client.get(f"{api}/items/{item_id}", headers=headers).status_code == 200
+        r = client.put(f"{api}/items/{item_id}", headers=headers, json={"title": "x"})
+        assert r.status_code == 200
+        r = client.delete(f"{api}/items/{item_id}", headers=headers)
+        assert r.status_code == 200
+        r = client.get(f"{api}/hospitals/by-email/{seeded_user.email}")
+        assert r.status_code == 200
+        r = client.get(
+            f"{api}/items/",
+            headers=superuser_token_headers,
+            params={"hospital_id": str(seeded_user.hospital_id)},
+        )
+        assert r.status_code == 200
+        r = client.get(
+            f"{api}/items/",
+            headers=headers,
+            params={"filter": "created_at:gte:2024-01-01", "sort": "-created_at"},
+        )
+        assert r.status_code == 200
+        r = client.get(
+            f"{api}/items/", headers=headers, params={"filter": "title:prefix:item 1"}
+        )
+        assert r.status_code == 200
+        r = client.get(
+            f"{api}/users/",
+            headers=superuser_token_headers,
+            params={
+                "filter": [
+                    f"hospital_id:eq:{seeded_user.hospital_id}",
+                    "is_active:eq:true",
+                ],
+                "sort": "-created_at",
+            },
+        )
+        assert r.status_code == 200
+
+    assert captured.statements
+    sizes = relation_rows(engine)
+    failures = []
+    for statement, parameters in captured.statements:
+        scans = filtered_seq_scans(explain(engine, statement, parameters), sizes)
+        if scans:
+            failures.append(f"{', '.join(scans)}: {statement}")
+    assert not failures, "Sequential scans of large tables:\n" + "\n".join(failures)
@@ -1,27 +1,175 @@
+"""
+Test isolation.
+
+Every test module runs in one transaction on a single connection that is
+rolled back at the end of the module, and every test in a savepoint rolled
+back after the test. Requests made through ``client`` use sessions on that
+same connection (``get_db`` and ``get_read_db`` are overridden), so whatever a
+test or a module scoped fixture writes, directly or through the API, is gone
+afterwards and never seen by another test.
+
+Modules marked ``commits`` opt out: they need their writes committed, e.g.
+because they read transaction ids or look at the data from other connections,
+and clean up after themselves. scripts/test.sh runs them apart from the
+parallel run, whose open transactions hold back the snapshot xmin.
+
+Under pytest-xdist (``pytest -n auto``) each worker gets its own database,
+cloned from the test database (see app/tests/utils/database.py), which is
+seeded once before the workers start.
+"""
+
 from collections.abc import Generator
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import Connection
 from sqlmodel import Session, delete
 
 from app.core.config import settings
-from app.core.db import engine, init_db
-from app.main import app
-from app.models import Item, User
-from app.tests.utils.user import authentication_token_from_email
-from app.tests.utils.utils import get_superuser_token_headers
+from app.tests.utils.database import (
+    clone_database,
+    drop_database,
+    worker_database_name,
+)
+
+TEMPLATE_DB = settings.POSTGRES_DB
+WORKER_DB = worker_database_name(TEMPLATE_DB)
+if WORKER_DB:
+    # Before the engine is created from it
+    settings.POSTGRES_DB = WORKER_DB
+
+from app import crud  # noqa: E402
+from app.api.deps import ClientPinDep, get_db, get_read_db  # noqa: E402
+from app.core.db import engine, init_db, replica_router  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Hospital, Item, User, UserCreate  # noqa: E402
+from app.tests.utils.user import (  # noqa: E402
+    authentication_token_from_email,
+    get_hospital,
+)
+from app.tests.utils.utils import get_superuser_token_headers  # noqa: E402
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers", "commits: run the module's tests on committing sessions"
+    )
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:  # noqa: ARG001
+    if WORKER_DB:
+        clone_database(str(settings.SQLALCHEMY_DATABASE_URI), TEMPLATE_DB, WORKER_DB)
+        return
+    # Single process, or the xdist controller before it starts the workers
+    with Session(engine) as db:
+        init_db(db)
+        # The deployment creates the first superuser, the tests log in as it
+        if not crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER):
+            superuser = UserCreate(
+                email=settings.FIRST_SUPERUSER,
+                password=settings.FIRST_SUPERUSER_PASSWORD,
+                is_superuser=True,
+                hospital_id=get_hospital(db).id,
+            )
+            crud.create_user(session=db, user_create=superuser)
+    # Nothing may stay connected to the template while it is cloned
+    engine.dispose()
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:  # noqa: ARG001
+    if WORKER_DB:
+        engine.dispose()
+        drop_database(str(settings.SQLALCHEMY_DATABASE_URI), WORKER_DB)
+
+
+def _commits(request: pytest.FixtureRequest) -> bool:
+    return request.node.get_closest_marker("commits") is not None
 
 
 @pytest.fixture(scope="session", autouse=True)
-def db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
-        init_db(session)
+def connection() -> Generator[Connection, None, None]:
+    with engine.connect() as connection:
+        yield connection
+    if not WORKER_DB:
+        # Left over by the modules that commit
+        with Session(engine) as session:
+            session.execute(delete(Item))
+            session.execute(delete(User))
+            session.commit()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def module_transaction(
+    request: pytest.FixtureRequest, connection: Connection
+) -> Generator[None, None, None]:
+    if _commits(request):
+        yield
+        return
+
+    def get_test_db(client_pin: ClientPinDep) -> Generator[Session, None, None]:
+        # Commits in the routes release a savepoint instead. The route class is
+        # left out, its statement timeout would outlive the request.
+        with Session(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        ) as session:
+            session.info["replica_router"] = replica_router
+            session.info["client_pin"] = client_pin
+            yield session
+
+    transaction = connection.begin()
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_read_db] = get_test_db
+    try:
+        yield
+    finally:
+        del app.dependency_overrides[get_db]
+        del app.dependency_overrides[get_read_db]
+        transaction.rollback()
+
+
+@pytest.fixture(autouse=True)
+def savepoint(
+    request: pytest.FixtureRequest, connection: Connection
+) -> Generator[None, None, None]:
+    if _commits(request):
+        yield
+        return
+    nested = connection.begin_nested()
+    yield
+    if nested.is_active:
+        nested.rollback()
+
+
+def _session(request: pytest.FixtureRequest, connection: Connection) -> Session:
+    if _commits(request):
+        return Session(engine)
+    return Session(bind=connection, join_transaction_mode="create_savepoint")
+
+
+@pytest.fixture
+def db(
+    request: pytest.FixtureRequest, connection: Connection
+) -> Generator[Session, None, None]:
+    with _session(request, connection) as session:
         yield session
-        statement = delete(Item)
-        session.execute(statement)
-        statement = delete(User)
-        session.execute(statement)
-        session.commit()
+
+
+@pytest.fixture(scope="module")
+def module_db(
+    request: pytest.FixtureRequest,
+    connection: Connection,
+    module_transaction: None,  # noqa: ARG001
+) -> Generator[Session, None, None]:
+    """Session for module scoped fixtures, its writes last for the module."""
+    with _session(request, connection) as session:
+        yield session
+
+
+@pytest.fixture
+def hospital(db: Session) -> Hospital:
+    return get_hospital(db)
 
 
 @pytest.fixture(scope="module")
@@ -36,7 +184,7 @@ def superuser_token_headers(client: TestClient) -> dict[str, str]:
 
 
 @pytest.fixture(scope="module")
-def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]:
+def normal_user_token_headers(client: TestClient, module_db: Session) -> dict[str, str]:
     return authentication_token_from_email(
-        client=client, email=settings.EMAIL_TEST_USER, db=db
+        client=client, email=settings.EMAIL_TEST_USER, db=module_db
     )
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.admission import (
+    AdmissionMiddleware,
+    ClassLimiter,
+    Shed,
+    decisions_counter,
+)
+from app.core.config import settings
+
+
+def _app(gate: asyncio.Event, limiters: dict[str, ClassLimiter]) -> FastAPI:
+    app = FastAPI()
+
+    @app.post(f"{settings.API_V1_STR}/users/signup")
+    async def signup() -> str:
+        await gate.wait()
+        return "ok"
+
+    @app.get(f"{settings.API_V1_STR}/users/me")
+    async def me() -> str:
+        return "me"
+
+    @app.get(f"{settings.API_V1_STR}/utils/livez")
+    async def livez() -> bool:
+        return True
+
+    app.add_middleware(AdmissionMiddleware, limiters=limiters)
+    return app
+
+
+def test_sheds_when_the_queue_is_full() -> None:
+    async def run() -> None:
+        gate = asyncio.Event()
+        limiters = {
+            "auth": ClassLimiter("auth", concurrency=1, queue_size=1, max_wait=5),
+            "me": ClassLimiter("me", concurrency=1, queue_size=1, max_wait=5),
+        }
+        transport = httpx.ASGITransport(app=_app(gate, limiters))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            signup = f"{settings.API_V1_STR}/users/signup"
+            running = asyncio.create_task(c.post(signup))
+            queued = asyncio.create_task(c.post(signup))
+            while limiters["auth"].in_flight < 1 or not limiters["auth"]._waiters:
+                await asyncio.sleep(0.01)
+
+            shed = await c.post(signup)
+            assert shed.status_code == 503
+            assert int(shed.headers["retry-after"]) >= 1
+
+            # Other classes and health checks are not held back
+            assert (await c.get(f"{settings.API_V1_STR}/users/me")).text == '"me"'
+            assert (await c.get(f"{settings.API_V1_STR}/utils/livez")).text == "true"
+
+            gate.set()
+            assert (await running).status_code == 200
+            assert (await queued).status_code == 200
+        assert limiters["auth"].in_flight == 0
+
+    before = decisions_counter.value(route_class="auth", decision="shed_queue_full")
+    asyncio.run(run())
+    after = decisions_counter.value(route_class="auth", decision="shed_queue_full")
+    assert after == before + 1
+
+
+def test_sheds_on_expected_wait() -> None:
+    async def run() -> None:
+        limiter = ClassLimiter("auth", concurrency=1, queue_size=10, max_wait=0.5)
+        # Requests recently held the slot for a second each
+        limiter.service_time = 1.0
+        await limiter.acquire()
+        with pytest.raises(Shed) as excinfo:
+            await limiter.acquire()
+        assert excinfo.value.reason == "shed_expected_wait"
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_queued_request_times_out() -> None:
+    async def run() -> None:
+        limiter = ClassLimiter("write", concurrency=1, queue_size=10, max_wait=0.05)
+        await limiter.acquire()
+        with pytest.raises(Shed) as excinfo:
+            await limiter.acquire()
+        assert excinfo.value.reason == "shed_timeout"
+        assert not limiter._waiters
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
@@ -0,0 +1,151 @@
+import time
+import uuid
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import ValidationError
+from sqlmodel import Session
+
+from app.core.cache import (
+    CACHE_HEADER,
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    ResponseCache,
+    cached,
+    invalidate_on_commit,
+    response_cache,
+)
+from app.core.config import Settings
+from app.models import ItemPublic, User
+from app.tests.utils.fake_redis import FakeRedis
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request: pytest.FixtureRequest) -> Generator[CacheBackend, None, None]:
+    if request.param == "memory":
+        backend: CacheBackend = MemoryBackend(max_entries=100, max_ttl=300)
+    else:
+        backend = RedisBackend(FakeRedis(), max_ttl=300)
+    previous = response_cache.backend
+    response_cache.backend = backend
+    yield backend
+    response_cache.backend = previous
+
+
+def _user(is_superuser: bool = False) -> User:
+    return User(
+        id=uuid.uuid4(),
+        email="cache@example.com",
+        hashed_password="x",
+        hospital_id=uuid.uuid4(),
+        is_superuser=is_superuser,
+    )
+
+
+def _endpoint() -> tuple[MagicMock, Any]:
+    load = MagicMock(
+        side_effect=lambda id, **_: ItemPublic(
+            id=id,
+            owner_id=uuid.uuid4(),
+            title="cached",
+            created_at="2024-01-01T00:00:00",
+        )
+    )
+
+    @cached(ItemPublic, ttl=60, tags=lambda id, **_: [f"item:{id}"])
+    def read_item(id: uuid.UUID, current_user: User) -> Any:
+        return load(id=id, current_user=current_user)
+
+    return load, read_item
+
+
+def test_cached_endpoint_hits_after_first_call(backend: CacheBackend) -> None:  # noqa: ARG001
+    load, read_item = _endpoint()
+    user, id = _user(), uuid.uuid4()
+    first = read_item(id=id, current_user=user)
+    second = read_item(id=id, current_user=user)
+    assert first.headers[CACHE_HEADER] == "miss"
+    assert second.headers[CACHE_HEADER] == "hit"
+    assert first.body == second.body
+    assert load.call_count == 1
+
+
+def test_cache_key_includes_caller_scope(backend: CacheBackend) -> None:  # noqa: ARG001
+    load, read_item = _endpoint()
+    id = uuid.uuid4()
+    read_item(id=id, current_user=_user())
+    read_item(id=id, current_user=_user())
+    assert load.call_count == 2
+    # Superusers share entries
+    read_item(id=id, current_user=_user(is_superuser=True))
+    read_item(id=id, current_user=_user(is_superuser=True))
+    assert load.call_count == 3
+
+
+def test_invalidated_on_commit_only(backend: CacheBackend) -> None:  # noqa: ARG001
+    load, read_item = _endpoint()
+    user, id = _user(), uuid.uuid4()
+    read_item(id=id, current_user=user)
+
+    with Session() as session:
+        invalidate_on_commit(session, f"item:{id}")
+        session.rollback()
+        assert read_item(id=id, current_user=user).headers[CACHE_HEADER] == "hit"
+
+        invalidate_on_commit(session, f"item:{id}")
+        session.commit()
+    assert read_item(id=id, current_user=user).headers[CACHE_HEADER] == "miss"
+    assert load.call_count == 2
+
+
+def test_errors_are_not_cached(backend: CacheBackend) -> None:  # noqa: ARG001
+    calls = MagicMock(side_effect=[ValueError("boom"), []])
+
+    @cached(list[ItemPublic], ttl=60, tags=lambda **_: ["items"])
+    def read_items() -> Any:
+        return calls()
+
+    with pytest.raises(ValueError):
+        read_items()
+    assert read_items().headers[CACHE_HEADER] == "miss"
+    assert read_items().headers[CACHE_HEADER] == "hit"
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_expired_version_is_not_reused(kind: str) -> None:
+    # Versions outlive the entries stored before them by max_ttl, an entry with
+    # a longer TTL (e.g. after CACHE_MAX_TTL_SECONDS was lowered) outlives it
+    cache = ResponseCache(
+        MemoryBackend(max_entries=100, max_ttl=0.05)
+        if kind == "memory"
+        else RedisBackend(FakeRedis(), max_ttl=0.05)
+    )
+    cache.invalidate("item:1")
+    _, versions = cache.lookup("key", ["item:1"])
+    cache.store("key", b"old", versions, ttl=60)
+    assert cache.lookup("key", ["item:1"])[0] == b"old"
+
+    time.sleep(0.06)
+    cache.invalidate("item:1")
+    assert cache.lookup("key", ["item:1"])[0] is None
+
+
+def test_memory_backend_evicts_least_recently_used() -> None:
+    backend = MemoryBackend(max_entries=2, max_ttl=300)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    assert backend.get("a") == b"1"
+    backend.set("c", b"3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+    assert backend.get("c") == b"3"
+
+
+def test_memory_backend_needs_a_single_worker() -> None:
+    with pytest.raises(ValidationError, match="SERVER_WORKERS"):
+        Settings(CACHE_BACKEND="memory", SERVER_WORKERS=2)  # type: ignore[call-arg]
+    single = Settings(CACHE_BACKEND="memory", SERVER_WORKERS=1)  # type: ignore[call-arg]
+    assert single.CACHE_BACKEND == "memory"
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.core.db_guards import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: Clock) -> CircuitBreaker:
+    return CircuitBreaker(
+        window=10,
+        min_calls=4,
+        error_rate=0.5,
+        max_wait=1.0,
+        open_seconds=5,
+        probes=1,
+        clock=clock,
+    )
+
+
+def test_opens_on_error_rate() -> None:
+    clock = Clock()
+    breaker = _breaker(clock)
+    breaker.record(True)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.allow()
+    assert excinfo.value.retry_after == 5
+
+
+def test_old_failures_leave_the_window() -> None:
+    clock = Clock()
+    breaker = _breaker(clock)
+    breaker.record(False)
+    breaker.record(False)
+    clock.now += 11
+    breaker.record(True)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+
+
+def test_opens_on_pool_wait() -> None:
+    clock = Clock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record_wait(2.0)
+    assert breaker.state == CLOSED
+    breaker.record_wait(2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_closes_or_reopens() -> None:
+    clock = Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 5
+
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    clock.now += 5
+    breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    breaker.allow()
+
+
+def test_statement_timeout_per_route_class() -> None:
+    with Session(engine) as session:
+        session.info["route_class"] = "me"
+        assert session.execute(text("SHOW statement_timeout")).scalar() == "1s"
+    with Session(engine) as session:
+        # Background sessions keep the server default
+        assert session.execute(text("SHOW statement_timeout")).scalar() == "0"
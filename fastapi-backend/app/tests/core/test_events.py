@@ -0,0 +1,121 @@
+import asyncio
+import json
+import uuid
+from typing import Any
+
+import pytest
+
+from app.api.routes import events
+from app.core.config import settings
+from app.core.db import engine
+from app.core.events import RESET, STOP, Event, EventBroker, EventScope
+
+
+class LocalBroker(EventBroker):
+    """Published to by the test instead of a listener thread."""
+
+    def _start(self) -> None:
+        pass
+
+
+def _event(owner_id: uuid.UUID, version: int = 1) -> Event:
+    payload = {
+        "entity": "item",
+        "op": "insert",
+        "rows": [[str(uuid.uuid4()), str(owner_id)]],
+        "version": str(version),
+    }
+    [event] = Event.from_notification(json.dumps(payload))
+    return event
+
+
+def test_statement_notification_becomes_one_event_per_row() -> None:
+    owner = uuid.uuid4()
+    rows = [[str(uuid.uuid4()), str(owner)] for _ in range(3)]
+    payload: dict[str, Any] = {
+        "entity": "item",
+        "op": "delete",
+        "rows": rows,
+        "version": "7",
+    }
+    events = Event.from_notification(json.dumps(payload))
+    assert [(event.row_id, event.owner_id) for event in events] == [
+        (uuid.UUID(row_id), owner) for row_id, _ in rows
+    ]
+    assert len({event.id for event in events}) == 3
+
+    payload["rows"] = None
+    assert Event.from_notification(json.dumps(payload)) == [RESET]
+
+
+def test_events_are_scoped_to_the_owner() -> None:
+    async def run() -> None:
+        broker = LocalBroker(engine, buffer_size=10)
+        owner, other = uuid.uuid4(), uuid.uuid4()
+        subscription, _ = broker.subscribe(EventScope(owner, is_superuser=False))
+        admin, _ = broker.subscribe(EventScope(other, is_superuser=True))
+        mine, theirs = _event(owner), _event(other)
+        broker.publish(mine)
+        broker.publish(theirs)
+        await asyncio.sleep(0)
+
+        assert subscription.queue.get_nowait() == mine
+        assert subscription.queue.empty()
+        assert admin.queue.qsize() == 2
+
+    asyncio.run(run())
+
+
+def test_resume_replays_buffered_events() -> None:
+    async def run() -> None:
+        broker = LocalBroker(engine, buffer_size=2)
+        owner = uuid.uuid4()
+        scope = EventScope(owner, is_superuser=False)
+        events = [_event(owner, version) for version in range(3)]
+        for event in events:
+            broker.publish(event)
+
+        _, replay = broker.subscribe(scope, last_event_id=events[1].id)
+        assert replay == [events[2]]
+        # events[0] fell out of the buffer
+        _, replay = broker.subscribe(scope, last_event_id=events[0].id)
+        assert replay == [RESET]
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_dropped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "EVENTS_QUEUE_SIZE", 2)
+
+    async def run() -> None:
+        broker = LocalBroker(engine, buffer_size=10)
+        owner = uuid.uuid4()
+        subscription, _ = broker.subscribe(EventScope(owner, is_superuser=False))
+        for version in range(3):
+            broker.publish(_event(owner, version))
+        await asyncio.sleep(0)
+        assert subscription.dropped
+
+        broker.unsubscribe(subscription)
+        broker.publish(STOP)
+
+    asyncio.run(run())
+
+
+def test_idle_stream_sends_heartbeats(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "EVENTS_HEARTBEAT_SECONDS", 0.01)
+
+    async def run() -> None:
+        broker = LocalBroker(engine, buffer_size=10)
+        monkeypatch.setattr(events, "event_broker", broker)
+        scope = EventScope(uuid.uuid4(), is_superuser=False)
+        stream = events.event_stream(scope, None)
+        assert await stream.__anext__() == b"retry: 2000\n\n"
+        assert await stream.__anext__() == events.HEARTBEAT
+        assert await stream.__anext__() == events.HEARTBEAT
+        broker.publish(STOP)
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert not broker._subscriptions
+
+    asyncio.run(run())
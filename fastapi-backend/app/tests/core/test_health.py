@@ -0,0 +1,31 @@
+from unittest.mock import MagicMock
+
+from app.core.health import CachedProbe, Readiness
+
+
+def test_cached_probe_reuses_result_within_ttl() -> None:
+    check = MagicMock(return_value="ok")
+    probe = CachedProbe(check, ttl=60)
+    assert probe.result().ok
+    assert probe.result().ok
+    assert check.call_count == 1
+
+
+def test_cached_probe_reports_failures() -> None:
+    probe = CachedProbe(MagicMock(side_effect=OSError("connection refused")), ttl=0)
+    result = probe.result()
+    assert not result.ok
+    assert result.detail == "connection refused"
+
+
+def test_not_ready_until_warmed_up() -> None:
+    readiness = Readiness(MagicMock())
+    readiness.db = CachedProbe(lambda: "ok", ttl=60)
+    readiness.smtp = CachedProbe(lambda: "disabled", ttl=60)
+    ready, checks = readiness.status()
+    assert not ready
+    assert checks["database"].ok
+
+    readiness.warmed_up.set()
+    ready, _ = readiness.status()
+    assert ready
@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.core.idempotency import (
+    REPLAYED_HEADER,
+    IdempotencyMiddleware,
+    IdempotencyStore,
+    StoredResponse,
+)
+from app.models import IdempotencyKey
+
+
+class MemoryStore(IdempotencyStore):
+    """Keeps the keys in a dict instead of the database."""
+
+    def __init__(self) -> None:
+        self.entries: dict[str, IdempotencyKey] = {}
+        self.lock = threading.Lock()
+
+    def claim(self, key: str, request_hash: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry.expires_at > datetime.utcnow():
+                return False
+            self.entries[key] = IdempotencyKey(
+                key=key,
+                request_hash=request_hash,
+                expires_at=datetime.utcnow() + timedelta(minutes=1),
+            )
+            return True
+
+    def get(self, key: str) -> IdempotencyKey | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry.model_copy() if entry else None
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        import json
+        import zlib
+
+        with self.lock:
+            entry = self.entries[key]
+            entry.status = "done"
+            entry.response_status = response.status
+            entry.response_headers = json.dumps(response.headers)
+            entry.response_body = zlib.compress(response.body)
+
+    def release(self, key: str) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def cleanup(self, batch_size: int = 1000) -> None:  # noqa: ARG002
+        pass
+
+
+def _client() -> tuple[TestClient, list[dict[str, Any]]]:
+    calls: list[dict[str, Any]] = []
+    app = FastAPI()
+
+    @app.post("/items/")
+    async def create_item(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        calls.append(body)
+        if body.get("slow"):
+            time.sleep(0.3)
+        if body.get("fail") and len(calls) == 1:
+            raise HTTPException(status_code=503, detail="Try again")
+        return {"id": len(calls), **body}
+
+    app.add_middleware(IdempotencyMiddleware, store=MemoryStore())
+    return TestClient(app), calls
+
+
+def test_retry_replays_stored_response() -> None:
+    client, calls = _client()
+    headers = {"Idempotency-Key": "abc"}
+    first = client.post("/items/", json={"title": "Foo"}, headers=headers)
+    second = client.post("/items/", json={"title": "Foo"}, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == {"id": 1, "title": "Foo"}
+    assert REPLAYED_HEADER not in first.headers
+    assert second.headers[REPLAYED_HEADER] == "true"
+    assert len(calls) == 1
+
+
+def test_requests_without_key_are_not_deduplicated() -> None:
+    client, calls = _client()
+    client.post("/items/", json={"title": "Foo"})
+    client.post("/items/", json={"title": "Foo"})
+    assert len(calls) == 2
+
+
+def test_key_reused_for_different_request() -> None:
+    client, calls = _client()
+    headers = {"Idempotency-Key": "abc"}
+    client.post("/items/", json={"title": "Foo"}, headers=headers)
+    response = client.post("/items/", json={"title": "Bar"}, headers=headers)
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+
+def test_concurrent_duplicate_waits_for_first() -> None:
+    client, calls = _client()
+    headers = {"Idempotency-Key": "slow"}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(
+            client.post, "/items/", json={"slow": True}, headers=headers
+        )
+        time.sleep(0.05)
+        second = pool.submit(
+            client.post, "/items/", json={"slow": True}, headers=headers
+        )
+        responses = [first.result(), second.result()]
+    assert len(calls) == 1
+    assert responses[0].json() == responses[1].json()
+    assert responses[1].headers[REPLAYED_HEADER] == "true"
+
+
+def test_server_error_releases_key() -> None:
+    client, calls = _client()
+    headers = {"Idempotency-Key": "fails-once"}
+    first = client.post("/items/", json={"fail": True}, headers=headers)
+    second = client.post("/items/", json={"fail": True}, headers=headers)
+    assert first.status_code == 503
+    assert second.status_code == 200
+    assert REPLAYED_HEADER not in second.headers
+    assert len(calls) == 2
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.ids import uuid7, uuid7_max, uuid7_min, uuid7_time
+
+
+def test_uuid7_layout() -> None:
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    generated_at = uuid7_time(value)
+    assert generated_at is not None
+    assert abs(generated_at - datetime.utcnow()) < timedelta(seconds=5)
+
+
+def test_uuid7_is_strictly_increasing() -> None:
+    values = [uuid7() for _ in range(10_000)]
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_time_bounds_enclose_ids() -> None:
+    before = datetime.utcnow() - timedelta(milliseconds=1)
+    value = uuid7()
+    after = datetime.utcnow() + timedelta(milliseconds=1)
+    assert uuid7_min(before) < value < uuid7_max(after)
+    moment = datetime(2024, 1, 1, 12, 30)
+    assert uuid7_time(uuid7_min(moment)) == moment
+    assert uuid7_time(uuid7_max(moment)) == moment
+
+
+def test_uuid7_time_ignores_other_versions() -> None:
+    assert uuid7_time(uuid.uuid4()) is None
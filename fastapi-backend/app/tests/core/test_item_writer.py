@@ -0,0 +1,62 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.item_writer import ItemWriter
+from app.models import Item
+
+
+class RecordingWriter(ItemWriter):
+    """Records the batches instead of inserting them."""
+
+    def __init__(self, *, window: float, max_batch: int) -> None:
+        super().__init__(None, window=window, max_batch=max_batch)  # type: ignore
+        self.batches: list[list[Item]] = []
+        self.failing: set[uuid.UUID] = set()
+        self.lock = threading.Lock()
+
+    def _insert(self, items: list[Item]) -> None:
+        with self.lock:
+            self.batches.append(list(items))
+        if any(item.id in self.failing for item in items):
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key"))
+
+
+def _item() -> Item:
+    return Item(title="Item", owner_id=uuid.uuid4(), hospital_id=uuid.uuid4())
+
+
+def test_concurrent_inserts_share_a_commit() -> None:
+    writer = RecordingWriter(window=0.2, max_batch=100)
+    items = [_item() for _ in range(10)]
+    with ThreadPoolExecutor(10) as pool:
+        created = list(pool.map(writer.create, items))
+    writer.stop()
+
+    assert [item.id for item in created] == [item.id for item in items]
+    assert len(writer.batches) < len(items)
+    assert sum(len(batch) for batch in writer.batches) == len(items)
+
+
+def test_batches_are_capped() -> None:
+    writer = RecordingWriter(window=0.2, max_batch=3)
+    futures = [writer.submit(_item()) for _ in range(7)]
+    for future in futures:
+        future.result(timeout=5)
+    writer.stop()
+
+    assert all(len(batch) <= 3 for batch in writer.batches)
+
+
+def test_failed_batch_only_fails_the_offending_item() -> None:
+    writer = RecordingWriter(window=0.2, max_batch=100)
+    good, bad = _item(), _item()
+    writer.failing.add(bad.id)
+    good_future = writer.submit(good)
+    bad_future = writer.submit(bad)
+
+    assert good_future.result(timeout=5) is good
+    assert isinstance(bad_future.exception(timeout=5), IntegrityError)
+    writer.stop()
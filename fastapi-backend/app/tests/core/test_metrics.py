@@ -0,0 +1,39 @@
+from app.core.metrics import Registry
+
+
+def test_counter_and_gauge_render() -> None:
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", labels=["route"])
+    requests.inc(route="items")
+    requests.inc(2, route="items")
+    in_flight = registry.gauge("in_flight", "Requests in flight.")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert requests.value(route="items") == 3
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="items"} 3' in text
+    assert "in_flight 1" in text
+
+
+def test_registry_returns_existing_metric() -> None:
+    registry = Registry()
+    first = registry.counter("hits_total", "Hits.")
+    first.inc()
+    assert registry.counter("hits_total", "Hits.") is first
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1])
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert histogram.count() == 4
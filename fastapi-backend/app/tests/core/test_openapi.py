@@ -0,0 +1,92 @@
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.openapi import OpenAPIDocument, install, matches, render
+
+
+def _app(item_type: type = str) -> FastAPI:
+    app = FastAPI(title="Test", openapi_url=None, docs_url=None, redoc_url=None)
+
+    @app.get("/items", tags=["items"], response_model=list[item_type])  # type: ignore[valid-type]
+    def read_items() -> list[Any]:
+        return []
+
+    router = APIRouter(prefix="/users", tags=["users"])
+
+    @router.get("/me")
+    def read_user_me() -> str:
+        return ""
+
+    app.include_router(router, prefix="/api")
+    return app
+
+
+def _client(app: FastAPI, prebuilt: Path) -> tuple[TestClient, OpenAPIDocument]:
+    document = OpenAPIDocument(app, prebuilt)
+    install(app, document, "/openapi.json")
+    return TestClient(app), document
+
+
+def test_serves_schema_with_etag(tmp_path: Path) -> None:
+    client, _ = _client(_app(), tmp_path / "missing.json")
+
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "/items" in response.json()["paths"]
+    etag = response.headers["etag"]
+
+    response = client.get("/openapi.json", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    assert client.get("/docs").status_code == 200
+    assert client.get("/redoc").status_code == 200
+
+
+def test_serves_gzip(tmp_path: Path) -> None:
+    client, document = _client(_app(), tmp_path / "missing.json")
+
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["info"]["title"] == "Test"
+    assert gzip.decompress(document._gzipped) == document.load()
+
+
+def test_loads_matching_prebuilt_schema(tmp_path: Path) -> None:
+    body = render(_app().openapi())
+    prebuilt = tmp_path / "openapi.json"
+    prebuilt.write_bytes(body)
+    app = _app()
+
+    assert matches(app, body)
+    document = OpenAPIDocument(app, prebuilt)
+    assert document.load() == body
+
+
+def test_regenerates_stale_prebuilt_schema(tmp_path: Path) -> None:
+    app = _app()
+    schema = app.openapi()
+    del schema["paths"]["/items"]
+    prebuilt = tmp_path / "openapi.json"
+    prebuilt.write_bytes(render(schema))
+    app.openapi_schema = None
+
+    document = OpenAPIDocument(app, prebuilt)
+    assert "/items" in json.loads(document.load())["paths"]
+
+
+def test_regenerates_prebuilt_schema_of_changed_models(tmp_path: Path) -> None:
+    body = render(_app(item_type=int).openapi())
+    prebuilt = tmp_path / "openapi.json"
+    prebuilt.write_bytes(body)
+    app = _app()
+
+    assert not matches(app, body)
+    document = OpenAPIDocument(app, prebuilt)
+    assert document.load() == render(app.openapi())
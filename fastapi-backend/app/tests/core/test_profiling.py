@@ -0,0 +1,85 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import anyio
+
+from app.core.profiling import (
+    ProfileStore,
+    RequestProfile,
+    SamplingProfiler,
+    _is_profiling_requested,
+    _profiled_request,
+)
+
+
+def _busy_loop(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _other_request_loop(done: threading.Event) -> None:
+    while not done.is_set():
+        _busy_loop(0.001)
+
+
+def _profile(profile_id: str = "p") -> RequestProfile:
+    return RequestProfile(
+        id=profile_id,
+        method="GET",
+        path="/api/v1/items/",
+        started_at=datetime.now(timezone.utc),
+    )
+
+
+def test_profiling_flag_detection() -> None:
+    assert _is_profiling_requested({"headers": [(b"x-profile", b"1")]})
+    assert _is_profiling_requested({"headers": [], "query_string": b"skip=0&profile=1"})
+    assert not _is_profiling_requested({"headers": [], "query_string": b""})
+    assert not _is_profiling_requested({"headers": [(b"x-profile", b"0")]})
+    for query_string in (b"noprofile=1", b"xprofile=10", b"profile=10"):
+        assert not _is_profiling_requested(
+            {"headers": [], "query_string": query_string}
+        )
+
+
+def test_sampling_profiler_captures_only_the_request() -> None:
+    profile = _profile()
+    # Another request, running at the same time in another thread
+    done = threading.Event()
+    other = threading.Thread(target=_other_request_loop, args=(done,))
+    other.start()
+
+    async def request() -> None:
+        _profiled_request.set(profile.id)
+        profiler = SamplingProfiler(profile, interval=0.001)
+        profiler.start()
+        # The async part on the event loop, then a sync part in the threadpool
+        _busy_loop(0.05)
+        await anyio.to_thread.run_sync(_busy_loop, 0.05)
+        profiler.stop()
+
+    anyio.run(request)
+    done.set()
+    other.join()
+
+    assert profile.samples
+    names = {frame["name"] for frame in profile.frames}
+    assert {"request", "_busy_loop"} <= names
+    assert "_other_request_loop" not in names
+    stacks = [[profile.frames[i]["name"] for i in s] for s in profile.samples]
+    assert any("request" not in stack for stack in stacks)
+    speedscope = profile.to_speedscope()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert len(speedscope["profiles"][0]["samples"]) == len(
+        speedscope["profiles"][0]["weights"]
+    )
+
+
+def test_profile_store_is_bounded() -> None:
+    store = ProfileStore(max_size=2)
+    for profile_id in ("a", "b", "c"):
+        store.add(_profile(profile_id))
+    assert store.get("a") is None
+    assert [p.id for p in store.list()] == ["c", "b"]
@@ -0,0 +1,77 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+from fastapi import Request, Response
+
+from app.api.deps import get_client_pin
+from app.core.replicas import ReplicaRouter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _router(lags: list[float], clock: FakeClock) -> ReplicaRouter:
+    replicas: list[Any] = [MagicMock(name=f"replica-{n}") for n in range(len(lags))]
+    lag_by_replica: dict[Any, float] = dict(zip(replicas, lags, strict=True))
+    return ReplicaRouter(
+        MagicMock(name="primary"),
+        replicas,
+        max_lag=5,
+        pin_seconds=10,
+        lag_check_interval=1,
+        lag_probe=lambda engine: lag_by_replica[engine],
+        clock=clock,
+    )
+
+
+def test_reads_round_robin_over_healthy_replicas() -> None:
+    router = _router([0.0, 0.0], FakeClock())
+    first = router.engine_for_read()
+    second = router.engine_for_read()
+    assert {first, second} == set(router.replicas)
+
+
+def _request(cookie: str | None = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_pin_is_honoured_by_another_worker() -> None:
+    clock = FakeClock()
+    worker_a = _router([0.0, 0.0], clock)
+    worker_b = _router([0.0, 0.0], clock)
+
+    # The write is served by worker A, which hands the pin back in a cookie
+    response = Response()
+    get_client_pin(_request(), response).extend(worker_a.pin_until())
+    cookie = response.headers["set-cookie"].split(";")[0]
+
+    # The next read lands on worker B, which never saw the write
+    pin = get_client_pin(_request(cookie), Response())
+    assert worker_b.engine_for_read(pin.until) is worker_b.primary
+    other_client = get_client_pin(_request(), Response())
+    assert worker_b.engine_for_read(other_client.until) in worker_b.replicas
+
+    clock.now = 11
+    assert worker_b.engine_for_read(pin.until) in worker_b.replicas
+
+
+def test_lagging_replicas_fall_back_to_primary() -> None:
+    router = _router([30.0, 0.0], FakeClock())
+    assert router.engine_for_read() is router.replicas[1]
+    assert router.engine_for_read() is router.replicas[1]
+
+    router.lag_probe = MagicMock(side_effect=OSError("down"))
+    router._lag.clear()
+    assert router.engine_for_read() is router.primary
+
+
+def test_no_replicas_reads_from_primary() -> None:
+    primary = MagicMock()
+    router = ReplicaRouter(primary, [], max_lag=5, pin_seconds=10, lag_check_interval=1)
+    assert router.engine_for_read() is primary
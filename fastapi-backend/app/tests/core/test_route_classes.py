@@ -0,0 +1,27 @@
+import pytest
+
+from app.core.config import settings
+from app.core.route_classes import route_class
+
+
+@pytest.mark.parametrize(
+    "method,path,expected",
+    [
+        ("GET", "/utils/readyz", "health"),
+        ("GET", "/utils/health-check/", "health"),
+        ("POST", "/login/access-token", "auth"),
+        ("POST", "/users/signup", "auth"),
+        ("PATCH", "/users/me/password", "auth"),
+        ("POST", "/password-recovery/someone@example.com", "auth"),
+        ("GET", "/users/me", "me"),
+        ("POST", "/login/test-token", "me"),
+        ("GET", "/sync/", "export"),
+        ("GET", "/stats/hierarchy", "export"),
+        ("GET", "/items/", "read"),
+        ("GET", "/users/00000000-0000-0000-0000-000000000000", "read"),
+        ("POST", "/items/", "write"),
+        ("DELETE", "/items/00000000-0000-0000-0000-000000000000", "write"),
+    ],
+)
+def test_route_class(method: str, path: str, expected: str) -> None:
+    assert route_class(method, f"{settings.API_V1_STR}{path}") == expected
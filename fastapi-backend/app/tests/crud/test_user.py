@@ -1,25 +1,26 @@
+import pytest
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session
 
 from app import crud
 from app.core.security import verify_password
-from app.models import User, UserCreate, UserUpdate
+from app.models import Hospital, User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
 
-def test_create_user(db: Session) -> None:
+def test_create_user(db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password)
+    user_in = UserCreate(email=email, password=password, hospital_id=hospital.id)
     user = crud.create_user(session=db, user_create=user_in)
     assert user.email == email
     assert hasattr(user, "hashed_password")
 
 
-def test_authenticate_user(db: Session) -> None:
+def test_authenticate_user(db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password)
+    user_in = UserCreate(email=email, password=password, hospital_id=hospital.id)
     user = crud.create_user(session=db, user_create=user_in)
     authenticated_user = crud.authenticate(session=db, email=email, password=password)
     assert authenticated_user
@@ -33,42 +34,50 @@ def test_not_authenticate_user(db: Session) -> None:
     assert user is None
 
 
-def test_check_if_user_is_active(db: Session) -> None:
+def test_check_if_user_is_active(db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password)
+    user_in = UserCreate(email=email, password=password, hospital_id=hospital.id)
     user = crud.create_user(session=db, user_create=user_in)
     assert user.is_active is True
 
 
-def test_check_if_user_is_active_inactive(db: Session) -> None:
+def test_check_if_user_is_active_inactive(db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password, disabled=True)
+    user_in = UserCreate(
+        email=email, password=password, disabled=True, hospital_id=hospital.id
+    )
     user = crud.create_user(session=db, user_create=user_in)
     assert user.is_active
 
 
-def test_check_if_user_is_superuser(db: Session) -> None:
+def test_check_if_user_is_superuser(db: Session, hospital: Hospital) -> None:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password, is_superuser=True)
+    user_in = UserCreate(
+        email=email, password=password, is_superuser=True, hospital_id=hospital.id
+    )
     user = crud.create_user(session=db, user_create=user_in)
     assert user.is_superuser is True
 
 
-def test_check_if_user_is_superuser_normal_user(db: Session) -> None:
+def test_check_if_user_is_superuser_normal_user(
+    db: Session, hospital: Hospital
+) -> None:
     username = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=username, password=password)
+    user_in = UserCreate(email=username, password=password, hospital_id=hospital.id)
     user = crud.create_user(session=db, user_create=user_in)
     assert user.is_superuser is False
 
 
-def test_get_user(db: Session) -> None:
+def test_get_user(db: Session, hospital: Hospital) -> None:
     password = random_lower_string()
     username = random_email()
-    user_in = UserCreate(email=username, password=password, is_superuser=True)
+    user_in = UserCreate(
+        email=username, password=password, is_superuser=True, hospital_id=hospital.id
+    )
     user = crud.create_user(session=db, user_create=user_in)
     user_2 = db.get(User, user.id)
     assert user_2
@@ -76,16 +85,60 @@ def test_get_user(db: Session) -> None:
     assert jsonable_encoder(user) == jsonable_encoder(user_2)
 
 
-def test_update_user(db: Session) -> None:
+def test_update_user(db: Session, hospital: Hospital) -> None:
     password = random_lower_string()
     email = random_email()
-    user_in = UserCreate(email=email, password=password, is_superuser=True)
+    user_in = UserCreate(
+        email=email, password=password, is_superuser=True, hospital_id=hospital.id
+    )
     user = crud.create_user(session=db, user_create=user_in)
     new_password = random_lower_string()
-    user_in_update = UserUpdate(password=new_password, is_superuser=True)
+    user_in_update = UserUpdate(
+        password=new_password, is_superuser=True, hospital_id=hospital.id
+    )
     if user.id is not None:
         crud.update_user(session=db, db_user=user, user_in=user_in_update)
     user_2 = db.get(User, user.id)
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_create_user_normalizes_email(db: Session, hospital: Hospital) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user_in = UserCreate(
+        email=email.upper(), password=password, hospital_id=hospital.id
+    )
+    user = crud.create_user(session=db, user_create=user_in)
+    assert user.email == email
+    assert crud.get_user_by_email(session=db, email=email.upper()) == user
+
+
+def test_create_user_duplicate_email(db: Session, hospital: Hospital) -> None:
+    email = random_email()
+    password = random_lower_string()
+    crud.create_user(
+        session=db,
+        user_create=UserCreate(email=email, password=password, hospital_id=hospital.id),
+    )
+    user_in = UserCreate(
+        email=email.upper(), password=password, hospital_id=hospital.id
+    )
+    with pytest.raises(crud.DuplicateEmailError):
+        crud.create_user(session=db, user_create=user_in)
+
+
+def test_deleted_users_email_can_be_registered_again(
+    db: Session, hospital: Hospital
+) -> None:
+    email = random_email()
+    user_in = UserCreate(
+        email=email, password=random_lower_string(), hospital_id=hospital.id
+    )
+    deleted = crud.create_user(session=db, user_create=user_in)
+    crud.soft_delete_user(session=db, db_user=deleted)
+
+    user = crud.create_user(session=db, user_create=user_in)
+    assert user.id != deleted.id
+    assert crud.get_user_by_email(session=db, email=email) == user
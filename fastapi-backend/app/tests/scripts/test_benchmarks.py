@@ -0,0 +1,20 @@
+from app.benchmarks.runner import (
+    Benchmark,
+    build_report,
+    check_thresholds,
+    run_benchmark,
+)
+
+
+def test_run_benchmark_reports_median() -> None:
+    result = run_benchmark(Benchmark("noop", lambda: None, iterations=10, rounds=3))
+    assert result["iterations"] == 10
+    assert result["min_us"] <= result["median_us"] <= result["max_us"]
+
+
+def test_check_thresholds() -> None:
+    baseline = build_report({"a": {"median_us": 100.0}, "b": {"median_us": 10.0}})
+    report = build_report({"a": {"median_us": 119.0}, "b": {"median_us": 13.0}})
+    failures = check_thresholds(report, baseline, threshold=0.2)
+    assert len(failures) == 1
+    assert failures[0].startswith("b:")
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+from app import bootstrap
+from app.models import SeedState
+
+
+def test_migrate_skips_when_at_head() -> None:
+    engine_mock = MagicMock()
+    context_mock = MagicMock()
+    context_mock.get_current_heads.return_value = ("head",)
+    script_mock = MagicMock()
+    script_mock.get_heads.return_value = ["head"]
+
+    with (
+        patch("app.bootstrap.MigrationContext.configure", return_value=context_mock),
+        patch("app.bootstrap.ScriptDirectory.from_config", return_value=script_mock),
+        patch("app.bootstrap.command.upgrade") as upgrade_mock,
+    ):
+        assert bootstrap.migrate(engine_mock) is False
+        upgrade_mock.assert_not_called()
+
+
+def test_migrate_upgrades_when_behind() -> None:
+    engine_mock = MagicMock()
+    context_mock = MagicMock()
+    context_mock.get_current_heads.return_value = ()
+    script_mock = MagicMock()
+    script_mock.get_heads.return_value = ["head"]
+
+    with (
+        patch("app.bootstrap.MigrationContext.configure", return_value=context_mock),
+        patch("app.bootstrap.ScriptDirectory.from_config", return_value=script_mock),
+        patch("app.bootstrap.command.upgrade") as upgrade_mock,
+    ):
+        assert bootstrap.migrate(engine_mock) is True
+        upgrade_mock.assert_called_once()
+
+
+def test_seed_skips_when_checksum_unchanged() -> None:
+    session_mock = MagicMock()
+    session_mock.__enter__.return_value = session_mock
+    session_mock.get.return_value = SeedState(
+        name=bootstrap.SEED_NAME, checksum=bootstrap.seed_checksum()
+    )
+
+    with (
+        patch.object(bootstrap, "Session", return_value=session_mock),
+        patch.object(bootstrap, "init_db") as init_db_mock,
+    ):
+        assert bootstrap.seed(MagicMock()) is False
+        init_db_mock.assert_not_called()
@@ -0,0 +1,25 @@
+from app.loadtest.runner import Recorder, RouteStats, compare_to_baseline
+
+
+def test_route_stats_percentiles() -> None:
+    stats = RouteStats(latencies_ms=[float(n) for n in range(1, 101)])
+    assert stats.percentile(50) == 51.0
+    assert stats.percentile(99) == 99.0
+    assert RouteStats().percentile(95) == 0.0
+
+
+def test_compare_to_baseline_flags_regressions() -> None:
+    recorder = Recorder()
+    for _ in range(10):
+        recorder.record("GET /users/me", 10.0, ok=True)
+    baseline = recorder.report(duration_s=1.0)
+
+    assert compare_to_baseline(baseline, baseline, tolerance=0.2) == []
+
+    slower = Recorder()
+    for _ in range(10):
+        slower.record("GET /users/me", 15.0, ok=True)
+    regressions = compare_to_baseline(
+        slower.report(duration_s=1.0), baseline, tolerance=0.2
+    )
+    assert any("p95_ms" in regression for regression in regressions)
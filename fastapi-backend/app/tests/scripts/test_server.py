@@ -0,0 +1,43 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _get(url: str, timeout: float = 20) -> httpx.Response:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return httpx.get(url)
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def test_workers_are_recycled_and_stopped() -> None:
+    port = _free_port()
+    env = {**os.environ, "SERVER_MAX_REQUESTS": "1"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", "1", "--port", str(port)],
+        env=env,
+    )
+    try:
+        # Every request is served by a fresh worker forked by the master
+        for _ in range(3):
+            response = _get(f"http://127.0.0.1:{port}/api/v1/utils/livez")
+            assert response.status_code == 200
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+    finally:
+        server.kill()
@@ -0,0 +1,43 @@
+import time
+from typing import Any
+
+
+class FakeRedis:
+    """In-process stand-in for the few ``redis.Redis`` commands the cache uses."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, tuple[bytes, float | None]] = {}
+
+    def _get(self, key: str) -> bytes | None:
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> bytes | None:
+        return self._get(key)
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: bytes | int, px: int | None = None) -> None:
+        expires_at = time.monotonic() + px / 1000 if px else None
+        # Redis stores numbers as their decimal string
+        stored = str(value).encode() if isinstance(value, int) else value
+        self.data[key] = (stored, expires_at)
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":  # noqa: ARG002
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis) -> None:
+        self.client = client
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    def set(self, key: str, value: bytes | int, px: int | None = None) -> None:
+        self.commands.append(("set", (key, value, px)))
+
+    def execute(self) -> list[Any]:
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
@@ -0,0 +1,107 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event, text
+
+# Tables that grow with usage, a filtered sequential scan on any of them (or on
+# one of the item partitions) means an index is missing
+LARGE_TABLES = {"item", "user"}
+# Unless the relation is this small, when reading it whole costs about as much
+# as an index lookup (e.g. a hash partition few hospitals fall into)...
+SMALL_RELATION_ROWS = 1000
+# ...or the filter keeps this much of it, e.g. the partition key filter on a
+# pruned partition, which is mostly rows of the one hospital
+UNSELECTIVE_FILTER = 0.1
+
+
+@dataclass
+class CapturedStatements:
+    statements: list[tuple[str, Any]] = field(default_factory=list)
+
+
+@contextmanager
+def capture_statements(engine: Engine) -> Iterator[CapturedStatements]:
+    captured = CapturedStatements()
+
+    def before_cursor_execute(
+        _conn: Any,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        _context: Any,
+        executemany: bool,
+    ) -> None:
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            params = parameters[0] if executemany and parameters else parameters
+            captured.statements.append((statement, params))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _table_of(relation: str) -> str:
+    # Partitions are named <table>_p<n>
+    table, _, suffix = relation.rpartition("_p")
+    return table if table and suffix.isdigit() else relation
+
+
+def relation_rows(engine: Engine) -> dict[str, float]:
+    """Estimated rows of the large tables and their partitions, once analyzed."""
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text(
+                "SELECT relname, reltuples FROM pg_class "
+                "WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace"
+            )
+        ).all()
+    return {
+        relation: max(tuples, 0)
+        for relation, tuples in rows
+        if _table_of(relation) in LARGE_TABLES
+    }
+
+
+def filtered_seq_scans(
+    plan: dict[str, Any], sizes: dict[str, float] | None = None
+) -> list[str]:
+    """
+    Return the large tables a plan scans sequentially with a filter.
+
+    With ``sizes`` (see ``relation_rows``) scans the planner rightly prefers,
+    of small relations or with unselective filters, are left out.
+    """
+    found = []
+    relation = plan.get("Relation Name")
+    if (
+        plan.get("Node Type") == "Seq Scan"
+        and relation
+        and _table_of(relation) in LARGE_TABLES
+        and "Filter" in plan
+        and not _seq_scan_expected(plan, sizes.get(relation) if sizes else None)
+    ):
+        found.append(relation)
+    for child in plan.get("Plans", []):
+        found.extend(filtered_seq_scans(child, sizes))
+    return found
+
+
+def _seq_scan_expected(plan: dict[str, Any], rows: float | None) -> bool:
+    if rows is None:
+        return False
+    if rows < SMALL_RELATION_ROWS:
+        return True
+    return float(plan.get("Plan Rows", 0)) >= rows * UNSELECTIVE_FILTER
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> dict[str, Any]:
+    with engine.connect() as connection:
+        result = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        ).scalar_one()
+    plan: dict[str, Any] = result[0]["Plan"]
+    return plan
@@ -1,9 +1,9 @@
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, col, select
 
 from app import crud
 from app.core.config import settings
-from app.models import User, UserCreate, UserUpdate
+from app.models import Hospital, User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -19,10 +19,19 @@ def user_authentication_headers(
     return headers
 
 
+def get_hospital(db: Session) -> Hospital:
+    """A hospital of the seed data, users cannot exist without one."""
+    hospital = db.exec(select(Hospital).order_by(col(Hospital.name))).first()
+    assert hospital is not None, "The hospitals are seeded by init_db"
+    return hospital
+
+
 def create_random_user(db: Session) -> User:
     email = random_email()
     password = random_lower_string()
-    user_in = UserCreate(email=email, password=password)
+    user_in = UserCreate(
+        email=email, password=password, hospital_id=get_hospital(db).id
+    )
     user = crud.create_user(session=db, user_create=user_in)
     return user
 
@@ -38,10 +47,12 @@ def authentication_token_from_email(
     password = random_lower_string()
     user = crud.get_user_by_email(session=db, email=email)
     if not user:
-        user_in_create = UserCreate(email=email, password=password)
+        user_in_create = UserCreate(
+            email=email, password=password, hospital_id=get_hospital(db).id
+        )
         user = crud.create_user(session=db, user_create=user_in_create)
     else:
-        user_in_update = UserUpdate(password=password)
+        user_in_update = UserUpdate(password=password, hospital_id=user.hospital_id)
         if not user.id:
             raise Exception("User id not set")
         user = crud.update_user(session=db, db_user=user, user_in=user_in_update)
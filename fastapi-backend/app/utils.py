@@ -1,6 +1,7 @@
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -22,11 +23,27 @@ class EmailData:
     subject: str
 
 
+EMAIL_TEMPLATES_DIR = Path(__file__).parent / "email-templates" / "build"
+
+
+@lru_cache
+def get_email_template(template_name: str) -> Template:
+    template_str = (EMAIL_TEMPLATES_DIR / template_name).read_text()
+    return Template(template_str)
+
+
+def compile_email_templates() -> int:
+    """Compile every built template ahead of time, returns how many were compiled."""
+    if not EMAIL_TEMPLATES_DIR.is_dir():
+        return 0
+    templates = sorted(EMAIL_TEMPLATES_DIR.glob("*.html"))
+    for template in templates:
+        get_email_template(template.name)
+    return len(templates)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
+    html_content = get_email_template(template_name).render(context)
     return html_content
 
 
@@ -6,3 +6,4 @@ set -x
 mypy app
 ruff check app
 ruff format app --check
+python -m app.openapi --check
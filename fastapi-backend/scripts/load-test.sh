@@ -0,0 +1,14 @@
+#! /usr/bin/env bash
+
+set -e
+set -x
+
+# Prepare the database the same way a deploy does
+bash scripts/prestart.sh
+
+# Serve the app in the background for the duration of the run
+fastapi run --workers "${LOAD_TEST_WORKERS:-4}" --port 8001 app/main.py &
+server_pid=$!
+trap 'kill $server_pid' EXIT
+
+python -m app.loadtest --base-url http://localhost:8001 "$@"
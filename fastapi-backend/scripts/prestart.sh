@@ -3,11 +3,5 @@
 set -e
 set -x
 
-# Let the DB start
-python app/backend_pre_start.py
-
-# Run migrations
-alembic upgrade head
-
-# Create initial data in DB
-python app/initial_data.py
+# Wait for the DB, run pending migrations and load changed seed data
+python -m app.bootstrap
@@ -3,6 +3,10 @@
 set -e
 set -x
 
-coverage run --source=app -m pytest
+# One database per worker, see app/tests/conftest.py
+pytest -n "${PYTEST_WORKERS:-auto}" -m "not commits" --cov=app --cov-report=
+# Serially: the workers' open transactions hold back the snapshot xmin the
+# modules that commit (test_sync) depend on
+pytest -m commits --cov=app --cov-append --cov-report=
 coverage report --show-missing
 coverage html --title "${@-coverage}"